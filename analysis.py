@@ -3,34 +3,87 @@ from db import (
     get_data_from_myhabit_by_period,
     get_distinct_value,
     get_data_from_tracker,
+    iter_habit_log,
+    get_habit_log_page,
+    get_habit_ids,
+    period_log_columns,
+    day_or_month_range,
+    week_range,
+    EPOCH,
     weekly_habit_log,
     daily_and_monthly_habit_log,
+    completion_count_of_all_habits,
+    completion_grid,
+    date_ordinals,
+    period_label,
 )
-from habit_tracker import Habit_Tracker
+from habit_tracker import Habit_Tracker, parse_frequency
+from streak_engine import streak_from_counts
+from query_cache import cached
+from profiling import profiled_methods
+from records import HabitLog
 from datetime import date, datetime, timedelta
 from dateutil.relativedelta import relativedelta
+import numpy as np
+import pandas as pd
 
+CALENDAR_MAX_PERIODS = 5 * 366  # columns of Analysis.calendar: five years of days
 
+
+@profiled_methods
 class Analysis:
-    def __init__(self, db):
+    def __init__(self, db, cache=None):
+        """
+        Args:
+            cache: an optional QueryCache. Read methods then reuse results until the database is written.
+        """
         self.db = db
+        self.cache = cache
 
+    @cached
     def get_habit_data(self, column, habit_name):
         return get_data_from_myhabit_by_name(self.db, column, habit_name)
 
+    @cached
     def habit_list(self):
         habit_list = get_distinct_value(self.db, "habit_name", "myhabit")
         return habit_list if habit_list else []
 
+    @cached
     def habit_list_by_frequency(self, period):
         habit_by_frequency = get_data_from_myhabit_by_period(
             self.db, "habit_name", period
         )
         return habit_by_frequency if habit_by_frequency else []
 
+    @cached
     def habit_log_from_tracker(self, habit_name):
         return get_data_from_tracker(self.db, "date, status", habit_name)
 
+    @cached
+    def habit_log_records(self, habit_name):
+        """
+        Returns the same records as habit_log_from_tracker as a compact HabitLog.
+        """
+        return HabitLog.from_rows(iter_habit_log(self.db, habit_name))
+
+    @cached
+    def habit_log_page(self, habit_name, limit=None, before=None, start=None, end=None):
+        """
+        Returns one page of habit_log_records, latest first. See db.get_habit_log_page for the arguments.
+
+        Returns:
+            tuple: (HabitLog, cursor). Pass cursor as before to get the next page. It is None after the last page.
+        """
+        rows = get_habit_log_page(self.db, habit_name, limit, before, start, end)
+        log = HabitLog.from_rows(
+            (minute_epoch, status) for _, _, minute_epoch, status in rows
+        )
+        if limit is None or len(rows) < limit:
+            return log, None
+        return log, (rows[-1][1], rows[-1][0])
+
+    @cached
     def habit_data_in_selected_period(self, selected_time, weekly=False):
         """
         Returns the habit log in the selected period. The period can be day, week or month.
@@ -50,17 +103,85 @@ class Analysis:
             converted_time = str(selected_time).replace("/", "-")
             results, columns = daily_and_monthly_habit_log(self.db, converted_time)
 
-        if results:
-            final_result = [[item][0] for item in results]
+        return (results if results else None), list(columns)
+
+    @cached
+    def habit_data_frame(self, selected_time, weekly=False):
+        """
+        Returns the records of habit_data_in_selected_period as a pandas DataFrame built column by column,
+        without a tuple or string per record: date is datetime64, habit_name and status are categoricals.
+        The weekly log has year_week as second column. The DataFrame is empty if there is no record.
+        """
+        if weekly:
+            day_range = week_range(selected_time)
         else:
-            final_result = None
+            day_range = day_or_month_range(str(selected_time).replace("/", "-"))
+        minutes, habit_ids, statuses, labels = period_log_columns(self.db, day_range)
 
-        column_name = []
-        for i in range(len(columns)):
-            column_name.append(columns[i])
+        habits = sorted(get_habit_ids(self.db).items())
+        codes = np.full(max((habit_id for _, habit_id in habits), default=0) + 1, -1)
+        codes[[habit_id for _, habit_id in habits]] = range(len(habits))
+        frame = pd.DataFrame(
+            {
+                "date": pd.to_datetime(minutes, unit="m"),
+                "habit_name": pd.Categorical.from_codes(
+                    codes[habit_ids], [habit_name for habit_name, _ in habits]
+                ),
+                "status": pd.Categorical.from_codes(statuses, labels),
+            }
+        )
+        if weekly:
+            year_week = (EPOCH + timedelta(day_range[0])).strftime("%Y-W%W")
+            frame.insert(
+                1,
+                "year_week",
+                pd.Categorical.from_codes(
+                    np.zeros(len(frame), dtype=np.int8), [year_week]
+                ),
+            )
+        return frame
 
-        return final_result, column_name
+    @cached
+    def calendar(self, start, end, period="day"):
+        """
+        Returns the completions (done and skip records) of every habit per day, week or month as a matrix,
+        e.g. for a heatmap. It is read in one query on tracker_rollup and cached per range until the next write.
 
+        Args:
+            start, end: first and last day (date or "YYYY-MM-DD"), both included.
+                The periods containing them are the first and last column.
+            period: "day", "week" or "month".
+        Returns:
+            tuple: (matrix, habit_names, labels).
+                - matrix: an int32 NumPy array with one row per habit and one column per period.
+                - habit_names: the habit of every row, sorted by name.
+                - labels: the completion_count key of every column, e.g. "2025-01-07", "2025-W02" or "2025-01".
+        Raises:
+            ValueError: if end is before start, or the range spans more than CALENDAR_MAX_PERIODS periods.
+        """
+        index = ("day", "week", "month").index(period) + 1
+        first = date_ordinals(str(start))[index]
+        last = date_ordinals(str(end))[index]
+        if last < first:
+            raise ValueError("end must not be before start")
+        if last - first >= CALENDAR_MAX_PERIODS:
+            raise ValueError(
+                f"the range must not span more than {CALENDAR_MAX_PERIODS} periods"
+            )
+
+        habits = sorted(get_habit_ids(self.db).items())
+        rows = np.full(max((habit_id for _, habit_id in habits), default=0) + 1, -1)
+        rows[[habit_id for _, habit_id in habits]] = range(len(habits))
+        matrix = np.zeros((len(habits), last - first + 1), dtype=np.int32)
+        habit_ids, ordinals, counts = completion_grid(self.db, period, first, last).T
+        # skips a habit added after get_habit_ids
+        known = np.isin(habit_ids, [habit_id for _, habit_id in habits])
+        matrix[rows[habit_ids[known]], ordinals[known] - first] = counts[known]
+
+        labels = [period_label(ordinal, period) for ordinal in range(first, last + 1)]
+        return matrix, [habit_name for habit_name, _ in habits], labels
+
+    @cached
     def calculate_successrate(self, habit_name):
         """
         Calculates the completion(Done and Skip) rate (0.0-1.0).
@@ -83,36 +204,73 @@ class Analysis:
 
         habit_tracker = Habit_Tracker(self.db)
         frequency, start_date = habit_data
-        times = int(frequency.split()[0])
-        period = frequency.split()[3]
+        _, period = parse_frequency(frequency)
 
+        if datetime.strptime(start_date, "%Y-%m-%d %H:%M").date() > date.today():
+            return 0
+
+        try:
+            habit_log = habit_tracker.completion_count(habit_name, period)
+        except Exception:
+            return 0
+        return self.successrate_from_log(habit_log, frequency, start_date)
+
+    def successrate_from_log(self, habit_log, frequency, start_date):
+        """
+        Calculates the completion rate (0.0-1.0) from the output of Habit_Tracker.completion_count
+        or the habit log of completion_count_of_all_habits.
+        See calculate_successrate for the logic.
+        """
+        times, period = parse_frequency(frequency)
         start_date = datetime.strptime(start_date, "%Y-%m-%d %H:%M").date()
         today = date.today()
 
         if start_date > today:
             return 0
 
-        try:
-            if period == "day":
-                habit_log = habit_tracker.completion_count(habit_name, period)
-                total_count = (today - start_date).days + 1
-                success_count = sum(1 for row in habit_log if row[1] >= times)
-
-            elif period == "week":
-                habit_log = habit_tracker.completion_count(habit_name, period)
-                start_of_this_week = today - timedelta(today.weekday())
-                start_of_target_week = start_date - timedelta(start_date.weekday())
-                total_count = (start_of_this_week - start_of_target_week).days / 7 + 1
-                success_count = sum(1 for row in habit_log if row[1] >= times)
-
-            elif period == "month":
-                habit_log = habit_tracker.completion_count(habit_name, period)
-                delta = relativedelta(today, start_date)
-                total_count = delta.years * 12 + delta.months + 1
-                success_count = sum(1 for row in habit_log if row[1] >= times)
-
-            success_rate = round(success_count / total_count, 4)
-            return success_rate
+        total_count = 0
+        if period == "day":
+            total_count = (today - start_date).days + 1
 
-        except Exception:
+        elif period == "week":
+            start_of_this_week = today - timedelta(today.weekday())
+            start_of_target_week = start_date - timedelta(start_date.weekday())
+            total_count = (start_of_this_week - start_of_target_week).days / 7 + 1
+
+        elif period == "month":
+            delta = relativedelta(today, start_date)
+            total_count = delta.years * 12 + delta.months + 1
+
+        if not total_count:
             return 0
+        success_count = sum(1 for row in habit_log if row[1] >= times)
+        success_rate = round(success_count / total_count, 4)
+        return success_rate
+
+    @cached
+    def rank_all(self, period=None):
+        """
+        Calculates the completion rate, current streak and longest streak of all habits at once,
+        from a single grouped query instead of one Habit and several queries per habit.
+
+        Args:
+            period: "day", "week" or "month" to only rank habits with that periodicity. None for all habits.
+        Returns:
+            tuple: (rows, columns). rows is a list of tuple(habit_name, success_rate, current_streak, longest_streak)
+                   sorted by success rate, highest first.
+        """
+        rows = []
+        all_habits = completion_count_of_all_habits(self.db, period)
+        for habit_name, frequency, start_date, habit_log in all_habits:
+            times, habit_period = parse_frequency(frequency)
+            ordinals = [row[0] for row in habit_log]
+            counts = [row[1] for row in habit_log]
+            updated_streak, max_streak = streak_from_counts(
+                ordinals, counts, habit_period, times
+            )
+            success_rate = self.successrate_from_log(habit_log, frequency, start_date)
+            rows.append((habit_name, success_rate, updated_streak, max_streak))
+
+        rows.sort(key=lambda row: row[1], reverse=True)
+        columns = ["habit_name", "success_rate", "current_streak", "longest_streak"]
+        return rows, columns
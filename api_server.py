@@ -0,0 +1,277 @@
+import argparse
+import json
+import sqlite3
+from datetime import date, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from analysis import Analysis
+from db import configure_storage, create_tables, get_habit_id, iter_myhabit
+from habit_tracker import Habit_Tracker, parse_frequency
+from query_cache import QueryCache
+
+STATUSES = ("Done!", "Skip.", "Missed.")
+PERIODS = ("day", "week", "month")
+# errors of a database held by another writer, which the client may retry
+RETRYABLE_ERRORS = (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class TrackerService:
+    """
+    The JSON API of the habit tracker, independent of HTTP so that batches can be dispatched in process.
+
+    Routes:
+        GET  /habits                              all habits
+        POST /habits      {habit_name, description, frequency, start_date}
+        POST /checkoff    {habit_name, date, status}
+        POST /checkoff_many  {records: [[habit_name, date, status], ...]}
+        GET  /streaks?habit=NAME                  current and longest streak of one habit
+        GET  /ranking?period=day|week|month       success rate and streaks of all habits
+        GET  /log?day=YYYY-MM-DD | ?week=YYYY-MM-DD | ?month=YYYY-MM
+        GET  /calendar?start=YYYY-MM-DD&end=YYYY-MM-DD&period=day|week|month
+                                                  completions of all habits per period, e.g. for a heatmap
+        POST /batch       {requests: [{method, path, body}, ...]}
+    """
+
+    def __init__(self, db, cache=None):
+        self.db = db
+        self.tracker = Habit_Tracker(db)
+        self.analysis = Analysis(db, cache=cache)
+        self.routes = {
+            ("GET", "/habits"): self.list_habits,
+            ("POST", "/habits"): self.add_habit,
+            ("POST", "/checkoff"): self.checkoff,
+            ("POST", "/checkoff_many"): self.checkoff_many,
+            ("GET", "/streaks"): self.streaks,
+            ("GET", "/ranking"): self.ranking,
+            ("GET", "/log"): self.period_log,
+            ("GET", "/calendar"): self.calendar,
+            ("POST", "/batch"): self.batch,
+        }
+
+    def handle(self, method, path, body=None):
+        """
+        Dispatches one request.
+
+        Returns:
+            tuple: (HTTP status code, JSON-serializable payload). Any unexpected error is a 500 response.
+        """
+        try:
+            url = urlsplit(path)
+            route = self.routes.get((method, url.path))
+            if route is None:
+                return HTTPStatus.NOT_FOUND, {
+                    "error": f"No route for {method} {url.path}"
+                }
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            return route(query, body if body is not None else {})
+        except ApiError as err:
+            return err.status, {"error": str(err)}
+        except (KeyError, TypeError, ValueError) as err:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Bad request: {err!r}"}
+        except sqlite3.IntegrityError as err:
+            return HTTPStatus.CONFLICT, {"error": str(err)}
+        except sqlite3.OperationalError as err:
+            # e.g. "database is locked" after the busy timeout; the client may retry
+            if (getattr(err, "sqlite_errorcode", None) or 0) & 0xFF in RETRYABLE_ERRORS:
+                return HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(err)}
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(err)}
+        except Exception as err:  # noqa: BLE001 - a request must always get a reply, not a dropped connection
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": repr(err)}
+
+    def require_habit(self, habit_name):
+        if get_habit_id(self.db, habit_name) is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Habit not found: {habit_name}")
+
+    def list_habits(self, query, body):
+        fields = ("habit_name", "description", "frequency", "start_date")
+        return HTTPStatus.OK, [dict(zip(fields, row)) for row in iter_myhabit(self.db)]
+
+    def add_habit(self, query, body):
+        frequency = body["frequency"]
+        try:
+            times, period = parse_frequency(frequency)
+        except (ValueError, IndexError):
+            times, period = 0, None
+        if (
+            times < 1
+            or frequency != f"{times} time(s) per {period}"
+            or period not in PERIODS
+        ):
+            raise ValueError(
+                f'frequency must be like "3 time(s) per week", per one of {PERIODS}'
+            )
+        datetime.strptime(body["start_date"], "%Y-%m-%d %H:%M")
+        self.tracker.add_habit(
+            body["habit_name"],
+            body["description"],
+            body["frequency"],
+            body["start_date"],
+        )
+        return HTTPStatus.CREATED, {"habit_name": body["habit_name"].title()}
+
+    def checkoff(self, query, body):
+        habit_name, status = body["habit_name"], body["status"]
+        if status not in STATUSES:
+            raise ValueError(f"status must be one of {STATUSES}")
+        self.require_habit(habit_name)
+        self.tracker.checkoff(habit_name, body["date"], status)
+        return HTTPStatus.CREATED, self.streak_payload(habit_name)
+
+    def checkoff_many(self, query, body):
+        records = [tuple(record) for record in body["records"]]
+        for _, _, status in records:
+            if status not in STATUSES:
+                raise ValueError(f"status must be one of {STATUSES}")
+        return HTTPStatus.CREATED, {"inserted": self.tracker.checkoff_many(records)}
+
+    def streaks(self, query, body):
+        self.require_habit(query["habit"])
+        return HTTPStatus.OK, self.streak_payload(query["habit"])
+
+    def streak_payload(self, habit_name):
+        current_streak, longest_streak = self.tracker.get_streak(habit_name)
+        return {
+            "habit_name": habit_name,
+            "current_streak": current_streak,
+            "longest_streak": longest_streak,
+        }
+
+    def ranking(self, query, body):
+        rows, columns = self.analysis.rank_all(query.get("period"))
+        return HTTPStatus.OK, [dict(zip(columns, row)) for row in rows]
+
+    def period_log(self, query, body):
+        if "week" in query:
+            rows, columns = self.analysis.habit_data_in_selected_period(
+                date.fromisoformat(query["week"]), True
+            )
+        elif "day" in query:
+            rows, columns = self.analysis.habit_data_in_selected_period(
+                date.fromisoformat(query["day"]).isoformat()
+            )
+        elif "month" in query:
+            date.fromisoformat(query["month"] + "-01")
+            rows, columns = self.analysis.habit_data_in_selected_period(query["month"])
+        else:
+            raise ValueError("one of day, week or month is required")
+        return HTTPStatus.OK, [dict(zip(columns, row)) for row in rows or []]
+
+    def calendar(self, query, body):
+        matrix, habit_names, labels = self.analysis.calendar(
+            date.fromisoformat(query["start"]),
+            date.fromisoformat(query["end"]),
+            query.get("period", "day"),
+        )
+        return HTTPStatus.OK, {
+            "habits": habit_names,
+            "periods": labels,
+            "counts": matrix.tolist(),
+        }
+
+    def batch(self, query, body):
+        """
+        Runs several requests in one round trip. Each one gets its own status; a failing request does not stop the others.
+        """
+        responses = []
+        for request in body["requests"]:
+            if not isinstance(request, dict) or not isinstance(
+                request.get("path"), str
+            ):
+                status, payload = (
+                    HTTPStatus.BAD_REQUEST,
+                    {"error": "A batch request must be an object with a path"},
+                )
+            elif request["path"].startswith("/batch"):
+                status, payload = HTTPStatus.BAD_REQUEST, {"error": "Nested batch"}
+            else:
+                status, payload = self.handle(
+                    request.get("method", "GET"), request["path"], request.get("body")
+                )
+            responses.append({"status": int(status), "body": payload})
+        return HTTPStatus.OK, {"responses": responses}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    Speaks HTTP/1.1, so clients can keep one connection open for many requests.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, which Nagle's algorithm would delay by a round trip
+    disable_nagle_algorithm = True
+    service = None
+
+    def do_GET(self):
+        self.respond(*self.service.handle("GET", self.path))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self.respond(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large"}
+            )
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as err:
+            self.respond(HTTPStatus.BAD_REQUEST, {"error": f"Invalid JSON: {err}"})
+            return
+        self.respond(*self.service.handle("POST", self.path, body))
+
+    def respond(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(db, host="127.0.0.1", port=8000, profile="wal"):
+    """
+    Creates a threading HTTP server for the database. Connections are pooled and reused across requests,
+    and Analysis results are cached until the next write.
+    """
+    configure_storage(db, profile)
+    create_tables(db)
+    service = TrackerService(db, cache=QueryCache())
+    handler = type("TrackerRequestHandler", (RequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve the habit tracker as a JSON API."
+    )
+    parser.add_argument("--db", default="habit_tracker.db")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.db, args.host, args.port)
+    print(f"Serving {args.db} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,55 @@
 import streamlit as st
-from db import create_tables
+import altair as alt
+from db import create_tables, close_pool, configure_storage
 from habit_tracker import Habit_Tracker
 from analysis import Analysis
+from query_cache import QueryCache, bump_generation
 from habit import Habit
+from tenants import TenantRouter
+import profiling
 from datetime import timedelta, datetime
 import sqlite3
+import numpy as np
 import pandas as pd
 import os
 import shutil
 
-user_db = "habit_tracker.db"
+
+@st.cache_resource
+def tenant_router():
+    return TenantRouter(os.environ.get("HABIT_TRACKER_TENANTS_DIR", "tenants"))
+
+
+def log_frame(log):
+    # built from the columns of the HabitLog, without a tuple per record
+    return pd.DataFrame(
+        {
+            "Date": pd.to_datetime(
+                np.frombuffer(log.minutes, dtype=np.int64), unit="m"
+            ).strftime("%Y-%m-%d %H:%M"),
+            "Status": pd.Categorical.from_codes(
+                np.frombuffer(log.statuses, dtype=np.int8), log.labels
+            ),
+        }
+    )
+
+
+# With ?debug=1 in the URL or HABIT_TRACKER_PROFILE=1, the calls and queries of each run are shown in the sidebar.
+debug = (
+    st.query_params.get("debug") == "1"
+    or os.environ.get("HABIT_TRACKER_PROFILE") == "1"
+)
+run_profile, run_token = profiling.start(debug)
+
+# With ?user=<id> in the URL, the user gets an own database file (see tenants.py).
+user_id = st.query_params.get("user")
+user_db = tenant_router().database(user_id) if user_id else "habit_tracker.db"
 demo_predefined_db = "demo.db"
+LOG_PAGE_SIZE = 100  # records shown in the habit details before "Show older records"
 demo_working_db = (
     "demo_working.db"  # copy of demo_predefined_db for users to interact with
 )
 
-create_tables()
-
 # Initialize
 if "page" not in st.session_state:
     st.session_state.page = "Home"
@@ -24,6 +57,16 @@ if "page" not in st.session_state:
 if "db_file" not in st.session_state:
     st.session_state.db_file = user_db
 
+if "log_pages" not in st.session_state:
+    # habit name -> (DataFrame of the records shown in the habit details, cursor of the next older page)
+    st.session_state.log_pages = {}
+
+if "query_cache" not in st.session_state:
+    st.session_state.query_cache = QueryCache()
+
+configure_storage(st.session_state.db_file, "wal")
+create_tables(st.session_state.db_file)
+
 # Sidebar menu
 with st.sidebar:
     st.title("**Habit Tracker!**")
@@ -48,17 +91,24 @@ with st.sidebar:
     st.header("App Mode")
     if st.button("My Habit"):
         st.session_state.db_file = user_db
+        st.session_state.log_pages = {}
         st.rerun()
     if st.button("Fresh Demo"):
         if os.path.exists(demo_predefined_db):
+            close_pool(demo_working_db)
+            for wal_file in (demo_working_db + "-wal", demo_working_db + "-shm"):
+                if os.path.exists(wal_file):
+                    os.remove(wal_file)
             shutil.copy(demo_predefined_db, demo_working_db)
+            bump_generation(demo_working_db)
             st.session_state.db_file = demo_working_db
+            st.session_state.log_pages = {}
             st.rerun()
         else:
             st.error("Demo database not found!")
 
     tracker = Habit_Tracker(st.session_state.db_file)
-    analysis = Analysis(st.session_state.db_file)
+    analysis = Analysis(st.session_state.db_file, cache=st.session_state.query_cache)
     now = datetime.now()
     today = datetime.today()
 
@@ -156,6 +206,8 @@ elif page == "Checkoff":
             tracker.checkoff(
                 habit_name=habit_to_checkoff, date=time_str, status=check_off_status
             )
+            # the shown pages start from the latest record, read them again
+            st.session_state.log_pages.pop(habit_to_checkoff, None)
             st.success(
                 f"New status submitted: **{habit_to_checkoff}** at **{time_str}**: {check_off_status}"
             )
@@ -163,8 +215,8 @@ elif page == "Checkoff":
 # Analysis page
 elif page == "Analysis":
     st.header("Habit Report")
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(
-        ["Overview", "Habit details", "Day View", "Week View", "Month View"]
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
+        ["Overview", "Habit details", "Day View", "Week View", "Month View", "Calendar"]
     )
 
     # Overview
@@ -191,24 +243,23 @@ elif page == "Analysis":
                 st.write(", ".join(habits_list_frequency))
         st.write("---")
         
+        ranking_period = {
+            "All habits": None,
+            "Daily habits": "day",
+            "Weekly habits": "week",
+            "Monthly habits": "month",
+        }[selected_habit_period]
+        ranking, _ = analysis.rank_all(ranking_period)
+
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("Success Rate Ranking")
-            success_rate_list = []
-            for habit in habits_list_frequency:
-                success_rate = analysis.calculate_successrate(habit)
-                success_rate_list.append((habit, success_rate))
-            success_rate_list.sort(key=lambda x: x[1], reverse=True)
-            for habit, success_rate in success_rate_list:
+            for habit, success_rate, _, _ in ranking:
                 st.write(f"{habit}: {success_rate * 100:.2f}%")
 
         with col2:
             st.subheader("Longest Streak Ranking")
-            maximum_streak_list = []
-            for item in habits_list_frequency:
-                habit = Habit(st.session_state.db_file, item)
-                maximum_streak = habit.longest_streak
-                maximum_streak_list.append((habit.habit_name, maximum_streak))
+            maximum_streak_list = [(row[0], row[3]) for row in ranking]
             maximum_streak_list.sort(key=lambda x: x[1], reverse=True)
             for habit, maximum_streak in maximum_streak_list:
                 st.write(f"{habit}: {maximum_streak}")
@@ -238,8 +289,22 @@ elif page == "Analysis":
                     st.write(f"Longest streak: {habit.longest_streak}")
                     st.write(f"Current streak: {habit.current_streak}")
                     st.write(f"Success rate: {success_rate * 100:.2f}%")
-                    df = pd.DataFrame(habit.log, columns=["Date", "Status"])
+                    # only the latest records are loaded, older pages are appended on request
+                    if selected_habit not in st.session_state.log_pages:
+                        log, older = habit.latest_entries(LOG_PAGE_SIZE)
+                        st.session_state.log_pages[selected_habit] = (
+                            log_frame(log),
+                            older,
+                        )
+                    df, older = st.session_state.log_pages[selected_habit]
                     st.dataframe(df)
+                    if older is not None and st.button("Show older records"):
+                        log, older = habit.entries_before(older, LOG_PAGE_SIZE)
+                        st.session_state.log_pages[selected_habit] = (
+                            pd.concat([df, log_frame(log)], ignore_index=True),
+                            older,
+                        )
+                        st.rerun()
                 else:
                     st.warning("No data.")
 
@@ -249,6 +314,7 @@ elif page == "Analysis":
                     if st.button("Yes, delete the habit"):
                         if selected_habit is not None:
                             tracker.delete_habit(selected_habit)
+                            st.session_state.log_pages.pop(selected_habit, None)
                         # st.success(f"Successfully deleted habit {selected_habit}!")
                         st.session_state.habit_visible = False
                         st.rerun()
@@ -256,11 +322,9 @@ elif page == "Analysis":
     # Daily View: data on a specific date
     with tab3:
         selected_date = st.date_input("Date", "today")
-        habit_data = analysis.habit_data_in_selected_period(selected_date)[0]
-        column_names = analysis.habit_data_in_selected_period(selected_date)[1]
+        df = analysis.habit_data_frame(selected_date)
 
-        if habit_data is not None:
-            df = pd.DataFrame(habit_data, columns=column_names)
+        if len(df):
             st.dataframe(df)
         else:
             st.warning("No record on the selected date!")
@@ -271,13 +335,9 @@ elif page == "Analysis":
         first_day_of_week = selected_date_in_week - timedelta(
             days=selected_date_in_week.weekday()
         )
-        habit_data = analysis.habit_data_in_selected_period(first_day_of_week, True)[0]
-        column_names = analysis.habit_data_in_selected_period(first_day_of_week, True)[
-            1
-        ]
+        df = analysis.habit_data_frame(first_day_of_week, True)
 
-        if habit_data is not None:
-            df = pd.DataFrame(habit_data, columns=column_names)
+        if len(df):
             st.dataframe(df)
         else:
             st.warning("No record in the selected week!")
@@ -289,11 +349,52 @@ elif page == "Analysis":
         months = list(range(1, 13))
         selected_month = st.selectbox("Month", months, index=months.index(now.month))
         time = str(selected_year) + "-" + f"{selected_month:02}"
-        habit_data = analysis.habit_data_in_selected_period(time)[0]
-        column_names = analysis.habit_data_in_selected_period(time)[1]
+        df = analysis.habit_data_frame(time)
 
-        if habit_data is not None:
-            df = pd.DataFrame(habit_data, columns=column_names)
+        if len(df):
             st.dataframe(df)
         else:
             st.warning("No record in the selected month!")
+
+    # Calendar: completions of all habits per day, week or month as a heatmap
+    with tab6:
+        calendar_range = st.date_input(
+            "Date range", (now.date() - timedelta(days=364), now.date())
+        )
+        calendar_period = st.selectbox("Per", ["day", "week", "month"])
+        # the range has one date while the second one is being picked
+        if len(calendar_range) == 2 and myhabits:
+            try:
+                matrix, habit_names, labels = analysis.calendar(
+                    *calendar_range, calendar_period
+                )
+            except ValueError as err:
+                # a range longer than CALENDAR_MAX_PERIODS is refused
+                st.warning(str(err))
+            else:
+                heatmap = (
+                    pd.DataFrame(matrix, index=habit_names, columns=labels)
+                    .rename_axis(index="Habit", columns="Period")
+                    .stack()
+                    .rename("Completions")
+                    .reset_index()
+                )
+                st.altair_chart(
+                    alt.Chart(heatmap)
+                    .mark_rect()
+                    .encode(
+                        x=alt.X("Period:O", sort=None, axis=alt.Axis(labelOverlap=True)),
+                        y=alt.Y("Habit:N"),
+                        color=alt.Color("Completions:Q", scale=alt.Scale(scheme="greens")),
+                        tooltip=["Habit", "Period", "Completions"],
+                    ),
+                    use_container_width=True,
+                )
+
+if run_profile is not None:
+    profiling.stop(run_token)
+    with st.sidebar.expander("Debug: calls and queries"):
+        st.text(run_profile.summary())
+        st.download_button(
+            "Prometheus metrics", run_profile.prometheus(), file_name="metrics.txt"
+        )
@@ -0,0 +1,153 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis import Analysis
+from habit_tracker import Habit_Tracker
+
+DEFAULT_MAX_WORKERS = 4
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+class DatabaseExecutor:
+    """
+    Runs blocking database calls on a bounded thread pool, so that awaiting them does not block the event loop.
+    At most max_workers calls run at once, the others wait in line.
+    Each worker thread borrows pooled connections through db.get_cursor, like any other thread.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="habit-db"
+        )
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def close(self):
+        """
+        Waits for the running calls and stops the worker threads.
+        """
+        self._executor.shutdown(wait=True)
+
+
+def get_executor():
+    """
+    Returns the DatabaseExecutor shared by the async classes that are not given one.
+    """
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = DatabaseExecutor()
+        return _default_executor
+
+
+class AsyncDatabase:
+    """
+    asyncio counterpart of the db module: awaiting call(db.get_habit_ids) runs db.get_habit_ids(self.db) on the executor.
+    """
+
+    def __init__(self, db, executor=None):
+        self.db = db
+        self.executor = executor or get_executor()
+
+    async def call(self, func, *args, **kwargs):
+        return await self.executor.run(func, self.db, *args, **kwargs)
+
+
+class AsyncHabitTracker:
+    """
+    asyncio counterpart of Habit_Tracker. Every method runs the Habit_Tracker method of the same name on the executor.
+    """
+
+    def __init__(self, db, executor=None):
+        self.db = db
+        self.tracker = Habit_Tracker(db)
+        self.executor = executor or get_executor()
+
+    async def add_habit(self, habit_name, description, frequency, start_date):
+        return await self.executor.run(
+            self.tracker.add_habit, habit_name, description, frequency, start_date
+        )
+
+    async def delete_habit(self, habit_name):
+        return await self.executor.run(self.tracker.delete_habit, habit_name)
+
+    async def checkoff(self, habit_name, date, status):
+        return await self.executor.run(self.tracker.checkoff, habit_name, date, status)
+
+    async def checkoff_many(self, records):
+        """
+        records is consumed on the executor, so it must not be an async iterable.
+        """
+        return await self.executor.run(self.tracker.checkoff_many, records)
+
+    async def completion_count(self, habit_name, period):
+        return await self.executor.run(
+            self.tracker.completion_count, habit_name, period
+        )
+
+    async def update_streak(self, habit_name):
+        return await self.executor.run(self.tracker.update_streak, habit_name)
+
+    async def get_streak(self, habit_name):
+        return await self.executor.run(self.tracker.get_streak, habit_name)
+
+
+class AsyncAnalysis:
+    """
+    asyncio counterpart of Analysis. Every method runs the Analysis method of the same name on the executor.
+    """
+
+    def __init__(self, db, cache=None, executor=None):
+        self.db = db
+        self.analysis = Analysis(db, cache=cache)
+        self.executor = executor or get_executor()
+
+    async def get_habit_data(self, column, habit_name):
+        return await self.executor.run(self.analysis.get_habit_data, column, habit_name)
+
+    async def habit_list(self):
+        return await self.executor.run(self.analysis.habit_list)
+
+    async def habit_list_by_frequency(self, period):
+        return await self.executor.run(self.analysis.habit_list_by_frequency, period)
+
+    async def habit_log_from_tracker(self, habit_name):
+        return await self.executor.run(self.analysis.habit_log_from_tracker, habit_name)
+
+    async def habit_log_records(self, habit_name):
+        return await self.executor.run(self.analysis.habit_log_records, habit_name)
+
+    async def habit_log_page(
+        self, habit_name, limit=None, before=None, start=None, end=None
+    ):
+        return await self.executor.run(
+            self.analysis.habit_log_page, habit_name, limit, before, start, end
+        )
+
+    async def habit_data_in_selected_period(self, selected_time, weekly=False):
+        return await self.executor.run(
+            self.analysis.habit_data_in_selected_period, selected_time, weekly
+        )
+
+    async def habit_data_frame(self, selected_time, weekly=False):
+        return await self.executor.run(
+            self.analysis.habit_data_frame, selected_time, weekly
+        )
+
+    async def calendar(self, start, end, period="day"):
+        return await self.executor.run(self.analysis.calendar, start, end, period)
+
+    async def calculate_successrate(self, habit_name):
+        return await self.executor.run(self.analysis.calculate_successrate, habit_name)
+
+    async def rank_all(self, period=None):
+        return await self.executor.run(self.analysis.rank_all, period)
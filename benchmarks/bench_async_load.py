@@ -0,0 +1,115 @@
+"""
+Runs hundreds of concurrent asyncio clients doing mixed checkoffs and reports against one database file
+through AsyncHabitTracker and AsyncAnalysis, for several executor sizes.
+Reports operations per second, p50/p99 latency, "database is locked" errors
+and the longest time the event loop was kept from running other tasks.
+
+Run from the repository root:
+    python -m benchmarks.bench_async_load [clients] [operations_per_client]
+"""
+
+import asyncio
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import db
+from async_tracker import AsyncAnalysis, AsyncHabitTracker, DatabaseExecutor
+from benchmarks.common import summarize, temp_workdir
+
+HABITS = 20
+CHECKOFF_SHARE = 0.6
+WORKERS = (1, 4, 16)
+
+
+async def client(i, operations, tracker, analysis, latencies, lock_errors):
+    rng = random.Random(i)
+    start_date = datetime.now() - timedelta(days=60)
+    for _ in range(operations):
+        habit_name = f"Habit {rng.randrange(HABITS)}"
+        moment = start_date + timedelta(minutes=rng.randrange(60 * 24 * 60))
+        if rng.random() < CHECKOFF_SHARE:
+            request = tracker.checkoff(
+                habit_name, moment.strftime("%Y-%m-%d %H:%M"), "Done!"
+            )
+        else:
+            read, *args = rng.choice(
+                (
+                    (analysis.rank_all,),
+                    (analysis.habit_data_in_selected_period, moment.date()),
+                    (analysis.habit_data_in_selected_period, moment.date(), True),
+                    (tracker.get_streak, habit_name),
+                )
+            )
+            request = read(*args)
+        started = time.perf_counter()
+        try:
+            await request
+        except sqlite3.OperationalError as err:
+            lock_errors.append(err)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def loop_lag(stop, lags):
+    """
+    Wakes up every 10 ms and records how late each wake-up was.
+    """
+    while not stop.is_set():
+        expected = time.perf_counter() + 0.01
+        await asyncio.sleep(0.01)
+        lags.append((time.perf_counter() - expected) * 1000)
+
+
+async def run(workers, clients, operations):
+    with temp_workdir():
+        db_file = "habit_tracker.db"
+        db.configure_storage(db_file, "wal")
+        db.create_tables(db_file)
+        executor = DatabaseExecutor(max_workers=workers)
+        tracker = AsyncHabitTracker(db_file, executor)
+        analysis = AsyncAnalysis(db_file, executor=executor)
+        for i in range(HABITS):
+            await tracker.add_habit(
+                f"Habit {i}",
+                "",
+                "1 time(s) per day",
+                (date.today() - timedelta(90)).strftime("%Y-%m-%d 00:00"),
+            )
+
+        latencies = []
+        lock_errors = []
+        lags = []
+        stop = asyncio.Event()
+        heartbeat = asyncio.create_task(loop_lag(stop, lags))
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                client(i, operations, tracker, analysis, latencies, lock_errors)
+                for i in range(clients)
+            )
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await heartbeat
+        executor.close()
+        db.close_all_pools()
+
+    print(
+        f"{workers:>2} workers  {len(latencies) / elapsed:8.1f} ops/s  "
+        f"{summarize(latencies)}  {len(lock_errors)} lock errors  "
+        f"max loop lag {max(lags, default=0):.1f} ms"
+    )
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"{clients} clients x {operations} operations")
+    for workers in WORKERS:
+        asyncio.run(run(workers, clients, operations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compares building a year-long heatmap of completions (habits x days) on a synthetic database from benchmarks.datagen:
+one query per day (habit_data_in_selected_period, counted in Python), one query per habit
+(Habit_Tracker.completion_count) and Analysis.calendar, without and with a QueryCache.
+
+Run from the repository root:
+    python -m benchmarks.bench_calendar [habits]
+"""
+
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+import db
+from analysis import Analysis
+from benchmarks.common import summarize, temp_workdir, timed
+from benchmarks.datagen import generate
+from habit_tracker import Habit_Tracker
+from query_cache import QueryCache
+
+TODAY = date(2025, 6, 30)
+START = TODAY - timedelta(days=364)
+REPEAT = 5
+
+
+def per_day(analysis, habit_names):
+    rows = {habit_name: row for row, habit_name in enumerate(habit_names)}
+    matrix = np.zeros((len(habit_names), 365), dtype=np.int32)
+    for column in range(365):
+        records, _ = analysis.habit_data_in_selected_period(
+            (START + timedelta(column)).isoformat()
+        )
+        for _, habit_name, status in records or ():
+            if status != "Missed.":
+                matrix[rows[habit_name], column] += 1
+    return matrix
+
+
+def per_habit(tracker, habit_names):
+    matrix = np.zeros((len(habit_names), 365), dtype=np.int32)
+    for row, habit_name in enumerate(habit_names):
+        for day, count in tracker.completion_count(habit_name, "day"):
+            column = (date.fromisoformat(day) - START).days
+            if 0 <= column < 365:
+                matrix[row, column] = count
+    return matrix
+
+
+def main():
+    habits = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    with temp_workdir():
+        db_file = "habit_tracker.db"
+        db.configure_storage(db_file, "wal")
+        _, records = generate(db_file, habits, years=2, today=TODAY)
+        analysis = Analysis(db_file)
+        tracker = Habit_Tracker(db_file)
+        cached = Analysis(db_file, cache=QueryCache())
+
+        matrix, habit_names, _ = analysis.calendar(START, TODAY)
+        assert (per_day(analysis, habit_names) == matrix).all()
+        assert (per_habit(tracker, habit_names) == matrix).all()
+
+        print(f"Heatmap of {habits} habits x 365 days, {records} records")
+        for name, build in (
+            ("one query per day", lambda i: per_day(analysis, habit_names)),
+            ("one query per habit", lambda i: per_habit(tracker, habit_names)),
+            ("calendar", lambda i: analysis.calendar(START, TODAY)),
+            ("calendar, cached", lambda i: cached.calendar(START, TODAY)),
+        ):
+            print(f"  {name:<20} {summarize(timed(build, REPEAT))}")
+        db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
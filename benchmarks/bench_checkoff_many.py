@@ -0,0 +1,64 @@
+"""
+Measures the throughput of Habit_Tracker.checkoff_many on 100k records,
+compared with calling Habit_Tracker.checkoff once per record.
+
+Run from the repository root:
+    python -m benchmarks.bench_checkoff_many [records]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import db
+from benchmarks.common import temp_workdir
+from habit_tracker import Habit_Tracker
+
+HABITS = 20
+SINGLE_CHECKOFFS = 1000
+
+
+def records(count, seed):
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=3 * 365)
+    for _ in range(count):
+        moment = start + timedelta(minutes=rng.randrange(3 * 365 * 24 * 60))
+        yield (
+            f"Habit {rng.randrange(HABITS)}",
+            moment.strftime("%Y-%m-%d %H:%M"),
+            rng.choice(("Done!", "Skip.", "Missed.")),
+        )
+
+
+def run(label, count, insert):
+    with temp_workdir():
+        db_file = "habit_tracker.db"
+        db.configure_storage(db_file, "wal")
+        db.create_tables(db_file)
+        tracker = Habit_Tracker(db_file)
+        for i in range(HABITS):
+            tracker.add_habit(f"Habit {i}", "", "1 time(s) per day", "2020-01-01 00:00")
+
+        start = time.perf_counter()
+        insert(tracker, records(count, seed=1))
+        elapsed = time.perf_counter() - start
+        db.close_all_pools()
+    print(
+        f"{label:<13} {count:>7} records  {elapsed:7.2f} s  {count / elapsed:9.0f} records/s"
+    )
+
+
+def one_by_one(tracker, records):
+    for habit_name, date, status in records:
+        tracker.checkoff(habit_name, date, status)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    run("checkoff", SINGLE_CHECKOFFS, one_by_one)
+    run("checkoff_many", count, Habit_Tracker.checkoff_many)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compares connects per request and latency of the pooled get_cursor against the previous
+connect-per-call implementation.
+
+Run from the repository root:
+    python -m benchmarks.bench_connection_pool
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import db
+from benchmarks.common import summarize, temp_workdir, timed
+from habit import Habit
+from habit_tracker import Habit_Tracker
+
+REQUESTS = 300
+
+
+@contextmanager
+def unpooled_get_cursor(db="habit_tracker.db"):
+    con = sqlite3.connect(db)
+    cur = con.cursor()
+    try:
+        yield cur
+    except Exception as err:
+        con.rollback()
+        raise err
+    finally:
+        cur.close()
+        con.close()
+
+
+class ConnectCounter:
+    def __init__(self):
+        self.count = 0
+        self._connect = sqlite3.connect
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return self._connect(*args, **kwargs)
+
+
+def run(label, get_cursor):
+    with temp_workdir():
+        db.get_cursor = get_cursor
+        db.create_tables()
+        db_file = "habit_tracker.db"
+        tracker = Habit_Tracker(db_file)
+        tracker.add_habit(
+            "Reading", "Read books", "1 time(s) per day", "2024-01-01 08:00"
+        )
+        start = datetime(2024, 1, 1, 9, 0)
+
+        def request(i):
+            date = (start + timedelta(hours=i)).strftime("%Y-%m-%d %H:%M")
+            tracker.checkoff("Reading", date, "Done!")
+            Habit(db_file, "Reading")
+
+        counter = ConnectCounter()
+        sqlite3.connect = counter
+        try:
+            latencies = timed(request, REQUESTS)
+        finally:
+            sqlite3.connect = counter._connect
+        db.close_all_pools()
+
+    stats = summarize(latencies)
+    stats["connects_per_request"] = round(counter.count / REQUESTS, 2)
+    print(f"{label:<10} {stats}")
+
+
+def main():
+    pooled_get_cursor = db.get_cursor
+    try:
+        run("before", unpooled_get_cursor)
+        run("after", pooled_get_cursor)
+    finally:
+        db.get_cursor = pooled_get_cursor
+
+
+if __name__ == "__main__":
+    main()
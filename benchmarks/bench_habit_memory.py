@@ -0,0 +1,75 @@
+"""
+Compares the memory of a habit log with 100,000 records loaded as a list of (date, status) string tuples
+(Analysis.habit_log_from_tracker, what Habit.log used to be) and as a columnar HabitLog (Analysis.habit_log_records).
+Reports the memory still held by the loaded log and the peak while loading, as traced by tracemalloc.
+
+Run from the repository root:
+    python -m benchmarks.bench_habit_memory
+"""
+
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+from functools import partial
+
+import db
+from analysis import Analysis
+from benchmarks.common import peak_memory, summarize, temp_workdir, timed
+
+RECORDS = 100_000
+REPEAT = 5
+
+
+def retained_memory(func):
+    """
+    Calls func once and returns the memory allocated by it and still held by its result, in KiB.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return round(current / 1024, 1)
+
+
+def main():
+    with temp_workdir():
+        db_file = "habit_tracker.db"
+        db.create_tables(db_file)
+        db.insert_myhabit(
+            db_file, "Reading", "", "1 time(s) per day", "2000-01-01 00:00", 0, 0
+        )
+        habit_id = db.get_habit_id(db_file, "Reading")
+        rng = random.Random(5)
+        start = datetime(2000, 1, 1)
+        db.insert_tracker_many(
+            db_file,
+            (
+                (
+                    habit_id,
+                    (start + timedelta(minutes=rng.randrange(13_000_000))).strftime(
+                        "%Y-%m-%d %H:%M"
+                    ),
+                    rng.choice(("Done!", "Skip.", "Missed.")),
+                )
+                for _ in range(RECORDS)
+            ),
+        )
+
+        analysis = Analysis(db_file)
+        print(f"One habit with {RECORDS} records")
+        for name in ("habit_log_from_tracker", "habit_log_records"):
+            load = partial(getattr(analysis, name), "Reading")
+            held = retained_memory(load)
+            peak = peak_memory(load)
+            latency = summarize(timed(lambda i, load=load: load(), REPEAT))
+            print(f"  {name:<24} held {held:>8} KiB  peak {peak:>8} KiB  {latency}")
+        db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
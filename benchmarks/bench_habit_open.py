@@ -0,0 +1,72 @@
+"""
+Compares opening a brand-new habit with opening a habit with 100,000 records:
+building the Habit, reading its latest page of records, and reading its whole log.
+
+Run from the repository root:
+    python -m benchmarks.bench_habit_open
+"""
+
+import random
+from datetime import datetime, timedelta
+from functools import partial
+
+import db
+from benchmarks.common import summarize, temp_workdir, timed
+from habit import Habit
+from habit_tracker import Habit_Tracker
+
+RECORDS = 100_000
+PAGE = 100
+REPEAT = 20
+
+
+def main():
+    with temp_workdir():
+        db_file = "habit_tracker.db"
+        db.create_tables(db_file)
+        for habit_name in ("New", "Old"):
+            db.insert_myhabit(
+                db_file, habit_name, "", "1 time(s) per day", "2000-01-01 00:00", 0, 0
+            )
+        habit_id = db.get_habit_id(db_file, "Old")
+        rng = random.Random(9)
+        start = datetime(2000, 1, 1)
+        db.insert_tracker_many(
+            db_file,
+            (
+                (
+                    habit_id,
+                    (start + timedelta(minutes=rng.randrange(13_000_000))).strftime(
+                        "%Y-%m-%d %H:%M"
+                    ),
+                    "Done!",
+                )
+                for _ in range(RECORDS)
+            ),
+        )
+        # as after a checkoff in the app, so that opening reads the stored streak
+        Habit_Tracker(db_file).update_streak("Old")
+
+        print(f"'New' has no record, 'Old' has {RECORDS}")
+        for habit_name in ("New", "Old"):
+            open_habit = partial(Habit, db_file, habit_name)
+            opened = summarize(
+                timed(lambda i, open_habit=open_habit: open_habit(), REPEAT)
+            )
+            page = summarize(
+                timed(
+                    lambda i, open_habit=open_habit: open_habit().latest_entries(PAGE),
+                    REPEAT,
+                )
+            )
+            whole = summarize(
+                timed(lambda i, open_habit=open_habit: open_habit().log, 3)
+            )
+            print(f"  {habit_name}: Habit()            {opened}")
+            print(f"  {habit_name}: + latest {PAGE} records {page}")
+            print(f"  {habit_name}: + whole log          {whole}")
+        db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Times per-habit and per-period lookups on a tracker table with a million rows,
+first with the original LIKE/STRFTIME queries on a schema without indexes (version 1)
+and then with the db functions after migrating to the latest schema.
+
+Run from the repository root:
+    python -m benchmarks.bench_indexes [rows]
+"""
+
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+import db
+from benchmarks.common import summarize, temp_workdir, timed
+
+HABITS = 50
+REPEAT = 20
+
+
+def fill(db_file, rows):
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    with db.get_cursor(db_file) as cur:
+        cur.executemany(
+            """INSERT INTO myhabit (habit_name, description, frequency,
+                                    start_date, current_streak, max_streak)
+                VALUES (?, '', '1 time(s) per day', '2020-01-01 00:00', 0, 0)""",
+            ((f"Habit {i}",) for i in range(HABITS)),
+        )
+        cur.executemany(
+            "INSERT INTO tracker (habit_id, date, status) VALUES (?, ?, ?)",
+            (
+                (
+                    rng.randint(1, HABITS),
+                    (
+                        start + timedelta(minutes=rng.randrange(5 * 365 * 24 * 60))
+                    ).strftime("%Y-%m-%d %H:%M"),
+                    rng.choice(("Done!", "Skip.", "Missed.")),
+                )
+                for _ in range(rows)
+            ),
+        )
+        cur.connection.commit()
+
+
+LEGACY_DAY_OR_MONTH_QUERY = """
+    SELECT t.date, m.habit_name, t.status FROM myhabit m
+    JOIN tracker t ON m.habit_id = t.habit_id
+    WHERE t.date LIKE ? ORDER BY t.date DESC
+    """
+
+LEGACY_WEEK_QUERY = """
+    SELECT t.date, STRFTIME('%Y-W%W', t.date) AS year_week, m.habit_name, t.status
+    FROM myhabit m JOIN tracker t ON m.habit_id = t.habit_id
+    WHERE year_week = ? ORDER BY t.date DESC
+    """
+
+
+def legacy_log(db_file, query, param):
+    with db.get_cursor(db_file) as cur:
+        cur.execute(query, (param,))
+        return cur.fetchall()
+
+
+def measure_legacy(db_file):
+    lookups = {
+        "per_habit": lambda i: db.get_data_from_tracker(
+            db_file, "date, status", f"Habit {i % HABITS}"
+        ),
+        "day": lambda i: legacy_log(
+            db_file, LEGACY_DAY_OR_MONTH_QUERY, f"2023-03-{i % 28 + 1:02}%"
+        ),
+        "week": lambda i: legacy_log(
+            db_file,
+            LEGACY_WEEK_QUERY,
+            (date(2023, 3, 1) + timedelta(7 * i)).strftime("%Y-W%W"),
+        ),
+        "month": lambda i: legacy_log(
+            db_file, LEGACY_DAY_OR_MONTH_QUERY, f"2023-{i % 12 + 1:02}%"
+        ),
+    }
+    return {name: summarize(timed(lookup, REPEAT)) for name, lookup in lookups.items()}
+
+
+def measure(db_file):
+    lookups = {
+        "per_habit": lambda i: db.get_data_from_tracker(
+            db_file, "date, status", f"Habit {i % HABITS}"
+        ),
+        "day": lambda i: db.daily_and_monthly_habit_log(
+            db_file, f"2023-03-{i % 28 + 1:02}"
+        ),
+        "week": lambda i: db.weekly_habit_log(
+            db_file, date(2023, 3, 1) + timedelta(7 * i)
+        ),
+        "month": lambda i: db.daily_and_monthly_habit_log(
+            db_file, f"2023-{i % 12 + 1:02}"
+        ),
+    }
+    return {name: summarize(timed(lookup, REPEAT)) for name, lookup in lookups.items()}
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with temp_workdir():
+        db_file = "habit_tracker.db"
+        db.migrate(db_file, target=1)
+        fill(db_file, rows)
+        print(f"{rows} tracker rows, {HABITS} habits")
+        for name, stats in measure_legacy(db_file).items():
+            print(f"before {name:<10} {stats}")
+
+        db.migrate(db_file)
+        for name, stats in measure(db_file).items():
+            print(f"after  {name:<10} {stats}")
+        db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares building the DataFrame of a month view with a million records from rows
+(habit_data_in_selected_period, then pd.DataFrame) with the columnar Analysis.habit_data_frame.
+Reports time, tracemalloc peak while building and the memory of the resulting DataFrame.
+
+Run from the repository root:
+    python -m benchmarks.bench_month_view [records]
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import db
+from analysis import Analysis
+from benchmarks.common import peak_memory, summarize, temp_workdir, timed
+
+HABITS = 50
+MONTH = "2025-01"
+REPEAT = 3
+
+
+def fill(db_file, records):
+    rng = random.Random(7)
+    db.insert_myhabit_many(
+        db_file,
+        (
+            (f"Habit {i}", "", "1 time(s) per day", "2024-12-01 00:00")
+            for i in range(HABITS)
+        ),
+    )
+    start = datetime(2025, 1, 1)
+    db.insert_tracker_many(
+        db_file,
+        (
+            (
+                rng.randint(1, HABITS),
+                (start + timedelta(minutes=rng.randrange(31 * 1440))).strftime(
+                    "%Y-%m-%d %H:%M"
+                ),
+                rng.choice(("Done!", "Skip.", "Missed.")),
+            )
+            for _ in range(records)
+        ),
+    )
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with temp_workdir():
+        db_file = "habit_tracker.db"
+        db.configure_storage(db_file, "wal")
+        db.create_tables(db_file)
+        fill(db_file, records)
+        analysis = Analysis(db_file)
+
+        def from_rows():
+            rows, columns = analysis.habit_data_in_selected_period(MONTH)
+            return pd.DataFrame(rows, columns=columns)
+
+        def columnar():
+            return analysis.habit_data_frame(MONTH)
+
+        print(f"Month view of {records} records, {HABITS} habits")
+        for name, build in (("rows", from_rows), ("columnar", columnar)):
+            frame_kib = round(build().memory_usage(deep=True).sum() / 1024)
+            peak = peak_memory(build)
+            latency = summarize(timed(lambda i, build=build: build(), REPEAT))
+            print(
+                f"  {name:<9} peak {peak:>10} KiB  DataFrame {frame_kib:>8} KiB  {latency}"
+            )
+        db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
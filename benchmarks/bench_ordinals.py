@@ -0,0 +1,94 @@
+"""
+Compares bucketing a habit log by parsing tracker.date strings in Python
+with Habit_Tracker.completion_count, which reads the per-period counts from tracker_rollup.
+Also times the migrations that backfill the ordinal columns and the rollup table.
+
+Run from the repository root:
+    python -m benchmarks.bench_ordinals [rows]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import db
+from benchmarks.common import summarize, temp_workdir, timed
+from habit_tracker import Habit_Tracker
+
+REPEAT = 10
+
+
+def fill(db_file, rows):
+    rng = random.Random(5)
+    start = datetime(2020, 1, 1)
+    with db.get_cursor(db_file) as cur:
+        cur.execute(
+            """INSERT INTO myhabit (habit_name, description, frequency,
+                                    start_date, current_streak, max_streak)
+                VALUES ('Reading', '', '1 time(s) per day', '2020-01-01 00:00', 0, 0)"""
+        )
+        cur.executemany(
+            "INSERT INTO tracker (habit_id, date, status) VALUES (1, ?, ?)",
+            (
+                (
+                    (
+                        start + timedelta(minutes=rng.randrange(5 * 365 * 24 * 60))
+                    ).strftime("%Y-%m-%d %H:%M"),
+                    rng.choice(("Done!", "Skip.", "Missed.")),
+                )
+                for _ in range(rows)
+            ),
+        )
+        cur.connection.commit()
+
+
+def parse_strings(db_file, period):
+    """
+    The previous Habit_Tracker.completion_count: parses every date string and counts in a dict.
+    """
+    formats = {"day": "%Y-%m-%d", "week": "%G-W%V", "month": "%Y-%m"}
+    success_counts = {}
+    for date_str, status in db.get_data_from_tracker(
+        db_file, "date, status", "Reading"
+    ):
+        if status in ("Done!", "Skip."):
+            event_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M").date()
+            key = event_date.strftime(formats[period])
+            success_counts[key] = success_counts.get(key, 0) + 1
+    return sorted(success_counts.items())
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with temp_workdir():
+        db_file = "habit_tracker.db"
+        db.migrate(db_file, target=4)
+        fill(db_file, rows)
+        start = time.perf_counter()
+        db.migrate(db_file)
+        print(f"{rows} tracker rows, backfill {time.perf_counter() - start:.2f} s")
+
+        tracker = Habit_Tracker(db_file)
+        for period in ("day", "week", "month"):
+            assert parse_strings(db_file, period) == tracker.completion_count(
+                "Reading", period
+            )
+            strings = summarize(
+                timed(lambda i, period=period: parse_strings(db_file, period), REPEAT)
+            )
+            ordinals = summarize(
+                timed(
+                    lambda i, period=period: tracker.completion_count(
+                        "Reading", period
+                    ),
+                    REPEAT,
+                )
+            )
+            print(f"{period:<6} strings   {strings}")
+            print(f"{period:<6} ordinals  {ordinals}")
+        db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares the Overview ranking built habit by habit (calculate_successrate and a Habit per habit),
+with the habits read by Habit.load_many, and with Analysis.rank_all on 500 habits.
+
+Run from the repository root:
+    python -m benchmarks.bench_rank_all
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import db
+from analysis import Analysis
+from benchmarks.common import summarize, temp_workdir, timed
+from habit import Habit
+from maintenance import recompute_all_streaks
+
+HABITS = 500
+CHECKINS_PER_HABIT = 100
+REPEAT = 3
+
+
+def fill(db_file):
+    rng = random.Random(11)
+    now = datetime.now()
+    frequencies = ("1 time(s) per day", "2 time(s) per week", "4 time(s) per month")
+    with db.get_cursor(db_file) as cur:
+        for habit_id in range(1, HABITS + 1):
+            start = now - timedelta(days=365)
+            cur.execute(
+                """INSERT INTO myhabit (habit_name, description, frequency,
+                                        start_date, current_streak, max_streak)
+                    VALUES (?, '', ?, ?, 0, 0)""",
+                (
+                    f"Habit {habit_id}",
+                    frequencies[habit_id % 3],
+                    start.strftime("%Y-%m-%d %H:%M"),
+                ),
+            )
+            cur.executemany(
+                "INSERT INTO tracker (habit_id, date, status) VALUES (?, ?, ?)",
+                (
+                    (
+                        habit_id,
+                        (start + (now - start) * rng.random()).strftime(
+                            "%Y-%m-%d %H:%M"
+                        ),
+                        rng.choice(("Done!", "Skip.", "Missed.")),
+                    )
+                    for _ in range(CHECKINS_PER_HABIT)
+                ),
+            )
+        cur.connection.commit()
+
+
+def main():
+    with temp_workdir():
+        db_file = "habit_tracker.db"
+        db.create_tables(db_file)
+        fill(db_file)
+        analysis = Analysis(db_file)
+
+        def per_habit(i):
+            ranking = []
+            for habit_name in analysis.habit_list():
+                habit = Habit(db_file, habit_name)
+                success_rate = analysis.calculate_successrate(habit_name)
+                ranking.append((habit_name, success_rate, habit.longest_streak))
+            return ranking
+
+        def batch_loaded(i):
+            return [
+                (
+                    habit.habit_name,
+                    analysis.calculate_successrate(habit.habit_name),
+                    habit.longest_streak,
+                )
+                for habit in Habit.load_many(db_file)
+            ]
+
+        def bulk(i):
+            return analysis.rank_all()
+
+        print(f"{HABITS} habits, {HABITS * CHECKINS_PER_HABIT} tracker rows")
+        print(f"per habit  {summarize(timed(per_habit, REPEAT))}")
+        print(f"load_many  {summarize(timed(batch_loaded, REPEAT))}")
+        print(f"rank_all   {summarize(timed(bulk, REPEAT))}")
+
+        # longest_streak only, with the streaks stored as after checkoffs in the app
+        recompute_all_streaks(db_file, workers=1)
+        names = analysis.habit_list()
+        one_by_one = timed(
+            lambda i: [Habit(db_file, name).longest_streak for name in names], REPEAT
+        )
+        loaded = timed(
+            lambda i: [habit.longest_streak for habit in Habit.load_many(db_file)],
+            REPEAT,
+        )
+        print(f"longest_streak, Habit per habit  {summarize(one_by_one)}")
+        print(f"longest_streak, Habit.load_many  {summarize(loaded)}")
+        db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
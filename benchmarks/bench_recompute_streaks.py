@@ -0,0 +1,90 @@
+"""
+Recomputes the streaks of every habit in a large database, once with one Habit_Tracker.update_streak call
+per habit (measured on a sample and extrapolated), and with maintenance.recompute_all_streaks
+for several numbers of worker processes. Reports habits per second and the speedup over one worker.
+
+Run from the repository root:
+    python -m benchmarks.bench_recompute_streaks [habits] [records_per_habit]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import db
+from benchmarks.common import temp_workdir
+from habit_tracker import Habit_Tracker
+from maintenance import recompute_all_streaks
+
+SAMPLE = 2000
+FREQUENCIES = ("1 time(s) per day", "3 time(s) per week", "2 time(s) per month")
+
+
+def fill(db_file, habits, records):
+    rng = random.Random(habits)
+    today = date.today()
+    db.insert_myhabit_many(
+        db_file,
+        (
+            (f"Habit {i}", "", FREQUENCIES[i % 3], "2024-01-01 00:00")
+            for i in range(habits)
+        ),
+    )
+    db.insert_tracker_many(
+        db_file,
+        (
+            (
+                habit_id,
+                (today - timedelta(rng.randrange(365))).strftime("%Y-%m-%d 08:00"),
+                "Done!",
+            )
+            for habit_id in range(1, habits + 1)
+            for _ in range(records)
+        ),
+    )
+
+
+def main():
+    habits = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    records = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    cpus = os.cpu_count() or 1
+    workers = sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+
+    with temp_workdir():
+        db_file = "bench.db"
+        db.configure_storage(db_file, "wal")
+        db.create_tables(db_file)
+        start = time.perf_counter()
+        fill(db_file, habits, records)
+        print(
+            f"{habits} habits, {habits * records} records "
+            f"(filled in {time.perf_counter() - start:.1f} s), {cpus} CPUs"
+        )
+
+        tracker = Habit_Tracker(db_file)
+        start = time.perf_counter()
+        for i in range(min(SAMPLE, habits)):
+            tracker.update_streak(f"Habit {i}")
+        per_habit = (time.perf_counter() - start) / min(SAMPLE, habits)
+        print(
+            f"  update_streak per habit   {per_habit * habits:>7.2f} s (extrapolated)  "
+            f"{1 / per_habit:>9,.0f} habits/s"
+        )
+
+        baseline = None
+        for count in workers:
+            start = time.perf_counter()
+            recompute_all_streaks(db_file, workers=count)
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            print(
+                f"  recompute_all_streaks, {count:>2} worker(s) {seconds:>7.2f} s  "
+                f"{habits / seconds:>9,.0f} habits/s  speedup {baseline / seconds:.2f}x"
+            )
+        db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Compares the peak memory and time of Habit_Tracker.streak_count, which fills every blank period
+from the first activity to today, with sparse_streak_count, which only visits periods with activities.
+
+Run from the repository root:
+    python -m benchmarks.bench_sparse_streak
+"""
+
+import random
+from datetime import date
+from functools import partial
+
+from benchmarks.common import peak_memory, summarize, timed
+from db import period_label
+from habit_tracker import Habit_Tracker, period_key, period_ordinal
+
+REPEAT = 20
+
+# (period, periods since the habit started, periods with activities)
+CASES = [
+    ("day", 10 * 365, 50),
+    ("day", 10 * 365, 10 * 365),
+    ("week", 10 * 52, 50),
+    ("month", 10 * 12, 50),
+]
+
+
+def habit_log(period, span, active):
+    rng = random.Random(span + active)
+    today = period_ordinal(period_key(date.today(), period), period)
+    ordinals = sorted(rng.sample(range(today - span + 1, today + 1), active))
+    return [(period_label(ordinal, period), rng.randint(1, 2)) for ordinal in ordinals]
+
+
+def main():
+    tracker = Habit_Tracker("unused.db")
+    for period, span, active in CASES:
+        log = habit_log(period, span, active)
+        print(f"{period}: {span} periods since start, {active} with activities")
+        for name in ("streak_count", "sparse_streak_count"):
+            run = partial(getattr(tracker, name), log, period, 1)
+            memory = peak_memory(run)
+            latency = summarize(timed(lambda i, run=run: run(), REPEAT))
+            print(f"  {name:<20} peak {memory:>8} KiB  {latency}")
+
+
+if __name__ == "__main__":
+    main()
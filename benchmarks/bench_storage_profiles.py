@@ -0,0 +1,69 @@
+"""
+Runs several threads doing checkoffs and habit loads against one database file
+and reports throughput and "database is locked" errors for each storage profile.
+
+Run from the repository root:
+    python -m benchmarks.bench_storage_profiles [threads] [checkoffs_per_thread]
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import db
+from benchmarks.common import temp_workdir
+from habit import Habit
+from habit_tracker import Habit_Tracker
+
+
+def run(profile, threads, checkoffs):
+    with temp_workdir():
+        db_file = "habit_tracker.db"
+        db.configure_storage(db_file, profile)
+        db.create_tables(db_file)
+        tracker = Habit_Tracker(db_file)
+        for i in range(threads):
+            tracker.add_habit(f"Habit {i}", "", "1 time(s) per day", "2024-01-01 00:00")
+
+        lock_errors = []
+        start_date = datetime(2024, 1, 1, 8, 0)
+        barrier = threading.Barrier(threads)
+
+        def worker(i):
+            barrier.wait()
+            for n in range(checkoffs):
+                date = (start_date + timedelta(hours=n)).strftime("%Y-%m-%d %H:%M")
+                try:
+                    tracker.checkoff(f"Habit {i}", date, "Done!")
+                    Habit(db_file, f"Habit {(i + n) % threads}")
+                except sqlite3.OperationalError as err:
+                    lock_errors.append(err)
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        db.close_all_pools()
+
+    done = threads * checkoffs - len(lock_errors)
+    print(
+        f"{profile:<8} {done / elapsed:8.1f} checkoffs/s  "
+        f"{len(lock_errors)} lock errors  ({elapsed:.2f} s)"
+    )
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    checkoffs = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    print(f"{threads} threads x {checkoffs} checkoffs")
+    for profile in db.STORAGE_PROFILES:
+        run(profile, threads, checkoffs)
+
+
+if __name__ == "__main__":
+    main()
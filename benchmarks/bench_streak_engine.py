@@ -0,0 +1,83 @@
+"""
+Compares the streak computation of Habit_Tracker with the NumPy engine in streak_engine
+on 10 years of data with several checkins per day.
+
+Run from the repository root:
+    python -m benchmarks.bench_streak_engine
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+import db
+import streak_engine
+from benchmarks.common import summarize, temp_workdir, timed
+from habit_tracker import Habit_Tracker
+
+YEARS = 10
+CHECKINS_PER_DAY = 3
+REPEAT = 5
+
+
+def fill(db_file, period):
+    rng = random.Random(7)
+    start = date.today() - timedelta(days=365 * YEARS)
+    rows = []
+    for day in range(365 * YEARS + 1):
+        for _ in range(rng.randint(0, CHECKINS_PER_DAY * 2)):
+            moment = datetime.combine(start + timedelta(day), datetime.min.time())
+            moment += timedelta(minutes=rng.randrange(24 * 60))
+            rows.append(
+                (
+                    moment.strftime("%Y-%m-%d %H:%M"),
+                    rng.choice(("Done!", "Skip.", "Missed.")),
+                )
+            )
+
+    db.insert_myhabit(
+        db_file,
+        "Reading",
+        "",
+        f"{CHECKINS_PER_DAY} time(s) per {period}",
+        "2000-01-01 00:00",
+        0,
+        0,
+    )
+    with db.get_cursor(db_file) as cur:
+        cur.executemany(
+            "INSERT INTO tracker (habit_id, date, status) VALUES (1, ?, ?)", rows
+        )
+        cur.connection.commit()
+    return len(rows)
+
+
+def main():
+    for period in ("day", "week", "month"):
+        with temp_workdir():
+            db_file = "habit_tracker.db"
+            db.create_tables(db_file)
+            rows = fill(db_file, period)
+            tracker = Habit_Tracker(db_file)
+
+            def python_engine(i, tracker=tracker, period=period):
+                habit_log = tracker.completion_count("Reading", period)
+                return tracker.streak_count(habit_log, period, CHECKINS_PER_DAY)
+
+            def numpy_engine(i, db_file=db_file, period=period):
+                date_status = db.get_data_from_tracker(
+                    db_file, "date, status", "Reading"
+                )
+                dates, completed = streak_engine.log_arrays(date_status)
+                return streak_engine.streak_count(
+                    dates, completed, period, CHECKINS_PER_DAY
+                )
+
+            assert python_engine(0) == numpy_engine(0)
+            print(f"{period}: {rows} rows")
+            print(f"  habit_tracker  {summarize(timed(python_engine, REPEAT))}")
+            print(f"  streak_engine  {summarize(timed(numpy_engine, REPEAT))}")
+            db.close_all_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+@contextmanager
+def temp_workdir():
+    """
+    Runs the benchmark inside a throwaway directory, so the default database file is created there.
+    """
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            yield workdir
+        finally:
+            os.chdir(previous)
+
+
+def timed(func, repeat):
+    """
+    Calls func repeat times and returns the latencies in milliseconds.
+    """
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def peak_memory(func):
+    """
+    Calls func once and returns the peak of memory allocated meanwhile, in KiB, as traced by tracemalloc.
+    """
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+    }
@@ -0,0 +1,137 @@
+"""
+Seeded synthetic data for benchmarks: habits with daily, weekly and monthly frequencies
+and a configurable number of years of check-ins. The same arguments always give the same database.
+
+Run from the repository root to write a database file:
+    python -m benchmarks.datagen synthetic.db --habits 100 --years 3 --density 0.7 --seed 1
+"""
+
+import argparse
+import random
+import sys
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+import db
+from maintenance import recompute_all_streaks
+
+# frequency period and the range of target times for it
+PERIODS = (("day", 1, 1), ("week", 1, 5), ("month", 1, 10))
+SKIP_SHARE = 0.1
+MISSED_SHARE = 0.5
+
+
+def period_starts(first_day, today, period):
+    """
+    Yields (first day, number of days) of every day, week or month from the one containing first_day to today.
+    """
+    if period == "day":
+        start, step = first_day, relativedelta(days=1)
+    elif period == "week":
+        start, step = first_day - timedelta(first_day.weekday()), relativedelta(weeks=1)
+    else:
+        start, step = first_day.replace(day=1), relativedelta(months=1)
+    while start <= today:
+        following = start + step
+        yield start, (following - start).days
+        start = following
+
+
+def habit_records(rng, habit_id, period, times, first_day, today, density):
+    """
+    Yields tuple(habit_id, date, status) for one habit. In every period, each of the times target
+    check-ins happens with probability density, as "Done!" or sometimes "Skip.".
+    A period without any check-in gets a "Missed." record half of the time.
+    """
+    for start, days in period_starts(first_day, today, period):
+        # the first and the current period are cut at the start of the habit and today
+        last = min(start + timedelta(days - 1), today)
+        start = max(start, first_day)
+        days = (last - start).days + 1
+        logged = False
+        for _ in range(times):
+            if rng.random() < density:
+                moment = start + timedelta(rng.randrange(days))
+                status = "Skip." if rng.random() < SKIP_SHARE else "Done!"
+                yield (
+                    habit_id,
+                    moment.strftime(
+                        f"%Y-%m-%d {rng.randrange(6, 23):02}:{rng.randrange(60):02}"
+                    ),
+                    status,
+                )
+                logged = True
+        if not logged and rng.random() < MISSED_SHARE:
+            yield habit_id, start.strftime("%Y-%m-%d 23:59"), "Missed."
+
+
+def generate(db_file, habits=100, years=1, density=0.7, seed=0, today=None):
+    """
+    Fills an empty habit tracker database with synthetic habits and check-ins, and stores their streaks.
+    Habits are named "Habit 0", "Habit 1", ... and cycle through daily, weekly and monthly frequencies.
+
+    Args:
+        years: history before today. Every habit starts at a random day in its first month.
+        density: probability (0.0-1.0) of each target check-in.
+        today: the last day with check-ins, date.today() by default.
+    Returns:
+        tuple: (number of habits, number of tracker records).
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    db.create_tables(db_file)
+
+    habit_rows = []
+    for i in range(habits):
+        period, low, high = PERIODS[i % len(PERIODS)]
+        times = rng.randint(low, high)
+        first_day = today - relativedelta(years=years) + timedelta(rng.randrange(28))
+        habit_rows.append(
+            (
+                f"Habit {i}",
+                f"Synthetic {period} habit",
+                f"{times} time(s) per {period}",
+                first_day.strftime("%Y-%m-%d 00:00"),
+                period,
+                times,
+                first_day,
+            )
+        )
+    db.insert_myhabit_many(db_file, (row[:4] for row in habit_rows))
+
+    habit_ids = db.get_habit_ids(db_file)
+    records = db.insert_tracker_many(
+        db_file,
+        (
+            record
+            for name, _, _, _, period, times, first_day in habit_rows
+            for record in habit_records(
+                rng, habit_ids[name], period, times, first_day, today, density
+            )
+        ),
+    )
+    recompute_all_streaks(db_file, workers=1, today=today)
+    return habits, records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Write a habit tracker database with seeded synthetic data."
+    )
+    parser.add_argument("db")
+    parser.add_argument("--habits", type=int, default=100)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--density", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    habits, records = generate(
+        args.db, args.habits, args.years, args.density, args.seed
+    )
+    print(f"Wrote {habits} habits and {records} records to {args.db}.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
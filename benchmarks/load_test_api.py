@@ -0,0 +1,173 @@
+"""
+Load-tests the JSON API of api_server with keep-alive connections and reports p50/p99 latency and requests per second.
+Without --url, a server on a throwaway database is started in this process.
+With --batch N, every HTTP request carries N API requests through POST /batch.
+
+Run from the repository root:
+    python -m benchmarks.load_test_api [--clients 16] [--requests 200] [--batch 1] [--url http://host:port]
+"""
+
+import argparse
+import http.client
+import json
+import random
+import socket
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+from api_server import make_server
+from benchmarks.common import summarize, temp_workdir
+
+HABITS = 20
+
+
+def api_request(rng):
+    habit_name = f"Habit {rng.randrange(HABITS)}"
+    day = date.today() - timedelta(days=rng.randrange(60))
+    kind = rng.random()
+    if kind < 0.5:
+        return {
+            "method": "POST",
+            "path": "/checkoff",
+            "body": {
+                "habit_name": habit_name,
+                "date": f"{day} {rng.randrange(24):02}:{rng.randrange(60):02}",
+                "status": rng.choice(("Done!", "Skip.", "Missed.")),
+            },
+        }
+    if kind < 0.7:
+        return {
+            "method": "GET",
+            "path": f"/streaks?habit={habit_name.replace(' ', '%20')}",
+        }
+    if kind < 0.9:
+        return {"method": "GET", "path": f"/log?day={day}"}
+    return {"method": "GET", "path": "/ranking"}
+
+
+def connect(host, port):
+    """
+    Opens a keep-alive connection. http.client sends headers and body in separate writes,
+    so Nagle's algorithm is turned off like on the server.
+    """
+    connection = http.client.HTTPConnection(host, port)
+    connection.connect()
+    connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return connection
+
+
+def send(connection, request):
+    body = request.get("body")
+    connection.request(
+        request["method"],
+        request["path"],
+        body=json.dumps(body).encode("utf-8") if body is not None else None,
+        headers={"Content-Type": "application/json"},
+    )
+    response = connection.getresponse()
+    payload = response.read()
+    if response.status >= 400:
+        raise RuntimeError(f"{response.status} {payload[:200]!r}")
+    return payload
+
+
+def client(i, host, port, requests, batch, latencies, errors):
+    rng = random.Random(i)
+    connection = connect(host, port)
+    for _ in range(requests):
+        if batch > 1:
+            request = {
+                "method": "POST",
+                "path": "/batch",
+                "body": {"requests": [api_request(rng) for _ in range(batch)]},
+            }
+        else:
+            request = api_request(rng)
+        start = time.perf_counter()
+        try:
+            send(connection, request)
+        except (OSError, RuntimeError, http.client.HTTPException) as err:
+            errors.append(err)
+            connection.close()
+            connection = connect(host, port)
+        latencies.append((time.perf_counter() - start) * 1000)
+    connection.close()
+
+
+def seed_habits(host, port):
+    connection = connect(host, port)
+    for i in range(HABITS):
+        request = {
+            "method": "POST",
+            "path": "/habits",
+            "body": {
+                "habit_name": f"Habit {i}",
+                "description": "",
+                "frequency": "1 time(s) per day",
+                "start_date": f"{date.today() - timedelta(90)} 00:00",
+            },
+        }
+        try:
+            send(connection, request)
+        except RuntimeError:
+            pass
+    connection.close()
+
+
+def run(host, port, clients, requests, batch):
+    seed_habits(host, port)
+    latencies = []
+    errors = []
+    threads = [
+        threading.Thread(
+            target=client, args=(i, host, port, requests, batch, latencies, errors)
+        )
+        for i in range(clients)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{clients} clients x {requests} HTTP requests x {batch} API requests: "
+        f"{len(latencies) / elapsed:.1f} HTTP requests/s, "
+        f"{len(latencies) * batch / elapsed:.1f} API requests/s, "
+        f"{summarize(latencies)}, {len(errors)} errors"
+    )
+    if errors:
+        print(f"first error: {errors[0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--url", help="an API server that is already running")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        run(url.hostname, url.port, args.clients, args.requests, args.batch)
+        return
+
+    with temp_workdir():
+        server = make_server("habit_tracker.db", port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            run(
+                "127.0.0.1", server.server_port, args.clients, args.requests, args.batch
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Times the key operations of the app on a synthetic database from benchmarks.datagen
+and writes the results as JSON, so that runs of different versions can be compared.
+
+Run from the repository root:
+    python -m benchmarks.suite --habits 100 --years 3 --out results.json
+    python -m benchmarks.suite --baseline results.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import db
+from analysis import Analysis
+from benchmarks.common import summarize, temp_workdir, timed
+from benchmarks.datagen import generate
+from habit_tracker import Habit_Tracker
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def operations(db_file, habits, rng):
+    """
+    Returns a dict of operation name to a function taking the repetition index, in the order they are run.
+    Every function picks its habit or date from rng, so runs with the same seed do the same work.
+    delete_habit comes last as it removes habits.
+    """
+    tracker = Habit_Tracker(db_file)
+    analysis = Analysis(db_file)
+    today = date.today()
+
+    def habit_name():
+        return f"Habit {rng.randrange(habits)}"
+
+    def some_day():
+        return today - timedelta(rng.randrange(365))
+
+    return {
+        "checkoff": lambda i: tracker.checkoff(
+            habit_name(), datetime.now().strftime("%Y-%m-%d %H:%M"), "Done!"
+        ),
+        "update_streak": lambda i: tracker.update_streak(habit_name()),
+        "calculate_successrate": lambda i: analysis.calculate_successrate(habit_name()),
+        "habit_data_in_selected_period.day": lambda i: (
+            analysis.habit_data_in_selected_period(some_day().isoformat())
+        ),
+        "habit_data_in_selected_period.week": lambda i: (
+            analysis.habit_data_in_selected_period(some_day(), True)
+        ),
+        "habit_data_in_selected_period.month": lambda i: (
+            analysis.habit_data_in_selected_period(some_day().strftime("%Y-%m"))
+        ),
+        "rank_all": lambda i: analysis.rank_all(),
+        "calendar.year": lambda i: analysis.calendar(today - timedelta(364), today),
+        "delete_habit": lambda i: tracker.delete_habit(f"Habit {habits - 1 - i}"),
+    }
+
+
+def run(habits=100, years=1, density=0.7, seed=0, repeat=20):
+    """
+    Generates the database in a temporary directory and times every operation repeat times.
+
+    Returns:
+        dict: JSON-serializable results with the environment, the parameters and the latencies per operation.
+    """
+    with temp_workdir():
+        db_file = "suite.db"
+        db.configure_storage(db_file, "wal")
+        start = time.perf_counter()
+        _, records = generate(db_file, habits, years, density, seed)
+        generate_seconds = time.perf_counter() - start
+
+        rng = random.Random(seed)
+        results = {}
+        for name, func in operations(db_file, habits, rng).items():
+            count = min(repeat, habits) if name == "delete_habit" else repeat
+            results[name] = dict(summarize(timed(func, count)), repeat=count)
+        db.close_all_pools()
+
+    return {
+        "environment": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+        },
+        "parameters": {
+            "habits": habits,
+            "years": years,
+            "density": density,
+            "seed": seed,
+            "repeat": repeat,
+            "records": records,
+            "generate_seconds": round(generate_seconds, 3),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """
+    Returns text lines with the mean latency of every operation against a baseline report.
+    """
+    lines = []
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            lines.append(f"{name:<38} {result['mean_ms']:>10} ms  (new)")
+            continue
+        ratio = result["mean_ms"] / before["mean_ms"] if before["mean_ms"] else 0
+        lines.append(
+            f"{name:<38} {before['mean_ms']:>10} -> {result['mean_ms']:>10} ms  x{ratio:.2f}"
+        )
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time the key operations on a synthetic database and write JSON."
+    )
+    parser.add_argument("--habits", type=int, default=100)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--density", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", help="JSON file for the results, stdout by default")
+    parser.add_argument(
+        "--baseline", help="JSON file of an earlier run to compare with"
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args.habits, args.years, args.density, args.seed, args.repeat)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            print("\n".join(compare(report, json.load(file))), file=sys.stderr)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
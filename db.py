@@ -1,45 +1,617 @@
+import multiprocessing
+import os
 import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from profiling import ProfiledCursor, active_profile, profile_functions
+
+DEFAULT_DB = "habit_tracker.db"
+# tracker.status values in the order of their integer codes, see records.Status
+STATUS_LABELS = ("Done!", "Skip.", "Missed.")
+
+
+# PRAGMAs applied to every connection of a database, see configure_storage.
+# "default" keeps SQLite's own settings: rollback journal and synchronous=FULL.
+# "wal" lets readers run next to one writer and waits on locks instead of failing with "database is locked".
+# "durable" is "wal" with synchronous=FULL, so that a commit also survives a power loss.
+STORAGE_PROFILES = {
+    "default": {},
+    "wal": {
+        "journal_mode": "WAL",
+        "busy_timeout": 5000,
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,
+    },
+    "durable": {
+        "journal_mode": "WAL",
+        "busy_timeout": 5000,
+        "synchronous": "FULL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000,
+    },
+}
+
+
+class ConnectionPool:
+    """
+    Keeps idle connections to one database file so that they can be reused by later calls.
+    Connections may move between threads, but a borrowed connection is only used by one thread at a time.
+    """
+
+    def __init__(self, db, max_idle=5):
+        self.db = db
+        self.max_idle = max_idle
+        self.connects = 0
+        self.closed = False
+        self.pragmas = {}
+        self._idle = []
+        self._outdated = set()
+        self._borrowed = set()
+        self._lock = threading.Lock()
+
+    def configure(self, pragmas):
+        """
+        Sets the PRAGMAs of new connections. Connections with the old settings are closed once they are idle.
+        """
+        with self._lock:
+            if pragmas == self.pragmas:
+                return
+            self.pragmas = dict(pragmas)
+            self._outdated |= self._borrowed
+            idle, self._idle = self._idle, []
+        for con in idle:
+            con.close()
+
+    def acquire(self):
+        """
+        Returns an idle connection, or opens a new one if none is available.
+        """
+        with self._lock:
+            if self._idle:
+                con = self._idle.pop()
+                self._borrowed.add(con)
+                return con
+            self.connects += 1
+            pragmas = self.pragmas
+        con = sqlite3.connect(self.db, check_same_thread=False)
+        for name, value in pragmas.items():
+            con.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            if pragmas is not self.pragmas:
+                self._outdated.add(con)
+            self._borrowed.add(con)
+        return con
+
+    def release(self, con):
+        """
+        Rolls back anything left uncommitted and puts the connection back for reuse.
+        """
+        if con.in_transaction:
+            con.rollback()
+        with self._lock:
+            self._borrowed.discard(con)
+            outdated = con in self._outdated
+            self._outdated.discard(con)
+            if not self.closed and not outdated and len(self._idle) < self.max_idle:
+                self._idle.append(con)
+                return
+        con.close()
+
+    def close(self):
+        """
+        Closes the idle connections. Borrowed connections are closed when they are released.
+        """
+        with self._lock:
+            self.closed = True
+            idle, self._idle = self._idle, []
+        for con in idle:
+            con.close()
+
+
+class PoolGroup:
+    """
+    Databases of which at most max_open keep a connection pool, e.g. the shards of a TenantRouter.
+    Every get_pool of a member counts as a use, also through a path held since its pool was closed,
+    and the pool of the least recently used member is closed beyond max_open.
+    """
+
+    def __init__(self, max_open):
+        self.max_open = max_open
+        self._open = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, db):
+        with _pools_lock:
+            _pool_groups[database_key(db)] = self
+
+    def touch(self, key):
+        """
+        Marks the database as used and returns the databases whose pool must be closed.
+        """
+        with self._lock:
+            self._open[key] = None
+            self._open.move_to_end(key)
+            evicted = []
+            while len(self._open) > self.max_open:
+                evicted.append(self._open.popitem(last=False)[0])
+            return evicted
+
+    def discard(self, key):
+        with self._lock:
+            self._open.pop(key, None)
+
+    def open_databases(self):
+        """
+        Returns the members with a pool, least recently used first.
+        """
+        with self._lock:
+            return list(self._open)
+
+    def close(self):
+        """
+        Closes the pools of the members and removes them from the group.
+        """
+        with _pools_lock:
+            keys = [key for key, group in _pool_groups.items() if group is self]
+            for key in keys:
+                del _pool_groups[key]
+        with self._lock:
+            self._open.clear()
+        for key in keys:
+            close_pool(key)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+# PRAGMAs of every database set by configure_storage, applied again when a closed pool is created anew
+_storage = {}
+_pool_groups = {}
+_held = threading.local()
+
+
+def database_key(db):
+    """
+    Returns the absolute path of a database file, used to tell databases apart.
+    """
+    db = os.fspath(db)
+    if db == ":memory:" or db.startswith("file:"):
+        return db
+    return os.path.abspath(db)
+
+
+def get_pool(db=DEFAULT_DB):
+    """
+    Returns the connection pool of the database file, creating it on first use
+    with the settings of the last configure_storage call.
+    """
+    key = database_key(db)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key)
+            pool.configure(_storage.get(key, {}))
+        group = _pool_groups.get(key)
+    if group is not None:
+        for evicted in group.touch(key):
+            close_pool(evicted)
+    return pool
+
+
+def close_pool(db):
+    """
+    Closes the pooled connections of the database file, e.g. before the file is replaced.
+    """
+    key = database_key(db)
+    with _pools_lock:
+        pool = _pools.pop(key, None)
+        group = _pool_groups.get(key)
+    if group is not None:
+        group.discard(key)
+    if pool is not None:
+        pool.close()
+
+
+def close_all_pools():
+    with _pools_lock:
+        keys = list(_pools)
+    for key in keys:
+        close_pool(key)
+
+
+def process_pool(max_workers=None):
+    """
+    Returns a ProcessPoolExecutor for working on database files in other processes.
+    Workers are spawned, not forked: a forked worker would inherit the pooled SQLite connections of this process.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def configure_storage(db=DEFAULT_DB, profile="wal", **pragmas):
+    """
+    Sets the journal mode, busy timeout, synchronous level, mmap size and cache size used by the database.
+
+    Args:
+        profile: a name from STORAGE_PROFILES.
+        pragmas: PRAGMAs overriding the profile, e.g. synchronous="FULL".
+    """
+    settings = dict(STORAGE_PROFILES[profile])
+    settings.update(pragmas)
+    with _pools_lock:
+        _storage[database_key(db)] = settings
+    get_pool(db).configure(settings)
 
 
 @contextmanager
-def get_cursor(db="habit_tracker.db"):
-    con = sqlite3.connect(db)
+def get_cursor(db=DEFAULT_DB):
+    """
+    Yields a cursor on a pooled connection.
+    A nested call on the same thread and database reuses the connection of the outer call.
+    Every open cursor is tracked, so that cursors may be closed in any order, e.g. by paused generators:
+    the connection is released when the last of them is closed.
+    """
+    key = database_key(db)
+    held = getattr(_held, "connections", None)
+    if held is None:
+        held = _held.connections = {}
+
+    entry = held.get(key)
+    if entry is None:
+        pool = get_pool(key)
+        entry = held[key] = (pool, pool.acquire(), set())
+    pool, con, cursors = entry
+
     cur = con.cursor()
+    cursors.add(cur)
+    profile = active_profile()
     try:
-        yield cur
+        yield cur if profile is None else ProfiledCursor(cur, profile)
     except Exception as err:
         con.rollback()
         raise err
     finally:
         cur.close()
-        con.close()
+        cursors.discard(cur)
+        if not cursors:
+            if held.get(key) is entry:
+                del held[key]
+            pool.release(con)
+
 
+EPOCH = date(1970, 1, 1)
+PERIOD_COLUMNS = {"day": "day_ord", "week": "week_ord", "month": "month_ord"}
 
-def create_tables():
+# SQL version of date_ordinals, used by migration 5 and its triggers to fill the ordinals from tracker.date.
+ORDINALS_FROM_DATE = """
+    minute_epoch = CAST(STRFTIME('%s', date) AS INTEGER) / 60,
+    day_ord = CAST(STRFTIME('%s', date) AS INTEGER) / 86400,
+    week_ord = (CAST(STRFTIME('%s', date) AS INTEGER) / 86400 + 3) / 7,
+    month_ord = CAST(STRFTIME('%Y', date) AS INTEGER) * 12 + CAST(STRFTIME('%m', date) AS INTEGER) - 1
     """
-    Creates a habit(myhabit) table and a tracker table.
+
+
+def date_ordinals(date_text):
     """
-    with get_cursor() as cur:
-        cur.execute("""
-                    CREATE TABLE IF NOT EXISTS myhabit (
-                    habit_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    habit_name TEXT UNIQUE,
-                    description TEXT,
-                    frequency TEXT,
-                    start_date TEXT,
-                    current_streak INTEGER,
-                    max_streak INTEGER)
-                    """)
+    Converts a tracker date ("YYYY-MM-DD HH:MM" or "YYYY-MM-DD") into the integer columns stored next to it.
 
-        cur.execute("""
-                    CREATE TABLE IF NOT EXISTS tracker (
-                    checkin_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    habit_id INTEGER,
-                    date TEXT, 
-                    status TEXT,
-                    FOREIGN KEY(habit_id) REFERENCES myhabit(habit_id) ON DELETE CASCADE)
-                    """)
+    Returns:
+        tuple: (minute_epoch, day_ord, week_ord, month_ord).
+            - minute_epoch: minutes since 1970-01-01 00:00.
+            - day_ord: days since 1970-01-01.
+            - week_ord: Monday-based weeks, (day_ord + 3) // 7, so that ISO weeks map to consecutive integers.
+            - month_ord: year * 12 + month - 1.
+    """
+    moment = datetime.fromisoformat(date_text)
+    day_ord = (moment.date() - EPOCH).days
+    minute_epoch = day_ord * 1440 + moment.hour * 60 + moment.minute
+    return (
+        minute_epoch,
+        day_ord,
+        (day_ord + 3) // 7,
+        moment.year * 12 + moment.month - 1,
+    )
+
+
+def period_label(ordinal, period):
+    """
+    Formats a day/week/month ordinal as a completion_count key, e.g. "2025-01-07", "2025-W02" or "2025-01".
+    """
+    if period == "month":
+        return f"{ordinal // 12:04}-{ordinal % 12 + 1:02}"
+    if period == "week":
+        return (EPOCH + timedelta(int(ordinal) * 7 - 3)).strftime("%G-W%V")
+    return (EPOCH + timedelta(int(ordinal))).isoformat()
+
+
+def label_ordinal(column):
+    """
+    SQL converting a period_label stored in a habit_streak column back into the ordinal of the period,
+    for the period of the habit's frequency. Used by migration 6.
+    """
+    period = """(SELECT substr(m.frequency, instr(m.frequency, ' per ') + 5)
+                 FROM myhabit m WHERE m.habit_id = habit_streak.habit_id)"""
+    return f"""
+        CASE {period}
+            WHEN 'day' THEN CAST(STRFTIME('%s', {column}) AS INTEGER) / 86400
+            WHEN 'week' THEN
+                (CAST(STRFTIME('%s', substr({column}, 1, 4) || '-01-04') AS INTEGER) / 86400 + 3) / 7
+                + CAST(substr({column}, 7) AS INTEGER) - 1
+            WHEN 'month' THEN
+                CAST(substr({column}, 1, 4) AS INTEGER) * 12 + CAST(substr({column}, 6, 2) AS INTEGER) - 1
+        END
+        """
+
+
+def rollup_add(row):
+    """
+    SQL that adds the tracker row (NEW or OLD inside a trigger) to its day, week and month rollup rows.
+    The trigger must only run it for rows that pass rollup_filter.
+    """
+    return "".join(
+        f"""
+            INSERT INTO tracker_rollup (habit_id, period_kind, period_key,
+                                        done_count, skip_count, missed_count)
+            VALUES ({row}.habit_id, '{period}', {row}.{column},
+                    {row}.status = 'Done!', {row}.status = 'Skip.', {row}.status = 'Missed.')
+            ON CONFLICT (habit_id, period_kind, period_key) DO UPDATE SET
+                done_count = done_count + excluded.done_count,
+                skip_count = skip_count + excluded.skip_count,
+                missed_count = missed_count + excluded.missed_count;
+            """
+        for period, column in PERIOD_COLUMNS.items()
+    )
+
+
+def rollup_filter(row):
+    """
+    The condition for a tracker row to be counted in tracker_rollup.
+    """
+    return f"""{row}.habit_id IS NOT NULL AND {row}.day_ord IS NOT NULL
+        AND {row}.status IN ('Done!', 'Skip.', 'Missed.')"""
+
+
+def rollup_remove(row):
+    """
+    SQL that takes the tracker row out of its rollup rows and deletes the rollup rows left empty.
+    """
+    return "".join(
+        f"""
+            UPDATE tracker_rollup SET
+                done_count = done_count - ({row}.status = 'Done!'),
+                skip_count = skip_count - ({row}.status = 'Skip.'),
+                missed_count = missed_count - ({row}.status = 'Missed.')
+            WHERE habit_id = {row}.habit_id AND period_kind = '{period}'
+                  AND period_key = {row}.{column};
+            DELETE FROM tracker_rollup
+            WHERE habit_id = {row}.habit_id AND period_kind = '{period}'
+                  AND period_key = {row}.{column}
+                  AND done_count = 0 AND skip_count = 0 AND missed_count = 0;
+            """
+        for period, column in PERIOD_COLUMNS.items()
+    )
+
+
+# The rollup rows as they follow from the tracker table, used to fill and to check tracker_rollup.
+ROLLUP_FROM_TRACKER = " UNION ALL ".join(
+    f"""
+    SELECT habit_id, '{period}', {column},
+           SUM(status = 'Done!'), SUM(status = 'Skip.'), SUM(status = 'Missed.')
+    FROM tracker
+    WHERE habit_id IN (SELECT habit_id FROM myhabit) AND {column} IS NOT NULL
+          AND status IN ('Done!', 'Skip.', 'Missed.')
+    GROUP BY habit_id, {column}
+    """
+    for period, column in PERIOD_COLUMNS.items()
+)
+
+
+# Each entry is one schema version: MIGRATIONS[0] brings a database to version 1, and so on.
+# The applied version is stored in PRAGMA user_version, so existing files are upgraded in place.
+# Only append new entries; never edit one that has been released.
+MIGRATIONS = [
+    # 1: the original myhabit and tracker tables
+    (
+        """
+        CREATE TABLE IF NOT EXISTS myhabit (
+        habit_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_name TEXT UNIQUE,
+        description TEXT,
+        frequency TEXT,
+        start_date TEXT,
+        current_streak INTEGER,
+        max_streak INTEGER)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tracker (
+        checkin_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_id INTEGER,
+        date TEXT,
+        status TEXT,
+        FOREIGN KEY(habit_id) REFERENCES myhabit(habit_id) ON DELETE CASCADE)
+        """,
+    ),
+    # 2: indexes for per-habit history and per-period logs
+    (
+        "CREATE INDEX IF NOT EXISTS idx_tracker_habit_date ON tracker (habit_id, date)",
+        "CREATE INDEX IF NOT EXISTS idx_tracker_date ON tracker (date)",
+    ),
+    # 3: bookkeeping for the streak stored in myhabit.
+    # dirty counts tracker changes made since the streak was last stored,
+    # as_of is the period (e.g. "2025-01-07", "2025-W02" or "2025-01") the streak was computed for.
+    (
+        """
+        CREATE TABLE IF NOT EXISTS habit_streak (
+        habit_id INTEGER PRIMARY KEY,
+        dirty INTEGER NOT NULL DEFAULT 0,
+        as_of TEXT,
+        FOREIGN KEY(habit_id) REFERENCES myhabit(habit_id) ON DELETE CASCADE)
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tracker_insert_marks_streak AFTER INSERT ON tracker
+        BEGIN
+            UPDATE habit_streak SET dirty = dirty + 1 WHERE habit_id = NEW.habit_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tracker_delete_marks_streak AFTER DELETE ON tracker
+        BEGIN
+            UPDATE habit_streak SET dirty = dirty + 1 WHERE habit_id = OLD.habit_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tracker_update_marks_streak AFTER UPDATE ON tracker
+        BEGIN
+            UPDATE habit_streak SET dirty = dirty + 1
+            WHERE habit_id IN (OLD.habit_id, NEW.habit_id);
+        END
+        """,
+    ),
+    # 4: incremental streak state. last_period is the latest period with a completion,
+    # period_count the completions in it and previous_run the successful periods in a row right before it.
+    # period_count is NULL when the state is unknown and the streak must be recomputed from the log.
+    (
+        "ALTER TABLE habit_streak ADD COLUMN last_period TEXT",
+        "ALTER TABLE habit_streak ADD COLUMN period_count INTEGER",
+        "ALTER TABLE habit_streak ADD COLUMN previous_run INTEGER",
+    ),
+    # 5: integer copies of tracker.date, see date_ordinals. The insert functions below fill them,
+    # the triggers cover rows written by plain SQL. Period queries filter on day_ord instead of date.
+    (
+        "ALTER TABLE tracker ADD COLUMN minute_epoch INTEGER",
+        "ALTER TABLE tracker ADD COLUMN day_ord INTEGER",
+        "ALTER TABLE tracker ADD COLUMN week_ord INTEGER",
+        "ALTER TABLE tracker ADD COLUMN month_ord INTEGER",
+        "UPDATE tracker SET " + ORDINALS_FROM_DATE,
+        """
+        CREATE TRIGGER IF NOT EXISTS tracker_insert_fills_ordinals AFTER INSERT ON tracker
+        WHEN NEW.day_ord IS NULL
+        BEGIN
+            UPDATE tracker SET """
+        + ORDINALS_FROM_DATE
+        + """ WHERE checkin_id = NEW.checkin_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tracker_date_update_fills_ordinals AFTER UPDATE OF date ON tracker
+        BEGIN
+            UPDATE tracker SET """
+        + ORDINALS_FROM_DATE
+        + """ WHERE checkin_id = NEW.checkin_id;
+        END
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_tracker_day ON tracker (day_ord)",
+        "DROP INDEX IF EXISTS idx_tracker_date",
+    ),
+    # 6: habit_streak.as_of and last_period hold the ordinal of their period (see date_ordinals) instead of
+    # its label, so that a checkoff advances the streak state without formatting or parsing dates.
+    # A label that cannot be converted leaves the state unknown (period_count NULL).
+    (
+        "ALTER TABLE habit_streak ADD COLUMN as_of_ord INTEGER",
+        "ALTER TABLE habit_streak ADD COLUMN last_ord INTEGER",
+        f"""
+        UPDATE habit_streak SET
+            as_of_ord = {label_ordinal("as_of")},
+            last_ord = {label_ordinal("last_period")}
+        """,
+        """
+        UPDATE habit_streak SET period_count = NULL
+        WHERE last_period IS NOT NULL AND last_ord IS NULL
+        """,
+        "ALTER TABLE habit_streak DROP COLUMN as_of",
+        "ALTER TABLE habit_streak DROP COLUMN last_period",
+        "ALTER TABLE habit_streak RENAME COLUMN as_of_ord TO as_of",
+        "ALTER TABLE habit_streak RENAME COLUMN last_ord TO last_period",
+    ),
+    # 7: completions per habit and day/week/month (period_key is the ordinal of the period),
+    # kept in step with the tracker table by triggers so that analytics read one row per period.
+    # See rebuild_rollup and check_rollup.
+    (
+        """
+        CREATE TABLE IF NOT EXISTS tracker_rollup (
+        habit_id INTEGER NOT NULL,
+        period_kind TEXT NOT NULL,
+        period_key INTEGER NOT NULL,
+        done_count INTEGER NOT NULL DEFAULT 0,
+        skip_count INTEGER NOT NULL DEFAULT 0,
+        missed_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (habit_id, period_kind, period_key),
+        FOREIGN KEY(habit_id) REFERENCES myhabit(habit_id) ON DELETE CASCADE)
+        WITHOUT ROWID
+        """,
+        "INSERT INTO tracker_rollup " + ROLLUP_FROM_TRACKER,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tracker_insert_updates_rollup AFTER INSERT ON tracker
+        WHEN {rollup_filter("NEW")}
+        BEGIN {rollup_add("NEW")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tracker_delete_updates_rollup AFTER DELETE ON tracker
+        BEGIN {rollup_remove("OLD")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tracker_update_removes_from_rollup
+        AFTER UPDATE OF habit_id, status, day_ord, week_ord, month_ord ON tracker
+        BEGIN {rollup_remove("OLD")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS tracker_update_adds_to_rollup
+        AFTER UPDATE OF habit_id, status, day_ord, week_ord, month_ord ON tracker
+        WHEN {rollup_filter("NEW")}
+        BEGIN {rollup_add("NEW")}
+        END
+        """,
+    ),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(db=DEFAULT_DB):
+    with get_cursor(db) as cur:
+        cur.execute("PRAGMA user_version")
+        return cur.fetchone()[0]
+
+
+def migrate(db=DEFAULT_DB, target=SCHEMA_VERSION):
+    """
+    Applies the pending migrations up to the target version in one transaction.
+
+    Returns:
+        int: the schema version of the database after migrating.
+    """
+    with get_cursor(db) as cur:
+        cur.execute("PRAGMA user_version")
+        version = cur.fetchone()[0]
+        if version >= target:
+            return version
+
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute("PRAGMA user_version")
+        version = cur.fetchone()[0]
+        for number in range(version + 1, target + 1):
+            for statement in MIGRATIONS[number - 1]:
+                cur.execute(statement)
+            cur.execute(f"PRAGMA user_version = {number}")
+        cur.connection.commit()
+        return max(version, target)
+
+
+def create_tables(db=DEFAULT_DB):
+    """
+    Creates a habit(myhabit) table and a tracker table, and upgrades an existing database to the latest schema.
+    """
+    migrate(db)
 
 
 def get_data_from_myhabit_by_name(db, column, habit_name):
@@ -65,6 +637,15 @@ def get_habit_id(db, habit_name):
     return result[0] if result else None
 
 
+def get_habit_ids(db):
+    """
+    Returns a dict that maps every habit name to its habit id.
+    """
+    with get_cursor(db) as cur:
+        cur.execute("""SELECT habit_name, habit_id FROM myhabit""")
+        return dict(cur.fetchall())
+
+
 def get_data_from_tracker(db, column, habit_name):
     with get_cursor(db) as cur:
         habit_id = get_habit_id(db, habit_name)
@@ -77,6 +658,216 @@ def get_data_from_tracker(db, column, habit_name):
         return [row for row in results] if results else []
 
 
+def iter_habit_log(db, habit_name, chunk_size=1000):
+    """
+    Yields tuple(minute_epoch, status) for every record of the habit, latest first like get_data_from_tracker,
+    fetching chunk_size rows at a time.
+    """
+    with get_cursor(db) as cur:
+        habit_id = get_habit_id(db, habit_name)
+        cur.execute(
+            """SELECT minute_epoch, status FROM tracker
+                    WHERE habit_id = ? ORDER BY date DESC""",
+            (habit_id,),
+        )
+        while rows := cur.fetchmany(chunk_size):
+            yield from rows
+
+
+def get_habit_log_page(db, habit_name, limit=None, before=None, start=None, end=None):
+    """
+    Returns one page of the records of the habit, latest first like get_data_from_tracker.
+    Pages are keyset-paginated on (date, checkin_id), which idx_tracker_habit_date serves in order,
+    so the cost of a page does not depend on how many records come before or after it.
+
+    Args:
+        limit: maximum number of records, None for all.
+        before: (date, checkin_id) of the last record of the previous page. Only older records are returned.
+        start, end: "YYYY-MM-DD" bounds of a date window, start <= date < end. Either can be None.
+    Returns:
+        list: a list of tuple(checkin_id, date, minute_epoch, status).
+    """
+    conditions, params = ["habit_id = ?"], [get_habit_id(db, habit_name)]
+    if before is not None:
+        conditions.append("(date, checkin_id) < (?, ?)")
+        params.extend(before)
+    if start is not None:
+        conditions.append("date >= ?")
+        params.append(str(start))
+    if end is not None:
+        conditions.append("date < ?")
+        params.append(str(end))
+    params.append(-1 if limit is None else limit)
+    with get_cursor(db) as cur:
+        cur.execute(
+            f"""SELECT checkin_id, date, minute_epoch, status FROM tracker
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY date DESC, checkin_id DESC LIMIT ?""",
+            params,
+        )
+        return cur.fetchall()
+
+
+def count_completions(db, habit_name, period):
+    """
+    Counts the records with the status of done and skip of the habit per day, week or month.
+    The counts are read from tracker_rollup, so the cost grows with the number of periods, not of records.
+
+    Returns:
+        list: a list of tuple(ordinal, count) sorted by ordinal. See date_ordinals for the ordinals.
+    """
+    with get_cursor(db) as cur:
+        habit_id = get_habit_id(db, habit_name)
+        cur.execute(
+            """
+                    SELECT period_key, done_count + skip_count FROM tracker_rollup
+                    WHERE habit_id = ? AND period_kind = ? AND done_count + skip_count > 0
+                    ORDER BY period_key
+                    """,
+            (habit_id, period),
+        )
+        return cur.fetchall()
+
+
+def habit_completion_logs(db, columns, where, params=()):
+    """
+    Reads myhabit columns and the completion counts of every habit matching a WHERE clause in one query on tracker_rollup.
+    Records are grouped by day, week or month following the frequency of each habit.
+
+    Args:
+        columns: the myhabit columns to return, e.g. "m.habit_name, m.frequency".
+        where: the condition on myhabit m, with ? placeholders for params.
+    Returns:
+        list: a list of tuple(*columns, habit_log) sorted by habit_id.
+              habit_log is a sorted list of tuple(ordinal, count), like count_completions.
+    """
+    with get_cursor(db) as cur:
+        cur.execute(
+            f"""
+                    SELECT m.habit_id, {columns}, r.period_key, r.done_count + r.skip_count
+                    FROM myhabit m
+                    LEFT JOIN tracker_rollup r
+                        ON r.habit_id = m.habit_id
+                        AND r.period_kind = CASE
+                            WHEN m.frequency LIKE '%day' THEN 'day'
+                            WHEN m.frequency LIKE '%week' THEN 'week'
+                            ELSE 'month'
+                        END
+                        AND r.done_count + r.skip_count > 0
+                    WHERE {where}
+                    ORDER BY m.habit_id, r.period_key
+                    """,
+            params,
+        )
+        results = []
+        previous_id = None
+        for habit_id, *values, ordinal, count in cur:
+            if habit_id != previous_id:
+                results.append((*values, []))
+                previous_id = habit_id
+            if ordinal is not None:
+                results[-1][-1].append((ordinal, count))
+        return results
+
+
+def completion_count_of_all_habits(db, period=None):
+    """
+    Counts the records with the status of done and skip for every habit in one query on tracker_rollup.
+    Records are grouped by day, week or month following the frequency of each habit.
+
+    Args:
+        period: "day", "week" or "month" to only count habits with that periodicity. None for all habits.
+    Returns:
+        list: a list of tuple(habit_name, frequency, start_date, habit_log).
+              habit_log is a sorted list of tuple(ordinal, count), like count_completions.
+    """
+    return habit_completion_logs(
+        db,
+        "m.habit_name, m.frequency, m.start_date",
+        "m.frequency LIKE ?",
+        ("%" + (period or ""),),
+    )
+
+
+def completion_counts_by_habit_id(db, first_id, last_id):
+    """
+    Reads the completion counts of every habit with an id from first_id to last_id in one query on tracker_rollup,
+    e.g. for recomputing the streaks of a range of habits.
+
+    Returns:
+        list: a list of tuple(habit_id, frequency, habit_log) sorted by habit_id.
+              habit_log is a sorted list of tuple(ordinal, count), like count_completions.
+    """
+    return habit_completion_logs(
+        db, "m.habit_id, m.frequency", "m.habit_id BETWEEN ? AND ?", (first_id, last_id)
+    )
+
+
+COMPLETION_GRID_QUERY = """
+    SELECT r.habit_id, r.period_key, r.done_count + r.skip_count
+    FROM myhabit m
+    CROSS JOIN tracker_rollup r
+        ON r.habit_id = m.habit_id
+        AND r.period_kind = ?
+        AND r.period_key BETWEEN ? AND ?
+    WHERE r.done_count + r.skip_count > 0
+    """
+
+
+def completion_grid(db, period, first_ordinal, last_ordinal):
+    """
+    Reads the completion counts (done and skip) of every habit per day, week or month
+    from first_ordinal to last_ordinal (inclusive) in one query on tracker_rollup.
+    The CROSS JOIN keeps myhabit as the outer table, so the rollup is searched by its primary key once per habit
+    instead of being scanned for the period_kind.
+
+    Returns:
+        numpy.ndarray: an int64 array with one row (habit_id, ordinal, count) per period with a completion.
+    """
+    with get_cursor(db) as cur:
+        cur.execute(COMPLETION_GRID_QUERY, (period, first_ordinal, last_ordinal))
+        return np.array(cur.fetchall(), dtype=np.int64).reshape(-1, 3)
+
+
+def rebuild_rollup(db):
+    """
+    Recomputes tracker_rollup from the tracker table in one transaction.
+
+    Returns:
+        int: the number of rollup rows.
+    """
+    with get_cursor(db) as cur:
+        cur.execute("DELETE FROM tracker_rollup")
+        cur.execute("INSERT INTO tracker_rollup " + ROLLUP_FROM_TRACKER)
+        count = cur.rowcount
+        cur.connection.commit()
+        return count
+
+
+def check_rollup(db):
+    """
+    Compares tracker_rollup with the counts computed from the tracker table.
+
+    Returns:
+        list: a list of tuple(problem, habit_id, period_kind, period_key, done_count, skip_count, missed_count),
+              where problem is "missing" for expected rows that are not stored (or stored with other counts)
+              and "unexpected" for stored rows that do not follow from the tracker table. Empty if consistent.
+    """
+    stored = """SELECT habit_id, period_kind, period_key, done_count, skip_count, missed_count
+                FROM tracker_rollup"""
+    with get_cursor(db) as cur:
+        cur.execute(
+            f"""
+                    WITH expected AS ({ROLLUP_FROM_TRACKER})
+                    SELECT 'missing', * FROM (SELECT * FROM expected EXCEPT {stored})
+                    UNION ALL
+                    SELECT 'unexpected', * FROM ({stored} EXCEPT SELECT * FROM expected)
+                    ORDER BY 2, 3, 4, 1
+                    """
+        )
+        return cur.fetchall()
+
+
 def get_distinct_value(db, column, table):
     with get_cursor(db) as cur:
         cur.execute(f"""SELECT DISTINCT {column} FROM {table}""")
@@ -107,16 +898,103 @@ def insert_myhabit(
 
 
 def insert_tracker(db, habit_name, date, status):
+    """
+    Inserts one activity into the tracker table.
+
+    Returns:
+        tuple: the date_ordinals of date, stored with the activity.
+    """
+    ordinals = date_ordinals(date)
     with get_cursor(db) as cur:
         habit_id = get_habit_id(db, habit_name)
         cur.execute(
             """
-                    INSERT INTO tracker (habit_id, date, status)
-                    VALUES (?, ?, ?)
+                    INSERT INTO tracker (habit_id, date, status,
+                                         minute_epoch, day_ord, week_ord, month_ord)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+            (habit_id, date, status, *ordinals),
+        )
+        cur.connection.commit()
+    return ordinals
+
+
+def insert_myhabit_many(db, rows):
+    """
+    Inserts many habits into the myhabit table in one transaction. Habits whose name already exists are skipped.
+
+    Args:
+        rows: an iterable of tuple(habit_name, description, frequency, start_date), consumed lazily.
+    Returns:
+        int: the number of inserted habits.
+    """
+    with get_cursor(db) as cur:
+        cur.executemany(
+            """
+                    INSERT INTO myhabit (habit_name, description, frequency,
+                                         start_date, current_streak, max_streak)
+                    VALUES (?, ?, ?, ?, 0, 0)
+                    ON CONFLICT(habit_name) DO NOTHING
+                    """,
+            rows,
+        )
+        cur.connection.commit()
+        return cur.rowcount
+
+
+def iter_myhabit(db, chunk_size=1000):
+    """
+    Yields tuple(habit_name, description, frequency, start_date) for every habit, fetching chunk_size rows at a time.
+    """
+    with get_cursor(db) as cur:
+        cur.execute(
+            """SELECT habit_name, description, frequency, start_date
+                    FROM myhabit ORDER BY habit_id"""
+        )
+        while rows := cur.fetchmany(chunk_size):
+            yield from rows
+
+
+def iter_tracker(db, chunk_size=1000):
+    """
+    Yields tuple(habit_name, date, status) for every activity in the tracker table, fetching chunk_size rows at a time.
+    """
+    with get_cursor(db) as cur:
+        cur.execute(
+            """
+                    SELECT m.habit_name, t.date, t.status
+                    FROM tracker t
+                    JOIN myhabit m ON m.habit_id = t.habit_id
+                    ORDER BY t.checkin_id
+                    """
+        )
+        while rows := cur.fetchmany(chunk_size):
+            yield from rows
+
+
+def insert_tracker_many(db, rows):
+    """
+    Inserts many activities into the tracker table in one transaction.
+
+    Args:
+        rows: an iterable of tuple(habit_id, date, status). It is consumed lazily, so it can be a generator.
+    Returns:
+        int: the number of inserted rows.
+    """
+    with get_cursor(db) as cur:
+        cur.executemany(
+            """
+                    INSERT INTO tracker (habit_id, date, status,
+                                         minute_epoch, day_ord, week_ord, month_ord)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
                     """,
-            (habit_id, date, status),
+            (
+                (habit_id, date, status, *date_ordinals(date))
+                for habit_id, date, status in rows
+            ),
         )
         cur.connection.commit()
+        return cur.rowcount
 
 
 def delete_value(db, habit_name, table):
@@ -144,28 +1022,210 @@ def update_myhabit(db, habit_name, column, value):
         cur.connection.commit()
 
 
-def daily_and_monthly_habit_log(db, time):
+def get_streak_state(db, habit_name):
     """
-    Returns habit log on the specific date or in the specific month.
+    Returns the stored streak of the habit with its bookkeeping.
 
-    Args:
-        time: date of interest in "YYYY-MM-DD" format.
     Returns:
-        list: a list of tuple(date, habit name, status). Tuples are records from the tracker table on the specific date or in the specific month.
+        tuple: (frequency, current_streak, max_streak, dirty, as_of, last_period, period_count, previous_run).
+               The values from dirty on are None if the streak has never been stored.
+               None if the habit is not found.
     """
     with get_cursor(db) as cur:
         cur.execute(
-            """ 
-                    SELECT t.date, m.habit_name, t.status
+            """
+                    SELECT m.frequency, m.current_streak, m.max_streak, s.dirty, s.as_of,
+                           s.last_period, s.period_count, s.previous_run
                     FROM myhabit m
-                    JOIN tracker t ON m.habit_id = t.habit_id
-                    WHERE t.date LIKE ?
-                    ORDER BY t.date DESC
+                    LEFT JOIN habit_streak s ON s.habit_id = m.habit_id
+                    WHERE m.habit_name = ?
                     """,
-            (time + "%",),
+            (habit_name,),
         )
-        rows = cur.fetchall()
-        results = [row for row in rows] if rows else []
+        result = cur.fetchone()
+        return result if result else None
+
+
+def get_habits_with_streak_state(db, habit_names=None):
+    """
+    Returns the myhabit row of many habits together with their stored streak, in one query.
+
+    Args:
+        habit_names: the habits to read, None for all habits.
+    Returns:
+        list: a list of tuple(habit_id, habit_name, description, frequency, start_date, streak_state)
+              sorted by habit_id. streak_state is the value get_streak_state returns for the habit.
+    """
+    query = """
+        SELECT m.habit_id, m.habit_name, m.description, m.start_date,
+               m.frequency, m.current_streak, m.max_streak, s.dirty, s.as_of,
+               s.last_period, s.period_count, s.previous_run
+        FROM myhabit m
+        LEFT JOIN habit_streak s ON s.habit_id = m.habit_id
+        """
+    params = ()
+    if habit_names is not None:
+        params = tuple(habit_names)
+        query += f"WHERE m.habit_name IN ({', '.join('?' * len(params))})"
+    with get_cursor(db) as cur:
+        cur.execute(query + " ORDER BY m.habit_id", params)
+        # row[4:] has the columns of get_streak_state
+        return [(*row[:3], row[4], row[3], row[4:]) for row in cur.fetchall()]
+
+
+def store_streak(
+    db,
+    habit_name,
+    current_streak,
+    max_streak,
+    as_of,
+    dirty,
+    last_period=None,
+    period_count=None,
+    previous_run=None,
+):
+    """
+    Saves the streak into myhabit and marks it clean, in one transaction.
+    Nothing is saved if the tracker changed again after the streak was read (dirty no longer matches).
+
+    Args:
+        dirty: the dirty value expected in habit_streak, i.e. the value returned by get_streak_state
+               plus the tracker changes made by the caller itself.
+        last_period, period_count, previous_run: the incremental streak state, see MIGRATIONS.
+    Returns:
+        bool: True if the streak was saved.
+    """
+    with get_cursor(db) as cur:
+        habit_id = get_habit_id(db, habit_name)
+        if habit_id is None:
+            return False
+
+        cur.execute(
+            """
+                    INSERT INTO habit_streak (habit_id, dirty, as_of,
+                                              last_period, period_count, previous_run)
+                    VALUES (?, 0, ?, ?, ?, ?)
+                    ON CONFLICT(habit_id) DO UPDATE SET
+                        dirty = 0,
+                        as_of = excluded.as_of,
+                        last_period = excluded.last_period,
+                        period_count = excluded.period_count,
+                        previous_run = excluded.previous_run
+                    WHERE habit_streak.dirty IS ?
+                    """,
+            (habit_id, as_of, last_period, period_count, previous_run, dirty),
+        )
+        if cur.rowcount != 1:
+            cur.connection.rollback()
+            return False
+
+        cur.execute(
+            """
+                    UPDATE myhabit SET current_streak = ?, max_streak = ? WHERE habit_id = ?
+                    """,
+            (current_streak, max_streak, habit_id),
+        )
+        cur.connection.commit()
+        return True
+
+
+def store_streaks_many(db, rows):
+    """
+    Saves the streaks of many habits and marks them clean, in one transaction.
+    Unlike store_streak, dirty is not compared: the caller must keep other writers out between reading and saving,
+    e.g. with BEGIN IMMEDIATE on the same thread.
+
+    Args:
+        rows: an iterable of tuple(habit_id, current_streak, max_streak, as_of, last_period, period_count, previous_run).
+    Returns:
+        int: the number of habits saved.
+    """
+    rows = list(rows)
+    with get_cursor(db) as cur:
+        cur.executemany(
+            """
+                    INSERT INTO habit_streak (habit_id, dirty, as_of,
+                                              last_period, period_count, previous_run)
+                    VALUES (?, 0, ?, ?, ?, ?)
+                    ON CONFLICT(habit_id) DO UPDATE SET
+                        dirty = 0,
+                        as_of = excluded.as_of,
+                        last_period = excluded.last_period,
+                        period_count = excluded.period_count,
+                        previous_run = excluded.previous_run
+                    """,
+            [(row[0], *row[3:]) for row in rows],
+        )
+        cur.executemany(
+            """
+                    UPDATE myhabit SET current_streak = ?, max_streak = ? WHERE habit_id = ?
+                    """,
+            [(row[1], row[2], row[0]) for row in rows],
+        )
+        cur.connection.commit()
+    return len(rows)
+
+
+# Period logs filter on half-open ranges of day ordinals (day_ord >= start AND day_ord < end),
+# so that they can be served by idx_tracker_day instead of scanning the tracker table.
+DAILY_AND_MONTHLY_LOG_QUERY = """
+    SELECT t.date, m.habit_name, t.status
+    FROM myhabit m
+    JOIN tracker t ON m.habit_id = t.habit_id
+    WHERE t.day_ord >= ? AND t.day_ord < ?
+    ORDER BY t.date DESC
+    """
+
+WEEKLY_LOG_QUERY = """
+    SELECT t.date, STRFTIME('%Y-W%W', t.date) AS year_week, m.habit_name, t.status
+    FROM myhabit m
+    JOIN tracker t ON m.habit_id = t.habit_id
+    WHERE t.day_ord >= ? AND t.day_ord < ?
+    ORDER BY t.date DESC
+    """
+
+
+def day_or_month_range(time):
+    """
+    Returns the [start, end) range of day ordinals on the specific date or in the specific month.
+
+    Args:
+        time: "YYYY-MM-DD" or "YYYY-MM".
+    """
+    if len(time) == 7:
+        year, month = int(time[:4]), int(time[5:7])
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+    else:
+        start = date.fromisoformat(time)
+        end = start + timedelta(1)
+    return (start - EPOCH).days, (end - EPOCH).days
+
+
+def week_range(time):
+    """
+    Returns the [start, end) range of day ordinals in the week of time.
+    Like STRFTIME('%Y-W%W'), the Monday-based week is cut at the start and end of the year.
+    """
+    day = date(time.year, time.month, time.day)
+    monday = day - timedelta(day.weekday())
+    start = max(monday, date(day.year, 1, 1))
+    end = min(monday + timedelta(7), date(day.year + 1, 1, 1))
+    return (start - EPOCH).days, (end - EPOCH).days
+
+
+def daily_and_monthly_habit_log(db, time):
+    """
+    Returns habit log on the specific date or in the specific month.
+
+    Args:
+        time: date of interest in "YYYY-MM-DD" format, or month of interest in "YYYY-MM" format.
+    Returns:
+        list: a list of tuple(date, habit name, status). Tuples are records from the tracker table on the specific date or in the specific month.
+    """
+    with get_cursor(db) as cur:
+        cur.execute(DAILY_AND_MONTHLY_LOG_QUERY, day_or_month_range(time))
+        results = cur.fetchall()
         columns = [descrip[0] for descrip in cur.description]
         return results, columns
 
@@ -175,23 +1235,92 @@ def weekly_habit_log(db, time):
     Returns habit log in the specific week.
 
     Args:
-        time: date of interest in "YYYY-MM-DD" format. The week of the date will be used to filter records.
+        time: date of interest. The week of the date will be used to filter records.
     Returns:
         list: a list of tuple(date, year week, habit name, status). Tuples are records from the tracker table in the specific week.
     """
-    week = time.strftime("%Y-W%W")
     with get_cursor(db) as cur:
-        cur.execute(
-            """ 
-                    SELECT t.date, STRFTIME('%Y-W%W', t.date) AS year_week, m.habit_name, t.status
-                    FROM myhabit m
-                    JOIN tracker t ON m.habit_id = t.habit_id
-                    WHERE year_week = ?
-                    ORDER BY t.date DESC
-                    """,
-            (week,),
-        )
-        rows = cur.fetchall()
-        results = [row for row in rows] if rows else []
+        cur.execute(WEEKLY_LOG_QUERY, week_range(time))
+        results = cur.fetchall()
         columns = [descrip[0] for descrip in cur.description]
         return results, columns
+
+
+def period_log_columns_query(labels):
+    """
+    SQL of period_log_columns. The status is returned as its index in labels, -1 if it is NULL
+    and -2 if it is any other text, with the labels as the first parameters.
+    """
+    whens = "".join(f" WHEN ? THEN {code}" for code in range(len(labels)))
+    return f"""
+    SELECT t.minute_epoch, t.habit_id,
+           CASE t.status{whens} ELSE CASE WHEN t.status IS NULL THEN -1 ELSE -2 END END
+    FROM myhabit m
+    JOIN tracker t ON m.habit_id = t.habit_id
+    WHERE t.day_ord >= ? AND t.day_ord < ?
+    ORDER BY t.date DESC
+    """
+
+
+def period_log_columns(db, day_range, chunk_size=10000):
+    """
+    Columnar version of daily_and_monthly_habit_log and weekly_habit_log.
+    The rows are counted first, and then fetched chunk_size at a time into preallocated NumPy arrays,
+    so at most chunk_size rows exist as Python tuples at a time.
+
+    Args:
+        day_range: the [start, end) range of day ordinals, from day_or_month_range or week_range.
+    Returns:
+        tuple: (minute_epoch, habit_id, status, labels), latest record first.
+               The first three are NumPy arrays. status holds the index of the status in labels, -1 for a NULL status.
+               labels is STATUS_LABELS, followed by any other status found in the range, so no status is changed.
+    """
+    labels = STATUS_LABELS
+    with get_cursor(db) as cur:
+        while True:
+            columns = _read_period_log_columns(cur, labels, day_range, chunk_size)
+            if not (columns[2] == -2).any():
+                return (*columns, labels)
+            # statuses outside STATUS_LABELS, e.g. written by plain SQL: read again with them as labels
+            cur.execute(
+                f"""
+                    SELECT DISTINCT status FROM tracker
+                    WHERE day_ord >= ? AND day_ord < ?
+                          AND status NOT IN ({", ".join("?" * len(labels))})
+                    ORDER BY status
+                    """,
+                (*day_range, *labels),
+            )
+            labels += tuple(row[0] for row in cur.fetchall())
+
+
+def _read_period_log_columns(cur, labels, day_range, chunk_size):
+    cur.execute(
+        "SELECT COUNT(*) FROM tracker WHERE day_ord >= ? AND day_ord < ?",
+        day_range,
+    )
+    capacity = cur.fetchone()[0]
+    columns = (
+        np.empty(capacity, dtype=np.int64),
+        np.empty(capacity, dtype=np.int64),
+        np.empty(capacity, dtype=np.int8 if len(labels) < 128 else np.int32),
+    )
+
+    filled = 0
+    cur.execute(period_log_columns_query(labels), (*labels, *day_range))
+    while rows := cur.fetchmany(chunk_size):
+        end = filled + len(rows)
+        if end > len(columns[0]):
+            # records were added after the count
+            columns = tuple(
+                np.resize(column, max(2 * len(column), end)) for column in columns
+            )
+        chunk = np.array(rows, dtype=np.int64)
+        for column, values in zip(columns, chunk.T):
+            column[filled:end] = values
+        filled = end
+    return tuple(column[:filled] for column in columns)
+
+
+# Opt-in instrumentation of every function taking the database, see profiling.py.
+profile_functions(globals(), exclude=("get_pool", "get_cursor"))
@@ -1,49 +1,159 @@
 from analysis import Analysis
+from db import get_habits_with_streak_state
 from habit_tracker import Habit_Tracker
 
 
 class Habit:
+    """
+    A habit read from the database on demand. Properties (id, habit_name, description, frequency, start_date),
+    the streak (current_streak, longest_streak) and the log are each loaded the first time one of them is used,
+    and kept until invalidate is called.
+    """
+
+    __slots__ = ("_log", "_name", "_properties", "_streak", "db")
+
+    PARTS = ("properties", "streak", "log")
+
     def __init__(self, db, habit_name):
+        self.db = db
+        self._name = habit_name
+        self._properties = None
+        self._streak = None
+        self._log = None
+
+    @classmethod
+    def load_many(cls, db, habit_names=None):
         """
-        When the object is initialized, load habit properties and its event log.
+        Builds Habit objects with their properties and streaks for many habits, reading myhabit and the stored
+        streaks in one query. A streak is only recomputed, one habit at a time, if it is out of date.
+
+        Args:
+            habit_names: the habits to load, None for all habits. Unknown names are left out.
+        Returns:
+            list: Habit objects sorted by habit id.
         """
-        self.db = db
-        self.id = None
-        self.habit_name = None
-        self.description = None
-        self.frequency = None
-        self.start_date = None
-        self.current_streak = None
-        self.longest_streak = None
-        self.log = None
-        self.load_habit_properties(habit_name)
-        self.load_habit_log(habit_name)
+        habit_tracker = Habit_Tracker(db)
+        habits = []
+        for (
+            habit_id,
+            habit_name,
+            description,
+            frequency,
+            start_date,
+            streak_state,
+        ) in get_habits_with_streak_state(db, habit_names):
+            habit = cls(db, habit_name)
+            habit._properties = (
+                habit_id,
+                habit_name,
+                description,
+                frequency,
+                start_date,
+            )
+            habit._streak = habit_tracker.streak_from_state(habit_name, streak_state)
+            habits.append(habit)
+        return habits
+
+    def invalidate(self, *parts):
+        """
+        Forgets loaded values so that they are read again on next use, e.g. invalidate("streak", "log") after a checkoff.
+
+        Args:
+            parts: "properties", "streak" and/or "log". All of them if none is given.
+        """
+        for part in parts or self.PARTS:
+            if part not in self.PARTS:
+                raise ValueError(f"part must be one of {self.PARTS}")
+            setattr(self, "_" + part, None)
+
+    def _habit_property(self, index):
+        if self._properties is None:
+            self.load_habit_properties()
+        # an empty tuple marks a habit that does not exist
+        return self._properties[index] if self._properties else None
+
+    @property
+    def id(self):
+        return self._habit_property(0)
+
+    @property
+    def habit_name(self):
+        return self._habit_property(1)
+
+    @property
+    def description(self):
+        return self._habit_property(2)
+
+    @property
+    def frequency(self):
+        return self._habit_property(3)
+
+    @property
+    def start_date(self):
+        return self._habit_property(4)
+
+    @property
+    def current_streak(self):
+        if self._streak is None:
+            self.load_streak()
+        return self._streak[0] if self._streak else None
 
-    def load_habit_properties(self, habit_name):
+    @property
+    def longest_streak(self):
+        if self._streak is None:
+            self.load_streak()
+        return self._streak[1] if self._streak else None
+
+    @property
+    def log(self):
+        """
+        All records of the habit as a HabitLog, latest first. Use latest_entries, entries_before
+        or entries_between to read a part of a long history.
         """
-        Updates streak count in myhabit table, then gets habit properties and loads to the object attributes.
+        if self._log is None:
+            self.load_habit_log()
+        return self._log
+
+    def load_habit_properties(self):
+        """
+        Gets the habit properties from the myhabit table.
         """
         analysis = Analysis(self.db)
+        habit_properties = analysis.get_habit_data("*", self._name)
+        self._properties = tuple(habit_properties[:5]) if habit_properties else ()
+
+    def load_streak(self):
+        """
+        Gets the current and longest streak.
+        Loading is read-only: the streak count is only written by Habit_Tracker when activities are logged.
+        """
         habit_tracker = Habit_Tracker(self.db)
+        self._streak = habit_tracker.get_streak(self._name)
 
-        habit_tracker.update_streak(habit_name)
-        habit_properties = analysis.get_habit_data("*", habit_name)
-        if habit_properties:
-            (
-                self.id,
-                self.habit_name,
-                self.description,
-                self.frequency,
-                self.start_date,
-                self.current_streak,
-                self.longest_streak,
-            ) = habit_properties
-        else:
-            return None
-
-    def load_habit_log(self, habit_name):
-        """
-        Loads the habit log from tracker table to the object attribute.
+    def load_habit_log(self):
+        """
+        Loads the habit log from tracker table to the object attribute, as a compact HabitLog (see records.py).
         """
         analysis = Analysis(self.db)
-        self.log = analysis.habit_log_from_tracker(habit_name)
+        self._log = analysis.habit_log_records(self._name)
+
+    def latest_entries(self, limit=50):
+        """
+        Returns the latest limit records.
+
+        Returns:
+            tuple: (HabitLog, cursor for entries_before, or None if there are no older records).
+        """
+        return Analysis(self.db).habit_log_page(self._name, limit)
+
+    def entries_before(self, cursor, limit=50):
+        """
+        Returns up to limit records older than the cursor returned with the previous page.
+        """
+        return Analysis(self.db).habit_log_page(self._name, limit, before=cursor)
+
+    def entries_between(self, start, end, limit=None):
+        """
+        Returns the records from the date start up to, but excluding, the date end.
+        """
+        return Analysis(self.db).habit_log_page(self._name, limit, start=start, end=end)
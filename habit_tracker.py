@@ -1,16 +1,117 @@
 from db import (
+    EPOCH,
+    STATUS_LABELS,
+    count_completions,
+    period_label,
     insert_myhabit,
     delete_value,
-    get_data_from_tracker,
     insert_tracker,
-    get_data_from_myhabit_by_name,
-    update_myhabit,
+    insert_tracker_many,
+    get_habit_ids,
+    get_streak_state,
+    store_streak,
 )
+from query_cache import bump_generation
+from profiling import profiled_methods
 from datetime import datetime, timedelta, date
 from dateutil.relativedelta import relativedelta
 import sqlite3
 
 
+def parse_frequency(frequency):
+    """
+    Splits a frequency such as "3 time(s) per week" into the target times (3) and the period ("week").
+    """
+    words = frequency.split()
+    return int(words[0]), words[3]
+
+
+def period_key(day, period):
+    """
+    Returns the key of the day/week/month containing the date, in the same format as completion_count.
+    """
+    if period == "day":
+        return day.strftime("%Y-%m-%d")
+    elif period == "week":
+        return day.strftime("%G-W%V")
+    elif period == "month":
+        return day.strftime("%Y-%m")
+
+
+def period_ordinal(key, period):
+    """
+    Converts a day/week/month key into an integer that grows by one from each period to the next.
+    """
+    if period == "day":
+        return (date.fromisoformat(key) - EPOCH).days
+    elif period == "week":
+        monday = datetime.strptime(key + "-1", "%G-W%V-%u").date()
+        return ((monday - EPOCH).days + 3) // 7
+    elif period == "month":
+        return int(key[:4]) * 12 + int(key[5:7]) - 1
+
+
+# position of the day, week and month ordinal in the tuple of db.date_ordinals
+ORDINAL_INDEX = {"day": 1, "week": 2, "month": 3}
+
+
+def today_ordinal(period):
+    """
+    Returns the ordinal of the current day, week or month, see db.date_ordinals.
+    """
+    today = date.today()
+    if period == "month":
+        return today.year * 12 + today.month - 1
+    day_ord = (today - EPOCH).days
+    return day_ord if period == "day" else (day_ord + 3) // 7
+
+
+def ordinal_streak_count(ordinal_log, today_ordinal, times):
+    """
+    Returns (current streak, maximum streak) of a sorted list of tuple(ordinal, count), as of the period today_ordinal.
+    Periods after today_ordinal are left out. See Habit_Tracker.sparse_streak_count.
+    """
+    updated_streak = 0
+    max_streak = 0
+    previous_ordinal = None
+    for ordinal, success in ordinal_log:
+        if ordinal > today_ordinal:
+            break
+        if success < times:
+            updated_streak = 0
+        elif previous_ordinal == ordinal - 1:
+            updated_streak += 1
+        else:
+            updated_streak = 1
+        max_streak = max(max_streak, updated_streak)
+        previous_ordinal = ordinal
+
+    if previous_ordinal != today_ordinal:
+        updated_streak = 0
+    return updated_streak, max_streak
+
+
+def ordinal_streak_state(ordinal_log, times):
+    """
+    Returns (last ordinal, period_count, previous_run) of a sorted list of tuple(ordinal, count).
+    See Habit_Tracker.streak_state.
+    """
+    if not ordinal_log:
+        return None, 0, 0
+
+    last_ordinal, period_count = ordinal_log[-1]
+    previous_run = 0
+    expected = last_ordinal - 1
+    for i in range(len(ordinal_log) - 2, -1, -1):
+        ordinal, success = ordinal_log[i]
+        if success < times or ordinal != expected:
+            break
+        previous_run += 1
+        expected -= 1
+    return last_ordinal, period_count, previous_run
+
+
+@profiled_methods
 class Habit_Tracker:
     def __init__(self, db):
         self.db = db
@@ -25,46 +126,28 @@ class Habit_Tracker:
             )
         except sqlite3.IntegrityError as err:
             raise err
+        bump_generation(self.db)
 
     def delete_habit(self, habit_name):
         """
         Deletes a habit from both myhabit and tracker tables.
         """
         delete_value(self.db, habit_name, "myhabit")
+        bump_generation(self.db)
 
     def completion_count(self, habit_name, period):
         """
         Counts the records with the status of done and skip.
-        """
-        date_status = get_data_from_tracker(self.db, "date, status", habit_name)
-        completion_mark = ("Done!", "Skip.")
-
-        if period == "day":
-            success_counts = {}
-            for date_str, status in date_status:
-                if status in completion_mark:
-                    event_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M").date()
-                    event_date = datetime.strftime(event_date, "%Y-%m-%d")
-                    success_counts[event_date] = success_counts.get(event_date, 0) + 1
-
-        elif period == "week":
-            success_counts = {}
-            for date_str, status in date_status:
-                if status in completion_mark:
-                    event_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M").date()
-                    year_week = event_date.strftime("%G-W%V")
-                    success_counts[year_week] = success_counts.get(year_week, 0) + 1
+        The records are grouped on the integer day/week/month ordinal columns of the tracker table,
+        so no date string is parsed.
 
-        elif period == "month":
-            success_counts = {}
-            for date_str, status in date_status:
-                if status in completion_mark:
-                    event_date = datetime.strptime(date_str, "%Y-%m-%d %H:%M").date()
-                    year_month = event_date.strftime("%Y-%m")
-                    success_counts[year_month] = success_counts.get(year_month, 0) + 1
-
-        success_counts_list = sorted(success_counts.items())
-        return success_counts_list
+        Returns:
+            list: a sorted list of tuple(period key, count), e.g. [("2025-W02", 3)].
+        """
+        return [
+            (period_label(ordinal, period), count)
+            for ordinal, count in count_completions(self.db, habit_name, period)
+        ]
 
     def fill_history(self, habit_log, period):
         """
@@ -155,34 +238,217 @@ class Habit_Tracker:
             previous_row = current
         return updated_streak, max_streak
 
+    def sparse_streak_count(self, habit_log, period, times):
+        """
+        Calculates the same current and maximum streak as streak_count, without filling the blank periods.
+        Only the periods in habit_log are visited, and a gap between two of them is found from their ordinals,
+        so time and memory grow with the number of periods that have activities, not with the age of the habit.
+        """
+        today_ordinal = period_ordinal(period_key(date.today(), period), period)
+        ordinal_log = [(period_ordinal(key, period), count) for key, count in habit_log]
+        return ordinal_streak_count(ordinal_log, today_ordinal, times)
+
+    def streak_state(self, habit_log, period, times):
+        """
+        Builds the incremental streak state from the output of completion_count.
+
+        Returns:
+            tuple: (last_period, period_count, previous_run).
+                - last_period: the ordinal of the latest period with a completion, None for an empty log.
+                - period_count: completions in last_period.
+                - previous_run: successful periods in a row right before last_period.
+        """
+        ordinal_log = [(period_ordinal(key, period), count) for key, count in habit_log]
+        return ordinal_streak_state(ordinal_log, times)
+
+    def advance_streak(self, state, new_period, times):
+        """
+        Adds one completion in new_period, a period ordinal, to the streak state in constant time.
+
+        Args:
+            state: (last_period, period_count, previous_run, max_streak), with last_period an ordinal.
+        Returns:
+            tuple: the new state, or None if new_period is before last_period and the streak needs a full recompute.
+        """
+        last_period, period_count, previous_run, max_streak = state
+        if new_period == last_period:
+            period_count += 1
+        else:
+            if last_period is not None and new_period < last_period:
+                return None
+            if last_period == new_period - 1 and period_count >= times:
+                previous_run += 1
+            else:
+                previous_run = 0
+            last_period, period_count = new_period, 1
+
+        if period_count >= times:
+            max_streak = max(max_streak, previous_run + 1)
+        return last_period, period_count, previous_run, max_streak
+
+    def current_streak(self, state, today_period, times):
+        """
+        Returns the current streak of the state as of today_period, the same way streak_count counts it.
+        Both periods are ordinals.
+        """
+        last_period, period_count, previous_run, _ = state
+        if last_period == today_period and period_count >= times:
+            return previous_run + 1
+        return 0
+
     def update_streak(self, habit_name):
         """
         Gets current and maximum streak count and then updates the values in myhabit table.
+        The values are saved together with the period they were computed for and the incremental streak state,
+        both as period ordinals, so that reads and the next checkoff can reuse them.
         """
+        streak_state = get_streak_state(self.db, habit_name)
+        if streak_state is None:
+            return
 
-        frequency = get_data_from_myhabit_by_name(self.db, "frequency", habit_name)
-        if frequency is not None:
-            frequency = frequency[0]
+        frequency, dirty = streak_state[0], streak_state[3]
+        times, period = parse_frequency(frequency)
 
-            times = int(frequency.split()[0])
-            period = frequency.split()[3]
+        # computed on the integer ordinals of count_completions, without formatting a period
+        ordinal_log = count_completions(self.db, habit_name, period)
+        today = today_ordinal(period)
+        updated_streak, max_streak = ordinal_streak_count(ordinal_log, today, times)
 
-            updated_streak = 0
-            max_streak = 0
+        last_period, period_count, previous_run = ordinal_streak_state(
+            ordinal_log, times
+        )
+        if last_period is not None and last_period > today:
+            # activities after today are left out of streak_count, so the state cannot be advanced later on
+            period_count = None
+        store_streak(
+            self.db,
+            habit_name,
+            updated_streak,
+            max_streak,
+            today,
+            dirty,
+            last_period,
+            period_count,
+            previous_run,
+        )
+        bump_generation(self.db)
 
-            habit_log = self.completion_count(habit_name, period)
-            updated_streak, max_streak = self.streak_count(habit_log, period, times)
+    def get_streak(self, habit_name):
+        """
+        Returns the current and maximum streak count without writing to the database.
+        The values stored by update_streak or checkoff are used while no activity was logged since.
+        Otherwise, the streak is recomputed from the tracker table in memory.
+        """
+        return self.streak_from_state(habit_name, get_streak_state(self.db, habit_name))
 
-        else:
-            updated_streak, max_streak = 0, 0
+    def streak_from_state(self, habit_name, streak_state):
+        """
+        Returns the current and maximum streak count from a value of get_streak_state, the same way as get_streak,
+        e.g. for states read in bulk. The tracker table is only read if the stored streak is out of date.
+        """
+        if streak_state is None:
+            return 0, 0
+
+        (
+            frequency,
+            updated_streak,
+            max_streak,
+            dirty,
+            as_of,
+            last_period,
+            period_count,
+            previous_run,
+        ) = streak_state
+        times, period = parse_frequency(frequency)
+        today = today_ordinal(period)
+        if dirty == 0 and period_count is not None:
+            state = (last_period, period_count, previous_run, max_streak)
+            return self.current_streak(state, today, times), max_streak
+        if dirty == 0 and as_of == today:
+            return updated_streak, max_streak
+
+        ordinal_log = count_completions(self.db, habit_name, period)
+        return ordinal_streak_count(ordinal_log, today, times)
+
+    def increment_streak(self, habit_name, streak_state, activity_ordinals, status):
+        """
+        Updates the stored streak for one new activity in constant time.
+        streak_state is the value of get_streak_state read before the activity was inserted,
+        activity_ordinals the date_ordinals of its date, as returned by db.insert_tracker.
+
+        Returns:
+            bool: False if the streak could not be updated incrementally, e.g. for a backdated activity,
+                  and needs a full recompute by update_streak.
+        """
+        if streak_state is None:
+            return False
+        frequency, _, max_streak, dirty, _, last_period, period_count, previous_run = (
+            streak_state
+        )
+        if dirty != 0 or period_count is None:
+            return False
 
-        update_myhabit(self.db, habit_name, "current_streak", updated_streak)
-        update_myhabit(self.db, habit_name, "max_streak", max_streak)
+        times, period = parse_frequency(frequency)
+        today = today_ordinal(period)
+        state = (last_period, period_count, previous_run, max_streak)
+        if status in ("Done!", "Skip."):
+            new_period = activity_ordinals[ORDINAL_INDEX[period]]
+            state = self.advance_streak(state, new_period, times)
+            if state is None or state[0] > today:
+                return False
+
+        return store_streak(
+            self.db,
+            habit_name,
+            self.current_streak(state, today, times),
+            state[3],
+            today,
+            dirty + 1,
+            *state[:3],
+        )
 
     def checkoff(self, habit_name, date, status):
         """
         Calls the function from db module to insert a new activity into the tracker table.
-        Then, calls the function in Habit_Tracker class to update the new current and max streak count in the habit table.
+        Then, updates the current and max streak count in the habit table: in constant time for an activity in the latest period,
+        or by recomputing the whole history for a backdated activity.
+        """
+        streak_state = get_streak_state(self.db, habit_name)
+        ordinals = insert_tracker(self.db, habit_name, date, status)
+        if not self.increment_streak(habit_name, streak_state, ordinals, status):
+            self.update_streak(habit_name)
+        bump_generation(self.db)
+
+    def checkoff_many(self, records):
         """
-        insert_tracker(self.db, habit_name, date, status)
-        self.update_streak(habit_name)
+        Inserts many activities into the tracker table in one transaction, e.g. for backfilling exported data.
+        Then, recomputes the streak once per affected habit.
+
+        Args:
+            records: an iterable of tuple(habit_name, date, status). It is consumed lazily, so it can be a generator.
+        Returns:
+            int: the number of inserted activities.
+        Raises:
+            ValueError: a habit name is not found, or a status is not one of STATUS_LABELS.
+                Nothing is inserted in that case.
+        """
+        habit_ids = get_habit_ids(self.db)
+        affected_habits = set()
+
+        def tracker_rows():
+            for habit_name, activity_date, status in records:
+                habit_id = habit_ids.get(habit_name)
+                if habit_id is None:
+                    raise ValueError(f"Habit not found: {habit_name}")
+                if status not in STATUS_LABELS:
+                    raise ValueError(
+                        f"Unknown status {status!r}, must be one of {STATUS_LABELS}"
+                    )
+                affected_habits.add(habit_name)
+                yield habit_id, activity_date, status
+
+        count = insert_tracker_many(self.db, tracker_rows())
+        bump_generation(self.db)
+        for habit_name in sorted(affected_habits):
+            self.update_streak(habit_name)
+        return count
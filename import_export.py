@@ -0,0 +1,121 @@
+import argparse
+import csv
+import json
+import sys
+
+from db import create_tables, insert_myhabit_many, iter_myhabit, iter_tracker
+from habit_tracker import Habit_Tracker
+from query_cache import bump_generation
+
+FIELDS = {
+    "myhabit": ("habit_name", "description", "frequency", "start_date"),
+    "tracker": ("habit_name", "date", "status"),
+}
+FORMATS = ("csv", "jsonl")
+
+
+def read_records(source, fmt, fields):
+    """
+    Yields one tuple of the fields per CSV row or JSON line, without reading the whole file.
+    """
+    if fmt == "csv":
+        for row in csv.DictReader(source):
+            yield tuple(row[field] for field in fields)
+    elif fmt == "jsonl":
+        for line in source:
+            if line.strip():
+                record = json.loads(line)
+                yield tuple(record[field] for field in fields)
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+
+def write_records(out, fmt, fields, rows):
+    """
+    Writes the rows as CSV with a header line, or as one JSON object per line.
+
+    Returns:
+        int: the number of written rows.
+    """
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif fmt == "jsonl":
+        for row in rows:
+            out.write(json.dumps(dict(zip(fields, row))) + "\n")
+            count += 1
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+    return count
+
+
+def export_table(db, table, out, fmt):
+    """
+    Streams the habits (myhabit) or the activities (tracker) of the database to out.
+    Activities refer to habits by name, so they can be imported into another database.
+    """
+    rows = iter_myhabit(db) if table == "myhabit" else iter_tracker(db)
+    return write_records(out, fmt, FIELDS[table], rows)
+
+
+def import_table(db, table, source, fmt):
+    """
+    Streams habits or activities from source into the database.
+    Habits that already exist are skipped. Activities are inserted with Habit_Tracker.checkoff_many,
+    so all of them are inserted in one transaction, or none if a habit is missing or a status is unknown.
+
+    Returns:
+        int: the number of inserted rows.
+    """
+    records = read_records(source, fmt, FIELDS[table])
+    if table == "myhabit":
+        count = insert_myhabit_many(db, records)
+        bump_generation(db)
+        return count
+    return Habit_Tracker(db).checkoff_many(records)
+
+
+def guess_format(path):
+    for fmt in FORMATS:
+        if path.endswith("." + fmt):
+            return fmt
+    return "csv"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Import or export habits and activity logs as CSV or JSONL."
+    )
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("table", choices=tuple(FIELDS))
+    parser.add_argument("file", help='data file, or "-" for stdin/stdout')
+    parser.add_argument("--db", default="habit_tracker.db")
+    parser.add_argument(
+        "--format", choices=FORMATS, help="default: guessed from the file extension"
+    )
+    args = parser.parse_args(argv)
+    fmt = args.format or guess_format(args.file)
+
+    create_tables(args.db)
+    if args.action == "export":
+        if args.file == "-":
+            count = export_table(args.db, args.table, sys.stdout, fmt)
+        else:
+            with open(args.file, "w", newline="", encoding="utf-8") as out:
+                count = export_table(args.db, args.table, out, fmt)
+        print(f"Exported {count} {args.table} rows.", file=sys.stderr)
+    else:
+        if args.file == "-":
+            count = import_table(args.db, args.table, sys.stdin, fmt)
+        else:
+            with open(args.file, newline="", encoding="utf-8") as source:
+                count = import_table(args.db, args.table, source, fmt)
+        print(f"Imported {count} {args.table} rows.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
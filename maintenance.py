@@ -0,0 +1,167 @@
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+from db import (
+    check_rollup,
+    completion_counts_by_habit_id,
+    create_tables,
+    date_ordinals,
+    get_cursor,
+    process_pool,
+    rebuild_rollup,
+    store_streaks_many,
+)
+from habit_tracker import ordinal_streak_count, ordinal_streak_state, parse_frequency
+from query_cache import bump_generation
+
+
+def partition_habits(db, partitions):
+    """
+    Splits the habit ids into at most the given number of contiguous ranges of about the same number of habits.
+
+    Returns:
+        list: a list of tuple(first_id, last_id).
+    """
+    with get_cursor(db) as cur:
+        cur.execute("SELECT habit_id FROM myhabit ORDER BY habit_id")
+        habit_ids = [row[0] for row in cur.fetchall()]
+    if not habit_ids:
+        return []
+    size = -(-len(habit_ids) // max(1, partitions))
+    return [
+        (habit_ids[i], habit_ids[min(i + size, len(habit_ids)) - 1])
+        for i in range(0, len(habit_ids), size)
+    ]
+
+
+def recompute_partition(db, first_id, last_id, today):
+    """
+    Computes the streaks of the habits with an id from first_id to last_id, like Habit_Tracker.update_streak does
+    for one habit, from a single read of tracker_rollup. Nothing is written.
+
+    Returns:
+        list: rows for store_streaks_many.
+    """
+    _, day_ord, week_ord, month_ord = date_ordinals(today.isoformat())
+    today_ordinals = {"day": day_ord, "week": week_ord, "month": month_ord}
+    frequencies = {}
+    rows = []
+    for habit_id, frequency, habit_log in completion_counts_by_habit_id(
+        db, first_id, last_id
+    ):
+        if frequency not in frequencies:
+            frequencies[frequency] = parse_frequency(frequency)
+        times, period = frequencies[frequency]
+        updated_streak, max_streak = ordinal_streak_count(
+            habit_log, today_ordinals[period], times
+        )
+        last_period, period_count, previous_run = ordinal_streak_state(habit_log, times)
+        if last_period is not None and last_period > today_ordinals[period]:
+            period_count = None
+        rows.append(
+            (
+                habit_id,
+                updated_streak,
+                max_streak,
+                today_ordinals[period],
+                last_period,
+                period_count,
+                previous_run,
+            )
+        )
+    return rows
+
+
+def recompute_all_streaks(db, workers=None, partitions=None, today=None):
+    """
+    Recomputes the streaks of every habit and saves them in one transaction.
+    The habits are split into partitions by id, and each partition is read and computed by a worker process.
+    The database stays locked for other writers meanwhile, so no activity is logged between reading and saving.
+
+    Args:
+        workers: number of worker processes, os.cpu_count() by default. With 1, everything runs in this process.
+                 Workers open the database file on their own, so an in-memory database needs workers=1.
+        partitions: number of habit ranges, 4 per worker by default, so that a slow range does not hold up the rest.
+        today: the date the streaks are computed for, date.today() by default.
+    Returns:
+        int: the number of habits saved.
+    """
+    workers = workers or os.cpu_count() or 1
+    partitions = partitions or workers * 4
+    today = today or date.today()
+
+    with get_cursor(db) as cur:
+        cur.execute("BEGIN IMMEDIATE")
+        ranges = partition_habits(db, partitions)
+        firsts = [first_id for first_id, _ in ranges]
+        lasts = [last_id for _, last_id in ranges]
+        args = ([db] * len(ranges), firsts, lasts, [today] * len(ranges))
+        if workers == 1 or len(ranges) <= 1:
+            results = list(map(recompute_partition, *args))
+        else:
+            with process_pool(workers) as executor:
+                results = list(executor.map(recompute_partition, *args))
+        count = store_streaks_many(db, (row for rows in results for row in rows))
+    bump_generation(db)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Maintenance commands for a habit tracker database."
+    )
+    parser.add_argument(
+        "command",
+        choices=("check-rollup", "rebuild-rollup", "recompute-streaks"),
+        help="check-rollup: compare tracker_rollup with the tracker table, "
+        "rebuild-rollup: recompute tracker_rollup from the tracker table, "
+        "recompute-streaks: recompute the streaks of all habits",
+    )
+    parser.add_argument("--db", default="habit_tracker.db")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes for recompute-streaks, the number of CPUs by default",
+    )
+    args = parser.parse_args(argv)
+
+    create_tables(args.db)
+    if args.command == "recompute-streaks":
+        start = time.perf_counter()
+        count = recompute_all_streaks(args.db, workers=args.workers)
+        seconds = time.perf_counter() - start
+        print(
+            f"Recomputed the streaks of {count} habits in {seconds:.2f} s "
+            f"({count / seconds if seconds else 0:,.0f} habits/s).",
+            file=sys.stderr,
+        )
+        return 0
+    if args.command == "rebuild-rollup":
+        count = rebuild_rollup(args.db)
+        bump_generation(args.db)
+        print(f"Rebuilt {count} rollup rows.", file=sys.stderr)
+        return 0
+
+    mismatches = check_rollup(args.db)
+    for problem, habit_id, period_kind, ordinal, *counts in mismatches:
+        done, skip, missed = counts
+        print(
+            f"{problem:<10} habit {habit_id} {period_kind} {ordinal}: "
+            f"done={done} skip={skip} missed={missed}"
+        )
+    if mismatches:
+        print(
+            f"{len(mismatches)} rollup rows differ from the tracker table.",
+            file=sys.stderr,
+        )
+        return 1
+    print("tracker_rollup is consistent.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
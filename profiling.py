@@ -0,0 +1,329 @@
+import contextvars
+import functools
+import inspect
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# The Profile of the running request, None while nothing is recorded.
+# Context variables are per thread, so concurrent Streamlit sessions and API requests are recorded apart.
+_active = contextvars.ContextVar("habit_tracker_profile", default=None)
+
+SQL_PREVIEW_LENGTH = 80
+
+
+class Profile:
+    """
+    Collects the calls of instrumented functions and the queries run through db.get_cursor while it is active.
+
+    Attributes:
+        calls: dict of function name to [call count, seconds]. The time of a call includes the calls it makes.
+        queries: dict of SQL text (whitespace collapsed) to [executions, rows, seconds].
+                 Rows are the fetched rows of a SELECT, or the changed rows of other statements.
+    """
+
+    def __init__(self):
+        self.calls = defaultdict(lambda: [0, 0.0])
+        self.queries = defaultdict(lambda: [0, 0, 0.0])
+        self.started = time.perf_counter()
+        self.seconds = None
+
+    def record_call(self, name, seconds):
+        entry = self.calls[name]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def record_query(self, sql, rows, seconds, executions=1):
+        entry = self.queries[sql]
+        entry[0] += executions
+        entry[1] += rows
+        entry[2] += seconds
+
+    def merge(self, other):
+        """
+        Adds the counts of another Profile, e.g. to total several requests.
+        """
+        for name, (count, seconds) in other.calls.items():
+            self.calls[name][0] += count
+            self.calls[name][1] += seconds
+        for sql, (executions, rows, seconds) in other.queries.items():
+            self.record_query(sql, rows, seconds, executions)
+
+    def summary(self, limit=20):
+        """
+        Returns a text report of the slowest functions and queries.
+        """
+        query_count = sum(entry[0] for entry in self.queries.values())
+        query_seconds = sum(entry[2] for entry in self.queries.values())
+        lines = [
+            f"{query_count} queries in {query_seconds * 1000:.1f} ms"
+            + (f", {self.seconds * 1000:.1f} ms in total" if self.seconds else ""),
+            "",
+            f"{'calls':>7} {'total ms':>10}  function",
+        ]
+        for name, (count, seconds) in sorted(
+            self.calls.items(), key=lambda item: -item[1][1]
+        )[:limit]:
+            lines.append(f"{count:>7} {seconds * 1000:>10.2f}  {name}")
+        lines += ["", f"{'runs':>7} {'rows':>8} {'total ms':>10}  query"]
+        for sql, (executions, rows, seconds) in sorted(
+            self.queries.items(), key=lambda item: -item[1][2]
+        )[:limit]:
+            preview = (
+                sql
+                if len(sql) <= SQL_PREVIEW_LENGTH
+                else sql[:SQL_PREVIEW_LENGTH] + "..."
+            )
+            lines.append(
+                f"{executions:>7} {rows:>8} {seconds * 1000:>10.2f}  {preview}"
+            )
+        return "\n".join(lines)
+
+    def prometheus(self, prefix="habit_tracker"):
+        """
+        Returns the counts in the Prometheus text exposition format.
+        """
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for label, value in samples:
+                lines.append(f"{prefix}_{name}{{{label}}} {value}")
+
+        calls = sorted(self.calls.items())
+        queries = sorted(self.queries.items())
+        family(
+            "calls_total",
+            "counter",
+            "Calls of instrumented functions.",
+            [(f'function="{escape(name)}"', entry[0]) for name, entry in calls],
+        )
+        family(
+            "call_seconds_total",
+            "counter",
+            "Wall time spent in instrumented functions.",
+            [
+                (f'function="{escape(name)}"', f"{entry[1]:.6f}")
+                for name, entry in calls
+            ],
+        )
+        family(
+            "query_executions_total",
+            "counter",
+            "Executions of each SQL statement.",
+            [(f'query="{escape(sql)}"', entry[0]) for sql, entry in queries],
+        )
+        family(
+            "query_rows_total",
+            "counter",
+            "Rows fetched or changed by each SQL statement.",
+            [(f'query="{escape(sql)}"', entry[1]) for sql, entry in queries],
+        )
+        family(
+            "query_seconds_total",
+            "counter",
+            "Wall time spent executing and fetching each SQL statement.",
+            [(f'query="{escape(sql)}"', f"{entry[2]:.6f}") for sql, entry in queries],
+        )
+        return "\n".join(lines) + "\n"
+
+
+def escape(label_value):
+    return label_value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def active_profile():
+    return _active.get()
+
+
+def start(enabled=True):
+    """
+    Starts recording on the current thread. With enabled=False, recording is switched off instead,
+    which also ends a recording left over by a run that was interrupted before stop.
+
+    Returns:
+        tuple: (Profile or None, token for stop).
+    """
+    profile = Profile() if enabled else None
+    return profile, _active.set(profile)
+
+
+def stop(token):
+    """
+    Stops the recording started by start() and returns its Profile.
+    """
+    profile = _active.get()
+    _active.reset(token)
+    if profile is not None:
+        profile.seconds = time.perf_counter() - profile.started
+    return profile
+
+
+@contextmanager
+def record():
+    """
+    Records the instrumented calls and the queries of the block, e.g. one request:
+
+        with profiling.record() as profile:
+            Analysis(db).rank_all()
+        print(profile.summary())
+    """
+    profile, token = start()
+    try:
+        yield profile
+    finally:
+        stop(token)
+
+
+def profiled(func, name=None):
+    """
+    Wraps func so that its calls are counted and timed while a Profile is active.
+    Without one, the cost is a single context variable lookup per call.
+    """
+    name = name or f"{func.__module__}.{func.__qualname__}"
+
+    if inspect.isgeneratorfunction(func):
+
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            profile = _active.get()
+            if profile is None:
+                return (yield from func(*args, **kwargs))
+            # only the time spent producing items is counted, not the time the consumer holds them
+            generator = func(*args, **kwargs)
+            seconds = 0.0
+            try:
+                while True:
+                    start_time = time.perf_counter()
+                    try:
+                        item = next(generator)
+                    except StopIteration as stop_iteration:
+                        return stop_iteration.value
+                    finally:
+                        seconds += time.perf_counter() - start_time
+                    yield item
+            finally:
+                generator.close()
+                profile.record_call(name, seconds)
+
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _active.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        start_time = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.record_call(name, time.perf_counter() - start_time)
+
+    return wrapper
+
+
+def profiled_methods(cls):
+    """
+    Class decorator applying profiled to every public method, recorded as "ClassName.method".
+    """
+    for attr_name, attr in list(vars(cls).items()):
+        if inspect.isfunction(attr) and not attr_name.startswith("_"):
+            setattr(cls, attr_name, profiled(attr, f"{cls.__name__}.{attr_name}"))
+    return cls
+
+
+def profile_functions(namespace, exclude=()):
+    """
+    Applies profiled to the functions of a module that take the database as first parameter,
+    i.e. the ones running queries. Call it at the end of the module with globals().
+    """
+    module_name = namespace["__name__"]
+    for attr_name, attr in list(namespace.items()):
+        if (
+            inspect.isfunction(attr)
+            and attr.__module__ == module_name
+            and attr_name not in exclude
+            and list(inspect.signature(attr).parameters)[:1] == ["db"]
+        ):
+            namespace[attr_name] = profiled(attr, f"{module_name}.{attr_name}")
+
+
+class ProfiledCursor:
+    """
+    Cursor proxy used by db.get_cursor while a Profile is active.
+    It times execute and executemany, and counts the rows fetched afterwards against the same statement.
+    """
+
+    def __init__(self, cursor, profile):
+        self._cursor = cursor
+        self._profile = profile
+        self._sql = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _run(self, method, sql, parameters):
+        self._sql = " ".join(sql.split())
+        start_time = time.perf_counter()
+        try:
+            method(sql, parameters)
+        finally:
+            self._profile.record_query(
+                self._sql,
+                max(self._cursor.rowcount, 0),
+                time.perf_counter() - start_time,
+                executions=0,
+            )
+        return self
+
+    def execute(self, sql, parameters=()):
+        self._profile.record_query(" ".join(sql.split()), 0, 0.0)
+        return self._run(self._cursor.execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        executions = [0]
+
+        def counted():
+            # the parameters may be a generator consumed lazily by sqlite3, so they are counted on the way
+            for parameters in seq_of_parameters:
+                executions[0] += 1
+                yield parameters
+
+        try:
+            return self._run(self._cursor.executemany, sql, counted())
+        finally:
+            self._profile.record_query(" ".join(sql.split()), 0, 0.0, executions[0])
+
+    def _fetched(self, rows, start_time):
+        if self._sql is not None:
+            self._profile.record_query(
+                self._sql, rows, time.perf_counter() - start_time, executions=0
+            )
+
+    def fetchone(self):
+        start_time = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(0 if row is None else 1, start_time)
+        return row
+
+    def fetchmany(self, size=None):
+        start_time = time.perf_counter()
+        rows = self._cursor.fetchmany(self._cursor.arraysize if size is None else size)
+        self._fetched(len(rows), start_time)
+        return rows
+
+    def fetchall(self):
+        start_time = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(len(rows), start_time)
+        return rows
+
+    def __iter__(self):
+        while True:
+            start_time = time.perf_counter()
+            row = self._cursor.fetchone()
+            self._fetched(0 if row is None else 1, start_time)
+            if row is None:
+                return
+            yield row
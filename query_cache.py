@@ -0,0 +1,94 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from db import database_key
+
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+def generation(db):
+    """
+    Returns the write generation of the database. It grows every time bump_generation is called.
+    """
+    return _generations.get(database_key(db), 0)
+
+
+def bump_generation(db):
+    """
+    Marks every cached result of the database as outdated. Called after each write by Habit_Tracker.
+    """
+    key = database_key(db)
+    with _generations_lock:
+        _generations[key] = _generations.get(key, 0) + 1
+
+
+class QueryCache:
+    """
+    LRU cache of query results keyed by database file, method name and arguments.
+    An entry is used until it is older than ttl seconds or the database generation changed.
+    """
+
+    def __init__(self, max_entries=256, ttl=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, db, name, args, compute):
+        """
+        Returns the cached result for (db, name, args), or calls compute() and caches its result.
+        """
+        key = (database_key(db), name, args)
+        current_generation = generation(db)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, expires_at, value = entry
+                if entry_generation == current_generation and expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (current_generation, now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def cached(method):
+    """
+    Caches the result of an Analysis method in self.cache, if the object has a cache.
+    Results are shared, so callers must not modify them.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.cache is None:
+            return method(self, *args, **kwargs)
+        return self.cache.get_or_compute(
+            self.db,
+            method.__name__,
+            (args, tuple(sorted(kwargs.items()))),
+            lambda: method(self, *args, **kwargs),
+        )
+
+    return wrapper
@@ -0,0 +1,168 @@
+from array import array
+from collections.abc import Sequence
+from datetime import timedelta
+from enum import IntEnum
+
+from db import EPOCH, STATUS_LABELS
+
+
+class Status(IntEnum):
+    """
+    Status of a tracker record as a small integer. label is the text stored in the tracker table.
+    """
+
+    DONE = 0
+    SKIP = 1
+    MISSED = 2
+
+    @property
+    def label(self):
+        return STATUS_LABELS[self]
+
+    @classmethod
+    def from_label(cls, label):
+        return cls(status_code(label))
+
+
+_STATUS_CODES = {label: code for code, label in enumerate(STATUS_LABELS)}
+
+
+def status_code(label):
+    """
+    Returns the integer code of a status label.
+
+    Raises:
+        ValueError: the label is not one of STATUS_LABELS, e.g. a tracker row written with an invalid status.
+    """
+    try:
+        return _STATUS_CODES[label]
+    except KeyError:
+        raise ValueError(
+            f"Unknown status {label!r}, must be one of {STATUS_LABELS}"
+        ) from None
+
+
+def minute_text(minute_epoch):
+    """
+    Formats minutes since 1970-01-01 00:00 as a tracker date, "YYYY-MM-DD HH:MM".
+    """
+    day_ord, minute = divmod(minute_epoch, 1440)
+    return f"{EPOCH + timedelta(day_ord)} {minute // 60:02}:{minute % 60:02}"
+
+
+class LogEntry:
+    """
+    One tracker record: the minute_epoch column of the tracker table and a Status.
+    Unpacks like the (date, status) rows of Analysis.habit_log_from_tracker.
+    A status outside STATUS_LABELS, e.g. written by plain SQL, has status None and keeps its text (or None) as label.
+    """
+
+    __slots__ = ("label", "minute_epoch", "status")
+
+    def __init__(self, minute_epoch, status, label=None):
+        self.minute_epoch = minute_epoch
+        self.status = None if status is None else Status(status)
+        self.label = label if self.status is None else self.status.label
+
+    @property
+    def date(self):
+        return minute_text(self.minute_epoch)
+
+    @property
+    def day_ord(self):
+        return self.minute_epoch // 1440
+
+    def __iter__(self):
+        return iter((self.date, self.label))
+
+    def __eq__(self, other):
+        if isinstance(other, LogEntry):
+            return (self.minute_epoch, self.label) == (other.minute_epoch, other.label)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.minute_epoch, self.label))
+
+    def __repr__(self):
+        return f"LogEntry({self.date!r}, {self.label!r})"
+
+
+class HabitLog(Sequence):
+    """
+    The tracker records of a habit, stored column by column in two arrays instead of one tuple of strings per record:
+    8 bytes for minute_epoch and 1 byte for the status code per record.
+    The status code is the index of the status in labels: STATUS_LABELS, followed by any other status found
+    in the records, like db.period_log_columns. A NULL status has the code -1.
+    Items are created on access as LogEntry objects.
+    """
+
+    __slots__ = ("labels", "minutes", "statuses")
+
+    def __init__(self, minutes=None, statuses=None, labels=STATUS_LABELS):
+        self.minutes = minutes if minutes is not None else array("q")
+        self.statuses = statuses if statuses is not None else array("b")
+        self.labels = labels
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Builds the log from an iterable of tuple(minute_epoch, status label), consumed lazily.
+        """
+        log = cls()
+        append_minute, append_status = log.minutes.append, log.statuses.append
+        codes = {None: -1, **_STATUS_CODES}
+        for minute_epoch, label in rows:
+            code = codes.get(label)
+            if code is None:
+                # a status outside STATUS_LABELS gets the next code, so that no record is changed
+                code = codes[label] = len(codes) - 1
+            append_minute(minute_epoch)
+            append_status(code)
+        if len(codes) > len(STATUS_LABELS) + 1:
+            log.labels = tuple(label for label in codes if label is not None)
+        return log
+
+    def __len__(self):
+        return len(self.minutes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return HabitLog(self.minutes[index], self.statuses[index], self.labels)
+        return self._entry(self.minutes[index], self.statuses[index])
+
+    def __iter__(self):
+        for minute_epoch, status in zip(self.minutes, self.statuses):
+            yield self._entry(minute_epoch, status)
+
+    def _entry(self, minute_epoch, status):
+        if 0 <= status < len(STATUS_LABELS):
+            return LogEntry(minute_epoch, status)
+        return LogEntry(minute_epoch, None, self._label(status))
+
+    def _label(self, status):
+        return self.labels[status] if status >= 0 else None
+
+    def __repr__(self):
+        return f"HabitLog({len(self)} records)"
+
+    def rows(self):
+        """
+        Returns the records as a list of tuple(date, status label), like Analysis.habit_log_from_tracker.
+        """
+        return [
+            (minute_text(minute_epoch), self._label(status))
+            for minute_epoch, status in zip(self.minutes, self.statuses)
+        ]
+
+    def status_count(self, status):
+        """
+        Returns the number of records with the status (a Status or its label).
+        """
+        if status is None:
+            status = -1
+        elif isinstance(status, str):
+            if status in self.labels:
+                status = self.labels.index(status)
+            else:
+                status = status_code(status)
+        return self.statuses.tolist().count(status)
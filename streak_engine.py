@@ -0,0 +1,105 @@
+from datetime import date
+
+import numpy as np
+
+from db import EPOCH, period_label
+
+COMPLETION_MARK = ("Done!", "Skip.")
+MONTHS_BEFORE_EPOCH = EPOCH.year * 12
+
+
+def log_arrays(date_status):
+    """
+    Converts tracker rows into arrays.
+
+    Args:
+        date_status: rows of (date, status), e.g. from get_data_from_tracker(db, "date, status", habit_name).
+    Returns:
+        tuple: (dates as datetime64[m] array, boolean array that is True for done and skip).
+    """
+    if not date_status:
+        return np.empty(0, dtype="datetime64[m]"), np.empty(0, dtype=bool)
+    dates, statuses = zip(*date_status)
+    dates = np.array(dates, dtype="datetime64[m]")
+    completed = np.isin(np.array(statuses, dtype=object), COMPLETION_MARK)
+    return dates, completed
+
+
+def period_ordinals(dates, period):
+    """
+    Buckets datetime64 values into day, ISO week (starting on Monday) or month ordinals.
+    """
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    if period == "day":
+        return days
+    elif period == "week":
+        return (days + 3) // 7
+    elif period == "month":
+        return dates.astype("datetime64[M]").astype(np.int64) + MONTHS_BEFORE_EPOCH
+
+
+def today_ordinal(period, today=None):
+    today = today if today is not None else date.today()
+    return int(period_ordinals(np.array([today], dtype="datetime64[D]"), period)[0])
+
+
+def completion_counts(dates, completed, period):
+    """
+    Counts done and skip records per period.
+
+    Returns:
+        tuple: (sorted ordinals of the periods with at least one completion, completions per period).
+    """
+    ordinals = period_ordinals(dates[completed], period)
+    if ordinals.size == 0:
+        return ordinals, ordinals
+    first = ordinals.min()
+    counts = np.bincount(ordinals - first)
+    present = np.flatnonzero(counts)
+    return present + first, counts[present]
+
+
+def completion_count(dates, completed, period):
+    """
+    Same result as Habit_Tracker.completion_count: a sorted list of (period key, completions).
+    """
+    ordinals, counts = completion_counts(dates, completed, period)
+    return [
+        (period_label(ordinal, period), int(count))
+        for ordinal, count in zip(ordinals.tolist(), counts.tolist())
+    ]
+
+
+def streak_count(dates, completed, period, times, today=None):
+    """
+    Calculates the current and maximum streak like Habit_Tracker.streak_count,
+    from the first period with a completion up to the period of today.
+    """
+    ordinals, counts = completion_counts(dates, completed, period)
+    return streak_from_counts(ordinals, counts, period, times, today)
+
+
+def streak_from_counts(ordinals, counts, period, times, today=None):
+    """
+    Calculates the current and maximum streak from sorted period ordinals and their completion counts.
+    """
+    if len(ordinals) == 0:
+        return 0, 0
+
+    ordinals = np.asarray(ordinals)
+    counts = np.asarray(counts)
+    first = ordinals[0]
+    length = today_ordinal(period, today) - first + 1
+    if length <= 0:
+        return 0, 0
+
+    in_range = ordinals - first < length
+    success = np.zeros(length, dtype=np.int8)
+    success[(ordinals - first)[in_range]] = counts[in_range] >= times
+
+    edges = np.diff(np.concatenate(([0], success, [0])))
+    run_lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    if run_lengths.size == 0:
+        return 0, 0
+    current_streak = int(run_lengths[-1]) if success[-1] else 0
+    return current_streak, int(run_lengths.max())
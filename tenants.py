@@ -0,0 +1,146 @@
+import glob
+import hashlib
+import os
+import re
+import threading
+
+from analysis import Analysis
+from db import (
+    PoolGroup,
+    configure_storage,
+    create_tables,
+    database_key,
+    get_cursor,
+    get_pool,
+    process_pool,
+)
+from habit_tracker import Habit_Tracker
+
+SAFE_USER_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class TenantRouter:
+    """
+    Maps every user to an own SQLite file ("shard") under root.
+    A shard is created with the latest schema the first time the user is routed,
+    and at most max_open shards keep pooled connections: the least recently used one is closed beyond that.
+    The limit is kept by a db.PoolGroup, so it also counts a shard used through a Habit_Tracker or Analysis
+    created before its pool was closed, which opens the pool again with the router's profile.
+    """
+
+    def __init__(self, root="tenants", max_open=32, profile="wal"):
+        self.root = root
+        self.max_open = max_open
+        self.profile = profile
+        self._pools = PoolGroup(max_open)
+        self._paths = {}
+        self._lock = threading.Lock()
+
+    def shard_path(self, user_id):
+        """
+        Returns the file of the user. Simple ids are used as file names, others are hashed.
+        """
+        user_id = str(user_id)
+        if SAFE_USER_ID.fullmatch(user_id):
+            name = f"user-{user_id}"
+        else:
+            name = "hash-" + hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.root, name + ".db")
+
+    def database(self, user_id):
+        """
+        Returns the shard file of the user, ready to be passed to Habit_Tracker, Analysis or the db functions.
+        """
+        path = self.shard_path(user_id)
+        key = database_key(path)
+        with self._lock:
+            routed = key in self._paths
+        if routed:
+            # counts as a use, and opens the pool again if it was closed
+            get_pool(path)
+            return path
+
+        os.makedirs(self.root, exist_ok=True)
+        self._pools.add(path)
+        configure_storage(path, self.profile)
+        create_tables(path)
+        with self._lock:
+            self._paths[key] = path
+        return path
+
+    def tracker(self, user_id):
+        return Habit_Tracker(self.database(user_id))
+
+    def analysis(self, user_id, cache=None):
+        return Analysis(self.database(user_id), cache=cache)
+
+    def open_shards(self):
+        """
+        Returns the shards with pooled connections, least recently used first.
+        """
+        with self._lock:
+            return [self._paths.get(key, key) for key in self._pools.open_databases()]
+
+    def shards(self):
+        """
+        Returns every shard file under root, including the ones that are not open.
+        """
+        return sorted(glob.glob(os.path.join(self.root, "*.db")))
+
+    def fan_out(self, func, max_workers=None):
+        """
+        Calls func(shard) for every shard on a process pool, e.g. for admin-wide reports.
+        func must be a module-level function so that it can be sent to the worker processes.
+
+        Returns:
+            dict: the result of func for each shard file.
+        """
+        shards = self.shards()
+        if not shards:
+            return {}
+        with process_pool(max_workers) as executor:
+            return dict(zip(shards, executor.map(func, shards)))
+
+    def close(self):
+        with self._lock:
+            self._paths.clear()
+        self._pools.close()
+
+
+def shard_summary(db):
+    """
+    Summarizes one shard for the admin report: number of habits and activities,
+    average success rate and the longest streak over all habits.
+    """
+    create_tables(db)
+    rows, _ = Analysis(db).rank_all()
+    with get_cursor(db) as cur:
+        cur.execute("SELECT COUNT(*) FROM tracker")
+        activities = cur.fetchone()[0]
+    return {
+        "habits": len(rows),
+        "activities": activities,
+        "average_success_rate": (
+            round(sum(row[1] for row in rows) / len(rows), 4) if rows else 0
+        ),
+        "longest_streak": max((row[3] for row in rows), default=0),
+    }
+
+
+def admin_report(router, max_workers=None):
+    """
+    Summarizes all shards of the router in parallel and adds the totals.
+
+    Returns:
+        tuple: (dict of shard_summary per shard file, dict of totals).
+    """
+    summaries = router.fan_out(shard_summary, max_workers)
+    totals = {
+        "shards": len(summaries),
+        "habits": sum(summary["habits"] for summary in summaries.values()),
+        "activities": sum(summary["activities"] for summary in summaries.values()),
+        "longest_streak": max(
+            (summary["longest_streak"] for summary in summaries.values()), default=0
+        ),
+    }
+    return summaries, totals
@@ -1,6 +1,10 @@
-from datetime import date
+from datetime import date, datetime, timedelta
+import random
+import pandas as pd
 import analysis
 from analysis import Analysis
+from db import create_tables, insert_tracker, close_pool
+from habit_tracker import Habit_Tracker, parse_frequency
 import pytest
 
 
@@ -222,3 +226,182 @@ def test_calculate_successrate_wrongdate(sut, monkeypatch):
 
     result = sut.calculate_successrate("Cooking")
     assert result == 0
+
+
+def test_rank_all_matches_per_habit_analysis(tmp_path):
+    db_path = tmp_path / "rank.db"
+    create_tables(db_path)
+    tracker = Habit_Tracker(db_path)
+    rng = random.Random(3)
+    now = datetime.now()
+    for i, frequency in enumerate(
+        ["1 time(s) per day", "2 time(s) per week", "3 time(s) per month"] * 3
+    ):
+        start = now - timedelta(days=rng.randint(0, 400))
+        tracker.add_habit(f"Habit {i}", "", frequency, start.strftime("%Y-%m-%d %H:%M"))
+        for _ in range(rng.randint(0, 80)):
+            moment = start + (now - start) * rng.random()
+            insert_tracker(
+                db_path,
+                f"Habit {i}",
+                moment.strftime("%Y-%m-%d %H:%M"),
+                rng.choice(["Done!", "Skip.", "Missed."]),
+            )
+    sut = Analysis(db_path)
+
+    for period in [None, "day", "week", "month"]:
+        rows, columns = sut.rank_all(period)
+        expected = []
+        for habit_name in sut.habit_list_by_frequency(period or ""):
+            times, habit_period = parse_frequency(
+                sut.get_habit_data("frequency", habit_name)[0]
+            )
+            habit_log = tracker.completion_count(habit_name, habit_period)
+            expected.append(
+                (
+                    habit_name,
+                    sut.calculate_successrate(habit_name),
+                    *tracker.streak_count(habit_log, habit_period, times),
+                )
+            )
+
+        assert sorted(rows) == sorted(expected)
+        assert [row[1] for row in rows] == sorted(
+            (row[1] for row in rows), reverse=True
+        )
+        assert columns == [
+            "habit_name",
+            "success_rate",
+            "current_streak",
+            "longest_streak",
+        ]
+
+    close_pool(db_path)
+
+
+def test_habit_data_frame_matches_habit_data_in_selected_period(tmp_path):
+    db_path = str(tmp_path / "frame.db")
+    create_tables(db_path)
+    tracker = Habit_Tracker(db_path)
+    tracker.add_habit("Reading", "", "1 time(s) per day", "2024-12-01 08:00")
+    tracker.add_habit("Baking", "", "1 time(s) per week", "2024-12-01 08:00")
+    rng = random.Random(3)
+    for _ in range(60):
+        moment = datetime(2024, 12, 20) + timedelta(minutes=rng.randrange(30 * 1440))
+        insert_tracker(
+            db_path,
+            rng.choice(["Reading", "Baking"]),
+            moment.strftime("%Y-%m-%d %H:%M"),
+            rng.choice(["Done!", "Skip.", "Missed."]),
+        )
+
+    sut = Analysis(db_path)
+    for selected_time, weekly in (
+        ("2025-01-03", False),
+        ("2025-01", False),
+        (date(2025, 1, 8), True),
+        (date(2024, 12, 31), True),
+    ):
+        rows, columns = sut.habit_data_in_selected_period(selected_time, weekly)
+        frame = sut.habit_data_frame(selected_time, weekly)
+        assert list(frame.columns) == columns
+        assert str(frame["status"].dtype) == "category"
+        frame["date"] = frame["date"].dt.strftime("%Y-%m-%d %H:%M")
+        assert [
+            tuple(row) for row in frame.astype(object).itertuples(index=False)
+        ] == rows
+
+    assert len(sut.habit_data_frame("2030-01")) == 0
+    close_pool(db_path)
+
+
+def test_habit_data_frame_keeps_unknown_statuses(tmp_path):
+    db_path = str(tmp_path / "frame.db")
+    create_tables(db_path)
+    Habit_Tracker(db_path).add_habit(
+        "Reading", "", "1 time(s) per day", "2024-12-01 08:00"
+    )
+    for day, status in ((3, "Done!"), (4, "done"), (5, None), (6, "Missed.")):
+        insert_tracker(db_path, "Reading", f"2025-01-0{day} 10:00", status)
+
+    sut = Analysis(db_path)
+    rows, _ = sut.habit_data_in_selected_period("2025-01")
+    frame = sut.habit_data_frame("2025-01")
+    frame["date"] = frame["date"].dt.strftime("%Y-%m-%d %H:%M")
+    assert [
+        tuple(None if pd.isna(value) else value for value in row)
+        for row in frame.astype(object).itertuples(index=False)
+    ] == rows
+    assert [row[2] for row in rows] == ["Missed.", None, "done", "Done!"]
+    close_pool(db_path)
+
+
+def test_habit_log_page_walks_the_whole_log(tmp_path):
+    db_path = str(tmp_path / "pages.db")
+    create_tables(db_path)
+    Habit_Tracker(db_path).add_habit("Reading", "", "1 time(s) per day", "2025-01-01")
+    for day in (1, 2, 2, 2, 3, 5, 8, 9):
+        insert_tracker(db_path, "Reading", f"2025-01-0{day} 10:00", "Done!")
+
+    sut = Analysis(db_path)
+    rows, cursor = [], None
+    while True:
+        page, cursor = sut.habit_log_page("Reading", 3, before=cursor)
+        rows.extend(page.rows())
+        if cursor is None:
+            break
+    assert rows == sut.habit_log_records("Reading").rows()
+
+    window, cursor = sut.habit_log_page("Reading", start="2025-01-02", end="2025-01-05")
+    assert [row[0] for row in window.rows()] == ["2025-01-03 10:00"] + [
+        "2025-01-02 10:00"
+    ] * 3
+    assert cursor is None
+    close_pool(db_path)
+
+
+def test_calendar_matches_completion_count(tmp_path):
+    db_path = str(tmp_path / "calendar.db")
+    create_tables(db_path)
+    tracker = Habit_Tracker(db_path)
+    for habit_name in ("Reading", "Baking", "Yoga"):
+        tracker.add_habit(habit_name, "", "1 time(s) per day", "2024-11-01 08:00")
+    rng = random.Random(5)
+    for _ in range(200):
+        moment = datetime(2024, 11, 1) + timedelta(minutes=rng.randrange(120 * 1440))
+        insert_tracker(
+            db_path,
+            rng.choice(["Reading", "Baking"]),
+            moment.strftime("%Y-%m-%d %H:%M"),
+            rng.choice(["Done!", "Skip.", "Missed."]),
+        )
+
+    sut = Analysis(db_path)
+    for period in ("day", "week", "month"):
+        matrix, habit_names, labels = sut.calendar(
+            date(2024, 12, 10), "2025-01-20", period
+        )
+        assert habit_names == ["Baking", "Reading", "Yoga"]
+        assert matrix.shape == (3, len(labels))
+        for row, habit_name in zip(matrix, habit_names):
+            counts = dict(tracker.completion_count(habit_name, period))
+            assert row.tolist() == [counts.get(label, 0) for label in labels]
+    assert labels == ["2024-12", "2025-01"]
+    assert len(sut.calendar("2024-12-10", "2025-01-20")[2]) == 42
+
+    tracker.checkoff("Yoga", "2025-01-20 07:00", "Done!")
+    matrix, _, _ = sut.calendar(date(2024, 12, 10), "2025-01-20", "month")
+    assert matrix[2].tolist() == [0, 1]
+
+    with pytest.raises(ValueError):
+        sut.calendar("2025-01-20", "2025-01-19")
+
+    last = date(2025, 1, 20) + timedelta(analysis.CALENDAR_MAX_PERIODS - 1)
+    assert sut.calendar("2025-01-20", last)[0].shape == (
+        3,
+        analysis.CALENDAR_MAX_PERIODS,
+    )
+    with pytest.raises(ValueError):
+        sut.calendar("2025-01-20", last + timedelta(1))
+    assert len(sut.calendar("1900-01-01", "2025-01-20", "month")[2]) == 1501
+    close_pool(db_path)
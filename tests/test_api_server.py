@@ -0,0 +1,250 @@
+import http.client
+import json
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+from api_server import TrackerService, make_server
+from db import close_pool, configure_storage, create_tables, get_cursor
+import pytest
+
+
+@pytest.fixture
+def service(tmp_path):
+    db = str(tmp_path / "api.db")
+    create_tables(db)
+    service = TrackerService(db)
+    service.handle(
+        "POST",
+        "/habits",
+        {
+            "habit_name": "reading",
+            "description": "Read books",
+            "frequency": "1 time(s) per day",
+            "start_date": "2025-01-01 08:00",
+        },
+    )
+    yield service
+    close_pool(db)
+
+
+def test_checkoff_and_streaks(service):
+    today = date.today()
+    for day in (today - timedelta(1), today):
+        status, payload = service.handle(
+            "POST",
+            "/checkoff",
+            {"habit_name": "Reading", "date": f"{day} 07:00", "status": "Done!"},
+        )
+        assert status == 201
+
+    assert payload == {
+        "habit_name": "Reading",
+        "current_streak": 2,
+        "longest_streak": 2,
+    }
+    assert service.handle("GET", "/streaks?habit=Reading") == (200, payload)
+    assert service.handle("GET", "/habits")[1] == [
+        {
+            "habit_name": "Reading",
+            "description": "Read books",
+            "frequency": "1 time(s) per day",
+            "start_date": "2025-01-01 08:00",
+        }
+    ]
+    status, ranking = service.handle("GET", "/ranking?period=day")
+    assert ranking[0]["current_streak"] == 2
+
+
+def test_errors(service):
+    assert service.handle("GET", "/nothing")[0] == 404
+    assert service.handle("GET", "/streaks?habit=Running")[0] == 404
+    assert service.handle("GET", "/log")[0] == 400
+    assert service.handle("POST", "/checkoff", {"habit_name": "Reading"})[0] == 400
+    status, _ = service.handle(
+        "POST",
+        "/checkoff_many",
+        {"records": [["Running", "2025-01-02 09:00", "Done!"]]},
+    )
+    assert status == 400
+    status, _ = service.handle(
+        "POST",
+        "/habits",
+        {
+            "habit_name": "Reading",
+            "description": "",
+            "frequency": "1 time(s) per day",
+            "start_date": "2025-01-01 08:00",
+        },
+    )
+    assert status == 409
+
+
+@pytest.mark.parametrize(
+    "frequency, start_date",
+    [
+        ("daily", "2025-01-01 08:00"),
+        ("1 time(s) per year", "2025-01-01 08:00"),
+        ("0 time(s) per day", "2025-01-01 08:00"),
+        ("1 time(s) per day", "yesterday"),
+    ],
+)
+def test_add_habit_validates_frequency_and_start_date(service, frequency, start_date):
+    status, _ = service.handle(
+        "POST",
+        "/habits",
+        {
+            "habit_name": "Running",
+            "description": "",
+            "frequency": frequency,
+            "start_date": start_date,
+        },
+    )
+
+    assert status == 400
+    assert service.handle("GET", "/streaks?habit=Running")[0] == 404
+    assert service.handle("GET", "/ranking")[0] == 200
+
+
+def test_only_lock_errors_are_retryable(service):
+    db = service.db
+    configure_storage(db, "default", busy_timeout=0)
+    blocker = sqlite3.connect(db)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        status, _ = service.handle(
+            "POST",
+            "/checkoff",
+            {"habit_name": "Reading", "date": "2025-01-06 09:00", "status": "Done!"},
+        )
+    finally:
+        blocker.rollback()
+        blocker.close()
+    assert status == 503
+
+    with get_cursor(db) as cur:
+        cur.execute("DROP TABLE tracker_rollup")
+    status, payload = service.handle("GET", "/ranking")
+    assert status == 500
+    assert "no such table" in payload["error"]
+
+
+def test_batch_and_period_logs(service):
+    status, payload = service.handle(
+        "POST",
+        "/batch",
+        {
+            "requests": [
+                {
+                    "method": "POST",
+                    "path": "/checkoff_many",
+                    "body": {
+                        "records": [
+                            ["Reading", "2025-01-06 09:00", "Done!"],
+                            ["Reading", "2025-01-07 09:00", "Skip."],
+                        ]
+                    },
+                },
+                {"path": "/log?day=2025-01-06"},
+                {"path": "/log?week=2025-01-08"},
+                {"path": "/log?month=2025-02"},
+                {"path": "/streaks?habit=Running"},
+            ]
+        },
+    )
+
+    assert status == 200
+    responses = payload["responses"]
+    assert [response["status"] for response in responses] == [201, 200, 200, 200, 404]
+    assert responses[0]["body"] == {"inserted": 2}
+    assert responses[1]["body"] == [
+        {"date": "2025-01-06 09:00", "habit_name": "Reading", "status": "Done!"}
+    ]
+    assert len(responses[2]["body"]) == 2
+    assert responses[3]["body"] == []
+
+
+def test_calendar(service):
+    service.handle(
+        "POST",
+        "/checkoff_many",
+        {
+            "records": [
+                ["Reading", "2025-01-06 09:00", "Done!"],
+                ["Reading", "2025-01-06 21:00", "Skip."],
+                ["Reading", "2025-01-08 09:00", "Missed."],
+            ]
+        },
+    )
+
+    status, payload = service.handle("GET", "/calendar?start=2025-01-05&end=2025-01-08")
+    assert status == 200
+    assert payload == {
+        "habits": ["Reading"],
+        "periods": ["2025-01-05", "2025-01-06", "2025-01-07", "2025-01-08"],
+        "counts": [[0, 2, 0, 0]],
+    }
+
+    status, payload = service.handle(
+        "GET", "/calendar?start=2025-01-05&end=2025-01-08&period=week"
+    )
+    assert payload["periods"] == ["2025-W01", "2025-W02"]
+    assert payload["counts"] == [[0, 2]]
+
+    status, _ = service.handle("GET", "/calendar?start=2025-01-05&period=year")
+    assert status == 400
+
+    status, payload = service.handle("GET", "/calendar?start=1900-01-01&end=2025-01-08")
+    assert status == 400 and "periods" in payload["error"]
+
+
+def test_batch_rejects_malformed_requests(service):
+    status, payload = service.handle(
+        "POST",
+        "/batch",
+        {"requests": [1, {"path": 2}, ["GET", "/habits"], {"path": "/habits"}]},
+    )
+
+    assert status == 200
+    assert [response["status"] for response in payload["responses"]] == [
+        400,
+        400,
+        400,
+        200,
+    ]
+
+
+def test_unexpected_errors_are_a_json_500(service, monkeypatch):
+    def fail(query, body):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(service.routes, ("GET", "/habits"), fail)
+    assert service.handle("GET", "/habits") == (500, {"error": "RuntimeError('boom')"})
+
+
+def test_server_keeps_connection_alive(tmp_path):
+    server = make_server(str(tmp_path / "server.db"), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_port)
+        connection.request("GET", "/habits")
+        response = connection.getresponse()
+        assert (response.status, json.loads(response.read())) == (200, [])
+        first_socket = connection.sock
+
+        connection.request("POST", "/checkoff", body=b"not json")
+        response = connection.getresponse()
+        assert response.status == 400
+        response.read()
+        assert connection.sock is first_socket
+
+        connection.request("POST", "/batch", body=json.dumps({"requests": [1]}))
+        response = connection.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read())["responses"][0]["status"] == 400
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        close_pool(tmp_path / "server.db")
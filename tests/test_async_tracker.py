@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+
+from analysis import Analysis
+from async_tracker import (
+    AsyncAnalysis,
+    AsyncDatabase,
+    AsyncHabitTracker,
+    DatabaseExecutor,
+)
+from habit_tracker import Habit_Tracker
+from db import close_pool, configure_storage, create_tables, get_habit_ids
+import pytest
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    db = str(tmp_path / "async.db")
+    configure_storage(db, "wal")
+    create_tables(db)
+    yield db
+    close_pool(db)
+
+
+@pytest.fixture
+def executor():
+    executor = DatabaseExecutor(max_workers=4)
+    yield executor
+    executor.close()
+
+
+def test_executor_runs_at_most_max_workers_calls(executor):
+    running = 0
+    most = 0
+    lock = threading.Lock()
+
+    def blocking_call(i):
+        nonlocal running, most
+        with lock:
+            running += 1
+            most = max(most, running)
+        time.sleep(0.01)
+        with lock:
+            running -= 1
+        return i
+
+    async def main():
+        return await asyncio.gather(
+            *(executor.run(blocking_call, i) for i in range(20))
+        )
+
+    assert asyncio.run(main()) == list(range(20))
+    assert most == 4
+
+
+def test_concurrent_checkoffs_match_sync_analysis(db_file, executor):
+    tracker = AsyncHabitTracker(db_file, executor)
+    analysis = AsyncAnalysis(db_file, executor=executor)
+
+    async def main():
+        await tracker.add_habit("Reading", "", "1 time(s) per day", "2025-01-01 08:00")
+        await tracker.add_habit("Running", "", "2 time(s) per week", "2025-01-01 08:00")
+        await asyncio.gather(
+            *(
+                tracker.checkoff(
+                    ("Reading", "Running")[i % 2],
+                    f"2025-01-{i % 28 + 1:02} 09:00",
+                    "Done!",
+                )
+                for i in range(40)
+            )
+        )
+        return (
+            await analysis.habit_list(),
+            await analysis.rank_all(),
+            await tracker.get_streak("Running"),
+            await AsyncDatabase(db_file, executor).call(get_habit_ids),
+        )
+
+    habit_list, ranking, streak, habit_ids = asyncio.run(main())
+    sync_tracker = Habit_Tracker(db_file)
+    sync_analysis = Analysis(db_file)
+    habit_log = sync_tracker.completion_count("Reading", "day")
+    habit_log += sync_tracker.completion_count("Running", "week")
+
+    assert sum(count for _, count in habit_log) == 40
+    assert habit_list == sync_analysis.habit_list()
+    assert ranking == sync_analysis.rank_all()
+    assert streak == sync_tracker.get_streak("Running")
+    assert habit_ids == {"Reading": 1, "Running": 2}
@@ -1,8 +1,9 @@
 import sqlite3
+import threading
 import pytest
 from contextlib import contextmanager
 import db
-from datetime import datetime
+from datetime import date, datetime
 
 
 def test_get_cursor(tmp_path):
@@ -21,6 +22,88 @@ def test_get_cursor(tmp_path):
     assert result[0] == "Reading"
 
 
+def test_get_cursor_reuses_pooled_connection(tmp_path):
+
+    fake_db_path = tmp_path / "test.db"
+
+    with db.get_cursor(fake_db_path) as cur:
+        first_con = cur.connection
+    with db.get_cursor(fake_db_path) as cur:
+        second_con = cur.connection
+
+    assert first_con is second_con
+    assert db.get_pool(fake_db_path).connects == 1
+    db.close_pool(fake_db_path)
+
+
+def test_get_cursor_nested_call_shares_connection(tmp_path):
+
+    fake_db_path = tmp_path / "test.db"
+
+    with (
+        db.get_cursor(fake_db_path) as outer,
+        db.get_cursor(fake_db_path) as inner,
+    ):
+        assert inner.connection is outer.connection
+
+    assert db.get_pool(fake_db_path).connects == 1
+    db.close_pool(fake_db_path)
+
+
+def test_get_cursor_closes_nested_cursors_in_any_order(tmp_path):
+
+    fake_db_path = tmp_path / "test.db"
+    first, second = db.get_cursor(fake_db_path), db.get_cursor(fake_db_path)
+    first.__enter__()
+    con = second.__enter__().connection
+    # e.g. two paused generators, the outer one closed first
+    first.__exit__(None, None, None)
+    assert db.get_pool(fake_db_path)._idle == []
+    second.__exit__(None, None, None)
+
+    assert db._held.connections == {}
+    assert db.get_pool(fake_db_path)._idle == [con]
+    db.close_pool(fake_db_path)
+
+
+def test_get_cursor_threads_use_separate_connections(tmp_path):
+
+    fake_db_path = tmp_path / "test.db"
+    started = threading.Barrier(2)
+    connections = []
+
+    def worker():
+        with db.get_cursor(fake_db_path) as cur:
+            connections.append(cur.connection)
+            started.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert connections[0] is not connections[1]
+    db.close_pool(fake_db_path)
+
+
+def test_get_cursor_discards_uncommitted_changes(tmp_path):
+
+    fake_db_path = tmp_path / "test.db"
+
+    with db.get_cursor(fake_db_path) as cur:
+        cur.execute("""CREATE TABLE test_table (id INTEGER, habit TEXT)""")
+        cur.connection.commit()
+    with db.get_cursor(fake_db_path) as cur:
+        cur.execute("""INSERT INTO test_table VALUES (1, "Reading")""")
+    with db.get_cursor(fake_db_path) as cur:
+        cur.execute("""SELECT COUNT(*) FROM test_table""")
+        result = cur.fetchone()
+
+    assert result[0] == 0
+    db.close_pool(fake_db_path)
+
+
 @pytest.fixture
 def mock_cursor(tmp_path, monkeypatch):
 
@@ -62,6 +145,156 @@ def test_create_tables(mock_cursor):
     assert result2[0] == "tracker"
 
 
+def test_configure_storage_applies_profile(tmp_path):
+
+    fake_db_path = tmp_path / "test.db"
+    db.configure_storage(fake_db_path, "wal", synchronous="FULL")
+
+    with db.get_cursor(fake_db_path) as cur:
+        cur.execute("PRAGMA journal_mode")
+        journal_mode = cur.fetchone()[0]
+        cur.execute("PRAGMA synchronous")
+        synchronous = cur.fetchone()[0]
+        cur.execute("PRAGMA busy_timeout")
+        busy_timeout = cur.fetchone()[0]
+
+    assert journal_mode == "wal"
+    assert synchronous == 2
+    assert busy_timeout == 5000
+    db.close_pool(fake_db_path)
+
+
+def test_configure_storage_replaces_borrowed_connection(tmp_path):
+
+    fake_db_path = tmp_path / "test.db"
+
+    with db.get_cursor(fake_db_path) as cur:
+        old_con = cur.connection
+        db.configure_storage(fake_db_path, "wal")
+
+    with db.get_cursor(fake_db_path) as cur:
+        assert cur.connection is not old_con
+        cur.execute("PRAGMA journal_mode")
+        assert cur.fetchone()[0] == "wal"
+    db.close_pool(fake_db_path)
+
+
+def test_closed_pool_is_created_again_with_its_storage_settings(tmp_path):
+
+    fake_db_path = tmp_path / "test.db"
+    db.configure_storage(fake_db_path, "wal", busy_timeout=1234)
+    db.close_pool(fake_db_path)
+
+    with db.get_cursor(fake_db_path) as cur:
+        cur.execute("PRAGMA busy_timeout")
+        assert cur.fetchone()[0] == 1234
+    db.close_pool(fake_db_path)
+
+
+def test_pool_group_closes_least_recently_used_pool(tmp_path):
+
+    paths = [tmp_path / f"{name}.db" for name in ("a", "b", "c")]
+    group = db.PoolGroup(max_open=2)
+    for path in paths:
+        group.add(path)
+    for path in (paths[0], paths[1], paths[0], paths[2]):
+        with db.get_cursor(path):
+            pass
+
+    assert group.open_databases() == [
+        db.database_key(paths[0]),
+        db.database_key(paths[2]),
+    ]
+    assert db.database_key(paths[1]) not in db._pools
+    group.close()
+    assert not any(db.database_key(path) in db._pools for path in paths)
+
+
+def test_create_tables_sets_latest_schema_version(tmp_path):
+
+    fake_db_path = tmp_path / "test.db"
+    db.create_tables(fake_db_path)
+
+    with db.get_cursor(fake_db_path) as cur:
+        cur.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        indexes = {row[0] for row in cur.fetchall()}
+
+    assert db.get_schema_version(fake_db_path) == db.SCHEMA_VERSION
+    assert {"idx_tracker_habit_date", "idx_tracker_day"} <= indexes
+    assert "idx_tracker_date" not in indexes
+    db.close_pool(fake_db_path)
+
+
+def test_migrate_upgrades_legacy_database_in_place(tmp_path):
+
+    fake_db_path = tmp_path / "legacy.db"
+    db.migrate(fake_db_path, target=1)
+    with db.get_cursor(fake_db_path) as cur:
+        cur.execute("PRAGMA user_version = 0")
+        cur.execute(
+            """INSERT INTO myhabit (habit_name, description, frequency,
+                                        start_date, current_streak, max_streak)
+                    VALUES ("Reading", "Read books", "1 time(s) per day", "2025-01-01 08:00", 0, 0)"""
+        )
+        cur.execute(
+            """INSERT INTO tracker (habit_id, date, status) VALUES (1, "2025-01-02 09:00", "Done!")"""
+        )
+        cur.connection.commit()
+
+    assert db.migrate(fake_db_path) == db.SCHEMA_VERSION
+    assert db.migrate(fake_db_path) == db.SCHEMA_VERSION
+    assert db.get_data_from_tracker(fake_db_path, "date, status", "Reading") == [
+        ("2025-01-02 09:00", "Done!")
+    ]
+    assert db.get_data_from_tracker(
+        fake_db_path, "minute_epoch, day_ord, week_ord, month_ord", "Reading"
+    ) == [db.date_ordinals("2025-01-02 09:00")]
+    db.close_pool(fake_db_path)
+
+
+def test_migrate_converts_stored_streak_periods_to_ordinals(tmp_path):
+
+    fake_db_path = tmp_path / "legacy.db"
+    db.migrate(fake_db_path, target=5)
+    with db.get_cursor(fake_db_path) as cur:
+        cur.executemany(
+            """INSERT INTO myhabit (habit_name, description, frequency,
+                                        start_date, current_streak, max_streak)
+                    VALUES (?, "", ?, "2025-01-01 08:00", 0, 0)""",
+            [
+                ("Reading", "1 time(s) per day"),
+                ("Running", "2 time(s) per week"),
+                ("Baking", "1 time(s) per month"),
+                ("Drawing", "1 time(s) per week"),
+            ],
+        )
+        cur.executemany(
+            """INSERT INTO habit_streak (habit_id, as_of, last_period, period_count, previous_run)
+                    VALUES (?, ?, ?, 1, 0)""",
+            [
+                (1, "2025-01-07", "2025-01-06"),
+                (2, "2025-W02", "2024-W52"),
+                (3, "2025-01", "2024-12"),
+                (4, "2025-W02", "garbage"),
+            ],
+        )
+        cur.connection.commit()
+
+    assert db.migrate(fake_db_path) == db.SCHEMA_VERSION
+    states = [
+        db.get_streak_state(fake_db_path, name)[4:7]
+        for name in ("Reading", "Running", "Baking", "Drawing")
+    ]
+    week = db.date_ordinals("2025-01-07")[2]
+    assert states == [
+        (db.date_ordinals("2025-01-07")[1], db.date_ordinals("2025-01-06")[1], 1),
+        (week, db.date_ordinals("2024-12-23")[2], 1),
+        (2025 * 12, 2025 * 12 - 1, 1),
+        (week, None, None),
+    ]
+    db.close_pool(fake_db_path)
+
+
 @pytest.fixture
 def init_fake_table(mock_cursor):
     db.create_tables()
@@ -278,3 +511,256 @@ def test_weekly_habit_log(mock_cursor, init_fake_table):
 
     assert results[0] == ("2025-01-07", "2025-W01", "Swimming", "Done!")
     assert columns == ["date", "year_week", "habit_name", "status"]
+
+
+@pytest.fixture
+def period_db(tmp_path):
+    fake_db_path = tmp_path / "period.db"
+    db.create_tables(fake_db_path)
+    with db.get_cursor(fake_db_path) as cur:
+        cur.execute(
+            """INSERT INTO myhabit (habit_name, description, frequency,
+                                        start_date, current_streak, max_streak)
+                    VALUES ("Reading", "Read books", "1 time(s) per day", "2024-12-01 08:00", 0, 0)"""
+        )
+        cur.executemany(
+            """INSERT INTO tracker (habit_id, date, status) VALUES (1, ?, "Done!")""",
+            [
+                ("2024-12-29 23:59",),
+                ("2024-12-30 00:00",),
+                ("2024-12-31 12:00",),
+                ("2025-01-01",),
+                ("2025-01-05 08:30",),
+                ("2025-01-06 07:00",),
+                ("2025-02-01 10:00",),
+            ],
+        )
+        cur.connection.commit()
+    yield fake_db_path
+    db.close_pool(fake_db_path)
+
+
+@pytest.mark.parametrize(
+    "time", ["2024-12-31", "2025-01-01", "2025-01-06", "2024-12", "2025-01", "2025-02"]
+)
+def test_daily_and_monthly_habit_log_matches_like_filter(period_db, time):
+
+    with db.get_cursor(period_db) as cur:
+        cur.execute(
+            """SELECT t.date, m.habit_name, t.status FROM myhabit m
+                    JOIN tracker t ON m.habit_id = t.habit_id
+                    WHERE t.date LIKE ? ORDER BY t.date DESC""",
+            (time + "%",),
+        )
+        expected = cur.fetchall()
+
+    results, _ = db.daily_and_monthly_habit_log(period_db, time)
+    assert results == expected
+
+
+@pytest.mark.parametrize(
+    "time",
+    [datetime(2024, 12, 30), date(2024, 12, 31), date(2025, 1, 1), date(2025, 1, 8)],
+)
+def test_weekly_habit_log_matches_strftime_filter(period_db, time):
+
+    with db.get_cursor(period_db) as cur:
+        cur.execute(
+            """SELECT t.date, STRFTIME('%Y-W%W', t.date) AS year_week, m.habit_name, t.status
+                    FROM myhabit m JOIN tracker t ON m.habit_id = t.habit_id
+                    WHERE year_week = ? ORDER BY t.date DESC""",
+            (time.strftime("%Y-W%W"),),
+        )
+        expected = cur.fetchall()
+
+    results, _ = db.weekly_habit_log(period_db, time)
+    assert results == expected
+
+
+def test_period_log_columns(period_db):
+    minutes, habit_ids, statuses, labels = db.period_log_columns(
+        period_db, db.day_or_month_range("2025-01"), chunk_size=2
+    )
+
+    assert minutes.tolist() == [
+        db.date_ordinals(moment)[0]
+        for moment in ("2025-01-06 07:00", "2025-01-05 08:30", "2025-01-01")
+    ]
+    assert habit_ids.tolist() == [1, 1, 1]
+    assert statuses.dtype.itemsize == 1 and statuses.tolist() == [0, 0, 0]
+    assert labels == db.STATUS_LABELS
+
+    minutes, *_ = db.period_log_columns(period_db, db.day_or_month_range("2030-01"))
+    assert len(minutes) == 0
+
+
+def test_period_log_columns_keeps_unknown_statuses(period_db):
+    for moment, status in (
+        ("2025-01-02 09:00", "done"),
+        ("2025-01-03 09:00", None),
+        ("2025-01-04 09:00", "Missed."),
+        ("2025-01-07 09:00", "done"),
+    ):
+        db.insert_tracker(period_db, "Reading", moment, status)
+
+    _, _, statuses, labels = db.period_log_columns(
+        period_db, db.day_or_month_range("2025-01"), chunk_size=2
+    )
+
+    assert labels == (*db.STATUS_LABELS, "done")
+    assert statuses.tolist() == [3, 0, 0, 2, -1, 3, 0]
+
+
+def test_completion_grid(period_db):
+    first, last = db.date_ordinals("2024-12-30")[1], db.date_ordinals("2025-01-06")[1]
+    grid = db.completion_grid(period_db, "day", first, last)
+
+    assert grid.dtype == "int64"
+    assert sorted(map(tuple, grid.tolist())) == [
+        (1, db.date_ordinals(day)[1], 1)
+        for day in (
+            "2024-12-30",
+            "2024-12-31",
+            "2025-01-01",
+            "2025-01-05",
+            "2025-01-06",
+        )
+    ]
+    assert db.completion_grid(period_db, "month", 0, 1).shape == (0, 3)
+
+    with db.get_cursor(period_db) as cur:
+        cur.execute("EXPLAIN QUERY PLAN " + db.COMPLETION_GRID_QUERY, ("day", 0, 1))
+        plan = [row[3] for row in cur.fetchall()]
+    assert any("SEARCH r USING PRIMARY KEY" in step for step in plan), plan
+
+
+@pytest.mark.parametrize(
+    "query, params",
+    [
+        (db.DAILY_AND_MONTHLY_LOG_QUERY, db.day_or_month_range("2025-01-01")),
+        (db.WEEKLY_LOG_QUERY, db.week_range(date(2024, 12, 30))),
+    ],
+)
+def test_period_log_queries_use_index(period_db, query, params):
+
+    with db.get_cursor(period_db) as cur:
+        cur.execute("EXPLAIN QUERY PLAN " + query, params)
+        plan = [row[3] for row in cur.fetchall()]
+
+    assert not any(step.startswith("SCAN") for step in plan), plan
+
+
+def test_tracker_ordinals_match_date_ordinals(period_db):
+
+    db.insert_tracker(period_db, "Reading", "2025-03-02 23:59", "Done!")
+    db.insert_tracker_many(period_db, [(1, "2025-03-03 00:00", "Skip.")])
+    with db.get_cursor(period_db) as cur:
+        cur.execute(
+            "SELECT date, minute_epoch, day_ord, week_ord, month_ord FROM tracker"
+        )
+        rows = cur.fetchall()
+
+    assert len(rows) == 9
+    for date_text, *ordinals in rows:
+        assert tuple(ordinals) == db.date_ordinals(date_text)
+
+
+def test_date_ordinals_follow_periods():
+
+    _, day, week, month = db.date_ordinals("2025-01-05 23:59")
+    _, next_day, next_week, next_month = db.date_ordinals("2025-01-06 00:00")
+
+    assert next_day == day + 1
+    assert next_week == week + 1
+    assert next_month == month
+    assert db.period_label(day, "day") == "2025-01-05"
+    assert db.period_label(next_week, "week") == "2025-W02"
+    assert db.period_label(month, "month") == "2025-01"
+
+
+def test_count_completions(period_db):
+
+    db.insert_tracker(period_db, "Reading", "2025-01-06 21:00", "Missed.")
+    db.insert_tracker(period_db, "Reading", "2025-01-07 21:00", "Skip.")
+    week_counts = db.count_completions(period_db, "Reading", "week")
+
+    assert [
+        (db.period_label(ordinal, "week"), count) for ordinal, count in week_counts
+    ] == [("2024-W52", 1), ("2025-W01", 4), ("2025-W02", 2), ("2025-W05", 1)]
+
+
+def test_rollup_follows_tracker_writes(period_db):
+
+    assert db.check_rollup(period_db) == []
+    db.insert_tracker(period_db, "Reading", "2025-01-01 20:00", "Skip.")
+    db.insert_tracker_many(
+        period_db,
+        [(1, "2025-01-01 21:00", "Missed."), (1, "2025-01-02 07:00", "Done!")],
+    )
+    with db.get_cursor(period_db) as cur:
+        cur.execute(
+            """UPDATE tracker SET status = 'Missed.' WHERE date = '2024-12-31 12:00'"""
+        )
+        cur.execute(
+            """UPDATE tracker SET date = '2025-01-20 10:00' WHERE date = '2025-02-01 10:00'"""
+        )
+        cur.execute("""DELETE FROM tracker WHERE date = '2025-01-05 08:30'""")
+        cur.connection.commit()
+        cur.execute(
+            """SELECT done_count, skip_count, missed_count FROM tracker_rollup
+                    WHERE period_kind = 'day' AND period_key = ?""",
+            (db.date_ordinals("2025-01-01")[1],),
+        )
+        assert cur.fetchone() == (1, 1, 1)
+
+    assert db.check_rollup(period_db) == []
+    assert db.count_completions(period_db, "Reading", "month") == [
+        (db.date_ordinals("2024-12-01")[3], 2),
+        (db.date_ordinals("2025-01-01")[3], 5),
+    ]
+
+    db.delete_value(period_db, "Reading", "myhabit")
+    with db.get_cursor(period_db) as cur:
+        cur.execute("SELECT COUNT(*) FROM tracker_rollup")
+        assert cur.fetchone()[0] == 0
+
+
+def test_check_rollup_finds_and_rebuild_fixes_differences(period_db):
+
+    with db.get_cursor(period_db) as cur:
+        cur.execute(
+            """UPDATE tracker_rollup SET done_count = 7
+                    WHERE period_kind = 'month' AND period_key = ?""",
+            (db.date_ordinals("2025-02-01")[3],),
+        )
+        cur.connection.commit()
+
+    month = db.date_ordinals("2025-02-01")[3]
+    assert db.check_rollup(period_db) == [
+        ("missing", 1, "month", month, 1, 0, 0),
+        ("unexpected", 1, "month", month, 7, 0, 0),
+    ]
+    assert db.rebuild_rollup(period_db) == 14
+    assert db.check_rollup(period_db) == []
+
+
+def test_store_streak_is_skipped_when_tracker_changed(period_db):
+
+    day = db.date_ordinals("2025-02-01")[1]
+    assert db.get_streak_state(period_db, "Reading")[3:] == (None,) * 5
+    assert db.store_streak(period_db, "Reading", 1, 2, day, None, day, 1, 1)
+    assert db.get_streak_state(period_db, "Reading") == (
+        "1 time(s) per day",
+        1,
+        2,
+        0,
+        day,
+        day,
+        1,
+        1,
+    )
+
+    db.insert_tracker(period_db, "Reading", "2025-02-02 10:00", "Done!")
+    assert db.get_streak_state(period_db, "Reading")[3] == 1
+    assert not db.store_streak(period_db, "Reading", 5, 5, day + 1, 0)
+    assert db.get_streak_state(period_db, "Reading")[1:5] == (1, 2, 1, day)
@@ -1,4 +1,9 @@
+from datetime import date, timedelta
+import db
+from db import date_ordinals
+from habit_tracker import Habit_Tracker
 from habit import Habit
+from records import HabitLog, LogEntry, Status
 import habit
 import pytest
 
@@ -20,9 +25,18 @@ class Fakeanalysis:
             4,
         )
 
-    def habit_log_from_tracker(self, habit_name):
+    def habit_log_records(self, habit_name):
         assert habit_name == "Swimming"
-        return [("2025-01-03", "Done!"), ("2025-01-01", "Done!")]
+        return HabitLog.from_rows(
+            [
+                (date_ordinals("2025-01-03 08:00")[0], "Done!"),
+                (date_ordinals("2025-01-01 21:30")[0], "Skip."),
+            ]
+        )
+
+    def habit_log_page(self, habit_name, limit=None, before=None, start=None, end=None):
+        assert habit_name == "Swimming"
+        return (limit, before, start, end), None
 
 
 class FakeHabitTracker:
@@ -30,8 +44,11 @@ class FakeHabitTracker:
         self.db = db
 
     def update_streak(self, habit_name):
+        raise AssertionError("loading a habit must not write the streak")
+
+    def get_streak(self, habit_name):
         assert habit_name == "Swimming"
-        return None
+        return (3, 5)
 
 
 @pytest.fixture
@@ -45,35 +62,161 @@ def sut(monkeypatch):
 def test_init(monkeypatch):
     func_call = []
 
-    def fake_func_1(self, habit_name):
-        assert habit_name == "Swimming"
+    def fake_func_1(self):
+        assert self._name == "Swimming"
         func_call.append("f1")
 
-    def fake_func_2(self, habit_name):
-        assert habit_name == "Swimming"
+    def fake_func_2(self):
+        assert self._name == "Swimming"
         func_call.append("f2")
 
     monkeypatch.setattr(Habit, "load_habit_properties", fake_func_1)
     monkeypatch.setattr(Habit, "load_habit_log", fake_func_2)
 
-    _ = Habit("fake_db.db", "Swimming")
+    sut = Habit("fake_db.db", "Swimming")
+    assert func_call == []
+
+    _ = sut.description
+    assert func_call == ["f1"]
+    _ = sut.log
     assert func_call == ["f1", "f2"]
 
 
 def test_load_habit_properties(sut):
 
-    sut.load_habit_properties("Swimming")
+    sut.load_habit_properties()
     assert sut.id == 2
     assert sut.habit_name == "Swimming"
     assert sut.description == "Swimming for 1 hour"
     assert sut.frequency == "3 time(s) per week"
     assert sut.start_date == "2025-01-01"
-    assert sut.current_streak == 2
-    assert sut.longest_streak == 4
+    assert sut.current_streak == 3
+    assert sut.longest_streak == 5
 
 
 def test_load_habit_log(sut):
 
-    sut.load_habit_log("Swimming")
-    assert sut.log == [("2025-01-03", "Done!"), ("2025-01-01", "Done!")]
+    sut.load_habit_log()
+    assert sut.log.rows() == [
+        ("2025-01-03 08:00", "Done!"),
+        ("2025-01-01 21:30", "Skip."),
+    ]
+    assert sut.log[0] == LogEntry(date_ordinals("2025-01-03 08:00")[0], Status.DONE)
     assert sut.start_date == "2025-01-01"
+
+
+def test_habit_has_no_instance_dict(sut):
+    assert not hasattr(sut, "__dict__")
+
+
+def test_log_with_unknown_status(tmp_path):
+    db_file = str(tmp_path / "unknown_status.db")
+    db.create_tables(db_file)
+    tracker = Habit_Tracker(db_file)
+    tracker.add_habit("Reading", "", "1 time(s) per day", "2025-01-01 08:00")
+    tracker.checkoff("Reading", "2025-01-02 08:00", "Done!")
+    tracker.checkoff("Reading", "2025-01-03 08:00", "done")
+
+    sut = Habit(db_file, "Reading")
+    assert sut.log.rows() == [
+        ("2025-01-03 08:00", "done"),
+        ("2025-01-02 08:00", "Done!"),
+    ]
+    page, cursor = sut.latest_entries(1)
+    assert page.rows() == [("2025-01-03 08:00", "done")]
+    assert sut.entries_before(cursor, 1)[0].rows() == [("2025-01-02 08:00", "Done!")]
+    db.close_pool(db_file)
+
+
+def test_log_is_loaded_once_on_first_use(sut, monkeypatch):
+    calls = []
+    load_habit_log = Habit.load_habit_log
+
+    def counting_load(self):
+        calls.append(self._name)
+        load_habit_log(self)
+
+    monkeypatch.setattr(Habit, "load_habit_log", counting_load)
+    assert calls == []
+    assert len(sut.log) == 2
+    assert len(sut.log) == 2
+    assert calls == ["Swimming"]
+
+
+def test_log_pages(sut):
+    assert sut.latest_entries(10) == ((10, None, None, None), None)
+    assert sut.entries_before(("2025-01-03 08:00", 7), 5) == (
+        (5, ("2025-01-03 08:00", 7), None, None),
+        None,
+    )
+    assert sut.entries_between("2025-01-01", "2025-02-01") == (
+        (None, None, "2025-01-01", "2025-02-01"),
+        None,
+    )
+
+
+def test_streak_is_loaded_without_properties_or_log(sut, monkeypatch):
+    def fail(self):
+        raise AssertionError("only the streak must be loaded")
+
+    monkeypatch.setattr(Habit, "load_habit_properties", fail)
+    monkeypatch.setattr(Habit, "load_habit_log", fail)
+    assert sut.longest_streak == 5
+
+
+def test_invalidate(sut, monkeypatch):
+    assert sut.current_streak == 3
+    monkeypatch.setattr(FakeHabitTracker, "get_streak", lambda self, name: (4, 6))
+    assert sut.current_streak == 3
+
+    sut.invalidate("streak")
+    assert (sut.current_streak, sut.longest_streak) == (4, 6)
+
+    sut.invalidate()
+    assert sut._properties is None and sut._log is None
+    with pytest.raises(ValueError):
+        sut.invalidate("streaks")
+
+
+def test_unknown_habit(monkeypatch):
+    monkeypatch.setattr(habit, "Analysis", Fakeanalysis)
+    monkeypatch.setattr(Fakeanalysis, "get_habit_data", lambda self, column, name: None)
+    sut = Habit("fake_db.db", "Unknown")
+
+    assert sut.habit_name is None
+    assert sut.start_date is None
+
+
+def test_load_many(tmp_path):
+    db_file = str(tmp_path / "load_many.db")
+    db.create_tables(db_file)
+    tracker = Habit_Tracker(db_file)
+    for name in ("Reading", "Running", "Baking"):
+        tracker.add_habit(
+            name, f"{name} daily", "1 time(s) per day", "2025-01-01 08:00"
+        )
+    today = date.today()
+    for days_ago in (0, 1, 2):
+        tracker.checkoff(
+            "Running", (today - timedelta(days_ago)).strftime("%Y-%m-%d 07:00"), "Done!"
+        )
+    db.insert_tracker(db_file, "Baking", today.strftime("%Y-%m-%d 07:00"), "Done!")
+
+    habits = Habit.load_many(db_file)
+    assert [h.habit_name for h in habits] == ["Reading", "Running", "Baking"]
+    for loaded in habits:
+        single = Habit(db_file, loaded.habit_name)
+        assert (loaded.id, loaded.description, loaded.start_date) == (
+            single.id,
+            single.description,
+            single.start_date,
+        )
+        assert (loaded.current_streak, loaded.longest_streak) == (
+            single.current_streak,
+            single.longest_streak,
+        )
+    assert habits[1].current_streak == 3 and habits[2].current_streak == 1
+
+    assert [h.id for h in Habit.load_many(db_file, ["Baking", "Nope"])] == [3]
+    assert Habit.load_many(db_file, []) == []
+    db.close_pool(db_file)
@@ -1,8 +1,35 @@
-from habit_tracker import Habit_Tracker
+from habit_tracker import Habit_Tracker, parse_frequency, period_key, period_ordinal
 import habit_tracker
+import random
 import sqlite3
 import pytest
-from datetime import datetime, date
+from collections import Counter
+from datetime import datetime, date, timedelta
+from db import (
+    create_tables,
+    get_cursor,
+    get_streak_state,
+    close_pool,
+    date_ordinals,
+    period_label,
+)
+
+
+def fake_count_completions(log):
+    """
+    Returns a stand-in for db.count_completions that reads a list of (date, status) instead of the tracker table.
+    """
+    columns = {"day": 1, "week": 2, "month": 3}
+
+    def count_completions(db, habit_name, period):
+        counts = Counter(
+            date_ordinals(date_str)[columns[period]]
+            for date_str, status in log
+            if status in ("Done!", "Skip.")
+        )
+        return sorted(counts.items())
+
+    return count_completions
 
 
 @pytest.fixture
@@ -50,22 +77,21 @@ def test_delete_habit(sut, monkeypatch):
 
 def test_completion_count(sut, monkeypatch):
 
-    def fake_get_data_from_tracker(db, columns, habit_name):
-        assert columns == "date, status"
-        return [
-            ("2025-01-10 12:11", "Done!"),
-            ("2025-01-10 18:22", "Done!"),
-            ("2025-01-11 17:09", "Skip."),
-        ]
+    def fake_function(db, habit_name, period):
+        assert habit_name == "Swimming"
+        assert period == "day"
+        return [(20098, 2), (20099, 1)]
 
-    monkeypatch.setattr(
-        habit_tracker, "get_data_from_tracker", fake_get_data_from_tracker
-    )
+    monkeypatch.setattr(habit_tracker, "count_completions", fake_function)
 
     success_counts_list = sut.completion_count("Swimming", "day")
     assert success_counts_list == [("2025-01-10", 2), ("2025-01-11", 1)]
 
 
+# the week of Fakedate.today()
+WEEK_2 = period_ordinal("2025-W02", "week")
+
+
 class Fakedate(date):
     @classmethod
     def today(cls):
@@ -174,36 +200,133 @@ def test_update_streak(sut, monkeypatch):
 
     item_list = []
 
-    def fake_get_data(db, frequency, habit_name):
+    def fake_get_streak_state(db, habit_name):
         assert db == "fake_db.db"
         assert habit_name == "Swimming"
-        return ["3 time(s) per day"]
-
-    def fake_completion_count(db, habit_name, period):
+        return (
+            "3 time(s) per day",
+            0,
+            0,
+            1,
+            period_ordinal("2025-01-06", "day"),
+            None,
+            None,
+            None,
+        )
+
+    def fake_count_completions(db, habit_name, period):
         assert habit_name == "Swimming"
         assert period == "day"
-        return None
+        return [
+            (period_ordinal("2025-01-05", "day"), 3),
+            (period_ordinal("2025-01-07", "day"), 3),
+        ]
 
-    def fake_streak_count(self, habit_log, period, times):
-        assert period == "day"
+    def fake_ordinal_streak_count(ordinal_log, today_ordinal, times):
+        assert today_ordinal == period_ordinal("2025-01-07", "day")
         assert times == 3
         return (2, 3)
 
-    def fake_update_myhabit(db, habit_name, column, value):
+    def fake_store_streak(db, habit_name, current_streak, max_streak, as_of, *state):
         assert db == "fake_db.db"
         assert habit_name == "Swimming"
-        item_list.append((habit_name, column, value))
+        item_list.append((habit_name, current_streak, max_streak, as_of, *state))
+        return True
 
-    monkeypatch.setattr(habit_tracker, "get_data_from_myhabit_by_name", fake_get_data)
-    monkeypatch.setattr(Habit_Tracker, "completion_count", fake_completion_count)
-    monkeypatch.setattr(Habit_Tracker, "streak_count", fake_streak_count)
-    monkeypatch.setattr(habit_tracker, "update_myhabit", fake_update_myhabit)
+    monkeypatch.setattr(habit_tracker, "get_streak_state", fake_get_streak_state)
+    monkeypatch.setattr(habit_tracker, "count_completions", fake_count_completions)
+    monkeypatch.setattr(
+        habit_tracker, "ordinal_streak_count", fake_ordinal_streak_count
+    )
+    monkeypatch.setattr(habit_tracker, "store_streak", fake_store_streak)
+    monkeypatch.setattr(habit_tracker, "date", Fakedate)
 
     sut.update_streak("Swimming")
-    assert item_list == [
-        ("Swimming", "current_streak", 2),
-        ("Swimming", "max_streak", 3),
-    ]
+    today = period_ordinal("2025-01-07", "day")
+    assert item_list == [("Swimming", 2, 3, today, 1, today, 3, 0)]
+
+
+def test_get_streak_uses_fresh_stored_value(sut, monkeypatch):
+
+    def fake_get_streak_state(db, habit_name):
+        return ("1 time(s) per week", 4, 6, 0, WEEK_2, None, None, None)
+
+    def fake_count_completions(db, habit_name, period):
+        raise AssertionError("a fresh streak must not be recomputed")
+
+    monkeypatch.setattr(habit_tracker, "get_streak_state", fake_get_streak_state)
+    monkeypatch.setattr(habit_tracker, "count_completions", fake_count_completions)
+    monkeypatch.setattr(habit_tracker, "date", Fakedate)
+
+    assert sut.get_streak("Swimming") == (4, 6)
+
+
+@pytest.mark.parametrize(
+    "dirty, as_of, period_count",
+    [(1, WEEK_2, 1), (0, WEEK_2 - 1, None), (None, None, None)],
+)
+def test_get_streak_recomputes_stale_value(
+    sut, monkeypatch, dirty, as_of, period_count
+):
+
+    def fake_get_streak_state(db, habit_name):
+        return ("1 time(s) per week", 4, 6, dirty, as_of, WEEK_2, period_count, 3)
+
+    def fake_count_completions(db, habit_name, period):
+        assert period == "week"
+        return [(WEEK_2, 1)]
+
+    def fake_store_streak(*args):
+        raise AssertionError("reading a streak must not write it")
+
+    monkeypatch.setattr(habit_tracker, "get_streak_state", fake_get_streak_state)
+    monkeypatch.setattr(habit_tracker, "store_streak", fake_store_streak)
+    monkeypatch.setattr(habit_tracker, "count_completions", fake_count_completions)
+    monkeypatch.setattr(habit_tracker, "date", Fakedate)
+
+    assert sut.get_streak("Swimming") == (1, 1)
+
+
+@pytest.mark.parametrize(
+    "last_period, expected", [(WEEK_2, (4, 6)), (WEEK_2 - 1, (0, 6))]
+)
+def test_get_streak_derives_current_streak_from_state(
+    sut, monkeypatch, last_period, expected
+):
+
+    def fake_get_streak_state(db, habit_name):
+        return ("1 time(s) per week", 9, 6, 0, WEEK_2 - 1, last_period, 1, 3)
+
+    def fake_count_completions(db, habit_name, period):
+        raise AssertionError("a clean streak state must not be recomputed")
+
+    monkeypatch.setattr(habit_tracker, "get_streak_state", fake_get_streak_state)
+    monkeypatch.setattr(habit_tracker, "count_completions", fake_count_completions)
+    monkeypatch.setattr(habit_tracker, "date", Fakedate)
+
+    assert sut.get_streak("Swimming") == expected
+
+
+def test_checkoff_stores_streak_and_reads_do_not_write(tmp_path):
+
+    db_path = tmp_path / "tracker.db"
+    create_tables(db_path)
+    tracker = Habit_Tracker(db_path)
+    tracker.add_habit("Reading", "Read books", "1 time(s) per day", "2025-01-01 08:00")
+    today = date.today().strftime("%Y-%m-%d 07:00")
+    tracker.checkoff("Reading", today, "Done!")
+
+    day_ord = date_ordinals(today)[1]
+    assert get_streak_state(db_path, "Reading")[1:] == (1, 1, 0, day_ord, day_ord, 1, 0)
+
+    with get_cursor(db_path) as cur:
+        cur.execute("SELECT total_changes()")
+        changes_before = cur.fetchone()[0]
+        assert tracker.get_streak("Reading") == (1, 1)
+        cur.execute("SELECT total_changes()")
+        assert cur.fetchone()[0] == changes_before
+
+    close_pool(db_path)
 
 
 def test_checkoff(sut, monkeypatch):
@@ -220,8 +343,147 @@ def test_checkoff(sut, monkeypatch):
 
     monkeypatch.setattr(habit_tracker, "insert_tracker", fake_insert_tracker)
     monkeypatch.setattr(Habit_Tracker, "update_streak", fake_update_streak)
+    monkeypatch.setattr(habit_tracker, "get_streak_state", lambda db, habit_name: None)
 
     sut.checkoff("Swimming", "2025-01-01", "Done!")
 
     assert list_1 == [("Swimming", "2025-01-01", "Done!")]
     assert list_2 == ["Swimming"]
+
+
+def random_activities(rng, period, count):
+    """
+    Yields (date, status) activities that mostly move forward in time up to now, with some backdated ones.
+    """
+    step = {"day": 2, "week": 6, "month": 20}[period]
+    now = datetime.now().replace(second=0, microsecond=0)
+    day = now - timedelta(days=step * count // 2)
+    for _ in range(count):
+        if rng.random() < 0.1:
+            activity = day - timedelta(days=rng.randint(1, step * 5))
+        else:
+            day = min(day + timedelta(days=rng.randint(0, step)), now)
+            activity = day
+        yield activity, rng.choice(["Done!", "Done!", "Skip.", "Missed."])
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_advance_streak_matches_streak_count(sut, monkeypatch, seed):
+    rng = random.Random(seed)
+    period = rng.choice(["day", "week", "month"])
+    times = rng.randint(1, 3)
+    index = {"day": 1, "week": 2, "month": 3}[period]
+    today = date_ordinals(date.today().isoformat())[index]
+    log = []
+    monkeypatch.setattr(habit_tracker, "count_completions", fake_count_completions(log))
+
+    state = (None, 0, 0, 0)
+    for activity, status in random_activities(rng, period, rng.randint(1, 80)):
+        activity = activity.strftime("%Y-%m-%d %H:%M")
+        log.append((activity, status))
+        habit_log = sut.completion_count("Swimming", period)
+        expected = sut.streak_count(habit_log, period, times)
+
+        if status != "Missed.":
+            state = sut.advance_streak(state, date_ordinals(activity)[index], times)
+        if state is None:
+            state = (*sut.streak_state(habit_log, period, times), expected[1])
+
+        assert (sut.current_streak(state, today, times), state[3]) == expected
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_sparse_streak_count_matches_streak_count(sut, seed):
+    rng = random.Random(seed)
+    period = ("day", "week", "month")[seed % 3]
+    times = rng.randint(1, 3)
+    today = period_ordinal(period_key(date.today(), period), period)
+    ordinals = sorted(rng.sample(range(today - 60, today + 3), rng.randint(0, 40)))
+    habit_log = [
+        (period_label(ordinal, period), rng.randint(1, 4)) for ordinal in ordinals
+    ]
+
+    assert sut.sparse_streak_count(habit_log, period, times) == sut.streak_count(
+        habit_log, period, times
+    )
+
+
+@pytest.mark.parametrize("frequency", ["2 time(s) per day", "1 time(s) per week"])
+def test_checkoff_keeps_stored_streak_in_sync(tmp_path, frequency):
+    rng = random.Random(frequency)
+    db_path = tmp_path / "tracker.db"
+    create_tables(db_path)
+    tracker = Habit_Tracker(db_path)
+    tracker.add_habit("Reading", "Read books", frequency, "2020-01-01 08:00")
+    times, period = parse_frequency(frequency)
+
+    for activity, status in random_activities(rng, period, 60):
+        tracker.checkoff("Reading", activity.strftime("%Y-%m-%d %H:%M"), status)
+        habit_log = tracker.completion_count("Reading", period)
+        stored = get_streak_state(db_path, "Reading")
+
+        assert stored[3] == 0
+        assert stored[1:3] == tracker.streak_count(habit_log, period, times)
+
+    close_pool(db_path)
+
+
+def test_checkoff_many(tmp_path):
+    db_path = tmp_path / "tracker.db"
+    create_tables(db_path)
+    tracker = Habit_Tracker(db_path)
+    tracker.add_habit("Reading", "Read books", "1 time(s) per day", "2020-01-01 08:00")
+    tracker.add_habit("Jogging", "Jog", "2 time(s) per week", "2020-01-01 08:00")
+    now = datetime.now()
+    records = (
+        (
+            ("Reading", "Jogging")[i % 2],
+            (now - timedelta(days=i // 2)).strftime("%Y-%m-%d %H:%M"),
+            "Done!",
+        )
+        for i in range(40)
+    )
+
+    assert tracker.checkoff_many(records) == 40
+
+    for habit_name in ("Reading", "Jogging"):
+        times, period = parse_frequency(get_streak_state(db_path, habit_name)[0])
+        habit_log = tracker.completion_count(habit_name, period)
+        assert sum(row[1] for row in habit_log) == 20
+        assert get_streak_state(db_path, habit_name)[1:4] == (
+            *tracker.streak_count(habit_log, period, times),
+            0,
+        )
+    close_pool(db_path)
+
+
+def test_checkoff_many_unknown_habit(tmp_path):
+    db_path = tmp_path / "tracker.db"
+    create_tables(db_path)
+    tracker = Habit_Tracker(db_path)
+    tracker.add_habit("Reading", "Read books", "1 time(s) per day", "2020-01-01 08:00")
+    records = [
+        ("Reading", "2025-01-01 08:00", "Done!"),
+        ("Cooking", "2025-01-01 09:00", "Done!"),
+    ]
+
+    with pytest.raises(ValueError):
+        tracker.checkoff_many(records)
+    assert tracker.completion_count("Reading", "day") == []
+    close_pool(db_path)
+
+
+def test_checkoff_many_unknown_status(tmp_path):
+    db_path = tmp_path / "tracker.db"
+    create_tables(db_path)
+    tracker = Habit_Tracker(db_path)
+    tracker.add_habit("Reading", "Read books", "1 time(s) per day", "2020-01-01 08:00")
+    records = [
+        ("Reading", "2025-01-01 08:00", "Done!"),
+        ("Reading", "2025-01-02 08:00", "done"),
+    ]
+
+    with pytest.raises(ValueError, match="done"):
+        tracker.checkoff_many(records)
+    assert tracker.completion_count("Reading", "day") == []
+    close_pool(db_path)
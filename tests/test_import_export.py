@@ -0,0 +1,105 @@
+import io
+import json
+import pytest
+import db
+import import_export
+from habit_tracker import Habit_Tracker
+
+
+@pytest.fixture
+def source_db(tmp_path):
+    db_path = tmp_path / "source.db"
+    db.create_tables(db_path)
+    tracker = Habit_Tracker(db_path)
+    tracker.add_habit(
+        "Reading", "Read, then write", "1 time(s) per day", "2025-01-01 08:00"
+    )
+    tracker.add_habit("Jogging", 'Jog "fast"', "2 time(s) per week", "2025-01-02 08:00")
+    tracker.checkoff_many(
+        [
+            ("Reading", "2025-01-01 09:00", "Done!"),
+            ("Jogging", "2025-01-03 07:30", "Skip."),
+            ("Reading", "2025-01-02 09:00", "Missed."),
+        ]
+    )
+    yield db_path
+    db.close_pool(db_path)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_round_trip(source_db, tmp_path, fmt):
+    target_db = tmp_path / "target.db"
+    db.create_tables(target_db)
+
+    for table in ("myhabit", "tracker"):
+        buffer = io.StringIO()
+        import_export.export_table(source_db, table, buffer, fmt)
+        buffer.seek(0)
+        import_export.import_table(target_db, table, buffer, fmt)
+
+    assert list(db.iter_myhabit(target_db)) == list(db.iter_myhabit(source_db))
+    assert list(db.iter_tracker(target_db)) == list(db.iter_tracker(source_db))
+    assert db.get_streak_state(target_db, "Reading")[3] == 0
+    db.close_pool(target_db)
+
+
+def test_interleaved_iterators_share_one_connection(source_db):
+    habits = db.iter_myhabit(source_db, chunk_size=1)
+    tracker = db.iter_tracker(source_db, chunk_size=1)
+    next(habits)
+    next(tracker)
+    # the tracker rows are still read after the habits iterator is closed
+    habits.close()
+    assert db.get_pool(source_db)._idle == []
+    assert len(list(tracker)) == 2
+
+    assert db.get_pool(source_db)._idle != []
+    with db.get_cursor(source_db) as cur:
+        cur.execute("SELECT COUNT(*) FROM tracker")
+        assert cur.fetchone() == (3,)
+
+
+def test_import_habits_skips_existing(source_db):
+    source = io.StringIO(
+        json.dumps(
+            {
+                "habit_name": "Reading",
+                "description": "",
+                "frequency": "3 time(s) per day",
+                "start_date": "2025-02-01 08:00",
+            }
+        )
+        + "\n"
+    )
+
+    assert import_export.import_table(source_db, "myhabit", source, "jsonl") == 0
+    assert db.get_data_from_myhabit_by_name(source_db, "frequency", "Reading") == (
+        "1 time(s) per day",
+    )
+
+
+def test_import_tracker_rejects_unknown_status(source_db):
+    source = io.StringIO(
+        "habit_name,date,status\n"
+        "Reading,2025-01-03 09:00,Done!\n"
+        "Reading,2025-01-04 09:00,done\n"
+    )
+
+    with pytest.raises(ValueError, match="done"):
+        import_export.import_table(source_db, "tracker", source, "csv")
+    assert len(list(db.iter_tracker(source_db))) == 3
+
+
+def test_command_line(source_db, tmp_path, capsys):
+    path = tmp_path / "tracker.jsonl"
+
+    import_export.main(["export", "tracker", str(path), "--db", str(source_db)])
+
+    lines = path.read_text().splitlines()
+    assert json.loads(lines[0]) == {
+        "habit_name": "Reading",
+        "date": "2025-01-01 09:00",
+        "status": "Done!",
+    }
+    assert len(lines) == 3
+    assert "Exported 3 tracker rows." in capsys.readouterr().err
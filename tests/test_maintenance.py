@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+
+import db
+import maintenance
+from habit_tracker import Habit_Tracker
+
+
+def test_check_and_rebuild_rollup(tmp_path, capsys):
+    db_file = str(tmp_path / "maintenance.db")
+    db.create_tables(db_file)
+    db.insert_myhabit(db_file, "Reading", "", "1 time(s) per day", "2025-01-01", 0, 0)
+    db.insert_tracker(db_file, "Reading", "2025-01-02 09:00", "Done!")
+
+    assert maintenance.main(["check-rollup", "--db", db_file]) == 0
+
+    with db.get_cursor(db_file) as cur:
+        cur.execute("DELETE FROM tracker_rollup WHERE period_kind = 'week'")
+        cur.connection.commit()
+    assert maintenance.main(["check-rollup", "--db", db_file]) == 1
+    assert "missing    habit 1 week" in capsys.readouterr().out
+
+    assert maintenance.main(["rebuild-rollup", "--db", db_file]) == 0
+    assert maintenance.main(["check-rollup", "--db", db_file]) == 0
+    db.close_pool(db_file)
+
+
+def streak_table(db_file):
+    with db.get_cursor(db_file) as cur:
+        cur.execute(
+            """
+                    SELECT m.habit_name, m.current_streak, m.max_streak, s.dirty, s.as_of,
+                           s.last_period, s.period_count, s.previous_run
+                    FROM myhabit m JOIN habit_streak s ON s.habit_id = m.habit_id
+                    ORDER BY m.habit_id
+                    """
+        )
+        return cur.fetchall()
+
+
+def streak_fixture(db_file):
+    db.create_tables(db_file)
+    today = date.today()
+    habits = [
+        ("Reading", "1 time(s) per day", [today - timedelta(d) for d in (0, 1, 2, 5)]),
+        ("Running", "2 time(s) per week", [today - timedelta(d) for d in (0, 0, 7, 7)]),
+        ("Baking", "1 time(s) per month", [today - timedelta(40)]),
+        ("Future", "1 time(s) per day", [today + timedelta(3)]),
+        ("Idle", "1 time(s) per day", []),
+    ]
+    for habit_name, frequency, days in habits:
+        db.insert_myhabit(db_file, habit_name, "", frequency, "2020-01-01", 0, 0)
+        habit_id = db.get_habit_id(db_file, habit_name)
+        db.insert_tracker_many(
+            db_file,
+            [(habit_id, day.strftime("%Y-%m-%d 08:00"), "Done!") for day in days],
+        )
+    return [habit_name for habit_name, _, _ in habits]
+
+
+def test_recompute_all_streaks_matches_update_streak(tmp_path):
+    expected_db = str(tmp_path / "expected.db")
+    tracker = Habit_Tracker(expected_db)
+    for habit_name in streak_fixture(expected_db):
+        tracker.update_streak(habit_name)
+
+    db_file = str(tmp_path / "recompute.db")
+    streak_fixture(db_file)
+    assert maintenance.recompute_all_streaks(db_file, workers=1, partitions=2) == 5
+    assert streak_table(db_file) == streak_table(expected_db)
+
+
+def test_recompute_all_streaks_in_worker_processes(tmp_path):
+    expected_db = str(tmp_path / "expected.db")
+    streak_fixture(expected_db)
+    maintenance.recompute_all_streaks(expected_db, workers=1)
+
+    db_file = str(tmp_path / "recompute.db")
+    streak_fixture(db_file)
+    assert maintenance.recompute_all_streaks(db_file, workers=2, partitions=3) == 5
+    assert streak_table(db_file) == streak_table(expected_db)
+
+
+def test_partition_habits(tmp_path):
+    db_file = str(tmp_path / "partitions.db")
+    db.create_tables(db_file)
+    assert maintenance.partition_habits(db_file, 4) == []
+
+    db.insert_myhabit_many(
+        db_file,
+        [(f"Habit {i}", "", "1 time(s) per day", "2025-01-01") for i in range(10)],
+    )
+    assert maintenance.partition_habits(db_file, 4) == [
+        (1, 3),
+        (4, 6),
+        (7, 9),
+        (10, 10),
+    ]
+    assert maintenance.partition_habits(db_file, 1) == [(1, 10)]
+
+
+def test_recompute_streaks_command(tmp_path, capsys):
+    db_file = str(tmp_path / "command.db")
+    streak_fixture(db_file)
+
+    assert (
+        maintenance.main(["recompute-streaks", "--db", db_file, "--workers", "1"]) == 0
+    )
+    assert "Recomputed the streaks of 5 habits" in capsys.readouterr().err
+    assert Habit_Tracker(db_file).get_streak("Reading") == (3, 3)
@@ -0,0 +1,92 @@
+import threading
+
+import db
+import profiling
+from analysis import Analysis
+from habit_tracker import Habit_Tracker
+import pytest
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    db_file = str(tmp_path / "profiling.db")
+    db.create_tables(db_file)
+    tracker = Habit_Tracker(db_file)
+    tracker.add_habit("Reading", "", "1 time(s) per day", "2025-01-01 08:00")
+    tracker.add_habit("Running", "", "2 time(s) per week", "2025-01-01 08:00")
+    yield db_file
+    db.close_pool(db_file)
+
+
+def test_nothing_is_recorded_without_a_profile(db_file):
+    assert profiling.active_profile() is None
+    with db.get_cursor(db_file) as cur:
+        assert not isinstance(cur, profiling.ProfiledCursor)
+
+
+def test_record_counts_calls_queries_and_rows(db_file):
+    with profiling.record() as profile:
+        Analysis(db_file).habit_list()
+        Habit_Tracker(db_file).get_streak("Reading")
+
+    assert profiling.active_profile() is None
+    assert profile.calls["Analysis.habit_list"][0] == 1
+    assert profile.calls["db.get_distinct_value"][0] == 1
+    assert profile.calls["Habit_Tracker.get_streak"][0] == 1
+    assert profile.calls["db.get_streak_state"][0] == 1
+    assert profile.seconds >= profile.calls["Analysis.habit_list"][1]
+
+    executions, rows, _ = profile.queries["SELECT DISTINCT habit_name FROM myhabit"]
+    assert (executions, rows) == (1, 2)
+
+
+def test_generators_and_executemany(db_file):
+    with profiling.record() as profile:
+        assert len(list(db.iter_myhabit(db_file, chunk_size=1))) == 2
+        db.insert_myhabit_many(
+            db_file,
+            ((f"Habit {i}", "", "1 time(s) per day", "2025-01-01") for i in range(3)),
+        )
+
+    assert profile.calls["db.iter_myhabit"][0] == 1
+    select = next(sql for sql in profile.queries if sql.startswith("SELECT habit_name"))
+    assert profile.queries[select][:2] == [1, 2]
+    insert = next(
+        sql for sql in profile.queries if sql.startswith("INSERT INTO myhabit")
+    )
+    assert profile.queries[insert][:2] == [3, 3]
+
+
+def test_other_threads_are_not_recorded(db_file):
+    with profiling.record() as profile:
+        thread = threading.Thread(target=Analysis(db_file).habit_list)
+        thread.start()
+        thread.join()
+
+    assert "Analysis.habit_list" not in profile.calls
+
+
+def test_summary_and_prometheus(db_file):
+    with profiling.record() as profile:
+        Analysis(db_file).rank_all()
+
+    summary = profile.summary()
+    assert "Analysis.rank_all" in summary
+    assert "queries in" in summary.splitlines()[0]
+
+    text = profile.prometheus()
+    assert "# TYPE habit_tracker_calls_total counter" in text
+    assert 'habit_tracker_calls_total{function="Analysis.rank_all"} 1' in text
+    assert 'query="SELECT m.habit_id, m.habit_name' in text
+
+
+def test_merge_and_escape():
+    first, second = profiling.Profile(), profiling.Profile()
+    first.record_call("f", 0.5)
+    second.record_call("f", 0.25)
+    second.record_query('SELECT "a"', 2, 0.1)
+    first.merge(second)
+
+    assert first.calls["f"] == [2, 0.75]
+    assert first.queries['SELECT "a"'] == [1, 2, 0.1]
+    assert profiling.escape('a\\b"c\nd') == 'a\\\\b\\"c\\nd'
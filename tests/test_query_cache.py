@@ -0,0 +1,108 @@
+import analysis
+from analysis import Analysis
+from db import create_tables, close_pool
+from habit_tracker import Habit_Tracker
+from query_cache import QueryCache, bump_generation, generation
+import pytest
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    db = str(tmp_path / "cache.db")
+    create_tables(db)
+    yield db
+    close_pool(db)
+
+
+def test_get_or_compute_hit_and_miss():
+    cache = QueryCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [1, 2]
+
+    assert cache.get_or_compute("a.db", "habit_list", (), compute) == [1, 2]
+    assert cache.get_or_compute("a.db", "habit_list", (), compute) == [1, 2]
+    assert cache.get_or_compute("b.db", "habit_list", (), compute) == [1, 2]
+    assert len(calls) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_bump_generation_invalidates():
+    cache = QueryCache()
+    values = iter(["old", "new"])
+    before = generation("gen.db")
+
+    assert cache.get_or_compute("gen.db", "f", (), lambda: next(values)) == "old"
+    bump_generation("gen.db")
+    assert generation("gen.db") == before + 1
+    assert cache.get_or_compute("gen.db", "f", (), lambda: next(values)) == "new"
+
+
+def test_ttl_expires_entries():
+    clock = FakeClock()
+    cache = QueryCache(ttl=10, clock=clock)
+    values = iter([1, 2])
+
+    assert cache.get_or_compute("t.db", "f", (), lambda: next(values)) == 1
+    clock.now = 9
+    assert cache.get_or_compute("t.db", "f", (), lambda: next(values)) == 1
+    clock.now = 20
+    assert cache.get_or_compute("t.db", "f", (), lambda: next(values)) == 2
+
+
+def test_lru_eviction():
+    cache = QueryCache(max_entries=2)
+    cache.get_or_compute("l.db", "f", (1,), lambda: 1)
+    cache.get_or_compute("l.db", "f", (2,), lambda: 2)
+    cache.get_or_compute("l.db", "f", (1,), lambda: 1)
+    cache.get_or_compute("l.db", "f", (3,), lambda: 3)
+
+    assert len(cache) == 2
+    assert cache.get_or_compute("l.db", "f", (1,), lambda: "recomputed") == 1
+    assert cache.get_or_compute("l.db", "f", (2,), lambda: "recomputed") == "recomputed"
+
+
+def test_analysis_without_cache_queries_every_time(monkeypatch):
+    calls = []
+
+    def fake_function(db, column, value):
+        calls.append(value)
+        return [("Swimming",)]
+
+    monkeypatch.setattr(analysis, "get_distinct_value", fake_function)
+    sut = Analysis("fake_db.db")
+    sut.habit_list()
+    sut.habit_list()
+
+    assert len(calls) == 2
+
+
+def test_analysis_cache_is_invalidated_by_tracker_writes(db_file):
+    cache = QueryCache()
+    sut = Analysis(db_file, cache=cache)
+    tracker = Habit_Tracker(db_file)
+
+    assert sut.habit_list() == []
+    tracker.add_habit("Reading", "", "1 time(s) per day", "2025-01-01 08:00")
+    assert sut.habit_list() == ["Reading"]
+    assert sut.habit_list() == ["Reading"]
+    assert cache.hits == 1
+
+    assert sut.habit_data_in_selected_period("2025-01-02")[0] is None
+    tracker.checkoff("Reading", "2025-01-02 09:00", "Done!")
+    assert sut.habit_data_in_selected_period("2025-01-02")[0] == [
+        ("2025-01-02 09:00", "Reading", "Done!")
+    ]
+
+    tracker.delete_habit("Reading")
+    assert sut.habit_list() == []
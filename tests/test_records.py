@@ -0,0 +1,73 @@
+from analysis import Analysis
+from db import close_pool, create_tables, insert_myhabit, insert_tracker
+from records import HabitLog, LogEntry, Status, minute_text
+import pytest
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    db_file = str(tmp_path / "records.db")
+    create_tables(db_file)
+    yield db_file
+    close_pool(db_file)
+
+
+def test_status():
+    assert Status.from_label("Skip.") is Status.SKIP
+    assert Status.MISSED.label == "Missed."
+    assert [status.label for status in Status] == ["Done!", "Skip.", "Missed."]
+
+
+def test_minute_text():
+    assert minute_text(0) == "1970-01-01 00:00"
+    assert minute_text(1440 * 365 + 61) == "1971-01-01 01:01"
+
+
+def test_habit_log_sequence():
+    log = HabitLog.from_rows([(120, "Done!"), (60, "Missed."), (0, "Done!")])
+
+    assert len(log) == 3
+    assert log[1] == LogEntry(60, Status.MISSED)
+    assert log[-1].date == "1970-01-01 00:00"
+    assert len(log[:2]) == 2 and isinstance(log[:2], HabitLog)
+    assert [status for _, status in log] == ["Done!", "Missed.", "Done!"]
+    assert log.status_count("Done!") == 2
+    assert log.status_count(Status.SKIP) == 0
+    assert log.rows()[0] == ("1970-01-01 02:00", "Done!")
+    assert len(log.minutes.tobytes()) + len(log.statuses.tobytes()) == 3 * 9
+
+
+def test_unknown_statuses_are_kept(db_file):
+    log = HabitLog.from_rows([(180, "Done!"), (120, "done"), (60, None), (0, "done")])
+
+    assert log.labels == ("Done!", "Skip.", "Missed.", "done")
+    assert log.statuses.tolist() == [0, 3, -1, 3]
+    assert log[1] == LogEntry(120, None, "done") and log[1].status is None
+    assert log[2].label is None
+    assert [status for _, status in log[1:]] == ["done", None, "done"]
+    assert log.status_count("done") == 2 and log.status_count(None) == 1
+    with pytest.raises(ValueError, match="Unknown status"):
+        Status.from_label("done")
+    with pytest.raises(ValueError, match="Unknown status"):
+        HabitLog().status_count("done")
+
+    insert_myhabit(db_file, "Reading", "", "1 time(s) per day", "2025-01-01", 0, 0)
+    insert_tracker(db_file, "Reading", "2025-01-01 08:00", "done")
+    insert_tracker(db_file, "Reading", "2025-01-02 08:00", None)
+    analysis = Analysis(db_file)
+    assert analysis.habit_log_records("Reading").rows() == (
+        analysis.habit_log_from_tracker("Reading")
+    )
+    page, _ = analysis.habit_log_page("Reading", 1)
+    assert page.rows() == [("2025-01-02 08:00", None)]
+
+
+def test_habit_log_records_match_habit_log_from_tracker(db_file):
+    insert_myhabit(db_file, "Reading", "", "1 time(s) per day", "2025-01-01", 0, 0)
+    for day, status in ((1, "Done!"), (3, "Skip."), (2, "Missed.")):
+        insert_tracker(db_file, "Reading", f"2025-01-0{day} 2{day}:0{day}", status)
+
+    analysis = Analysis(db_file)
+    log = analysis.habit_log_records("Reading")
+    assert log.rows() == analysis.habit_log_from_tracker("Reading")
+    assert len(analysis.habit_log_records("Unknown")) == 0
@@ -0,0 +1,67 @@
+from datetime import date, datetime, timedelta
+import random
+import habit_tracker
+from habit_tracker import Habit_Tracker
+import streak_engine
+import pytest
+from tests.test_habit_tracker import fake_count_completions
+
+
+def random_log(rng, period):
+    span = {"day": 60, "week": 400, "month": 1500}[period]
+    now = datetime.now()
+    return [
+        (
+            (now - timedelta(minutes=rng.randrange(span * 24 * 60))).strftime(
+                "%Y-%m-%d %H:%M"
+            ),
+            rng.choice(["Done!", "Skip.", "Missed."]),
+        )
+        for _ in range(rng.randint(0, 120))
+    ]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_engine_matches_habit_tracker(monkeypatch, seed):
+    rng = random.Random(seed)
+    period = ("day", "week", "month")[seed % 3]
+    times = rng.randint(1, 3)
+    log = random_log(rng, period)
+    monkeypatch.setattr(habit_tracker, "count_completions", fake_count_completions(log))
+    sut = Habit_Tracker("fake_db.db")
+    expected_log = sut.completion_count("Swimming", period)
+
+    dates, completed = streak_engine.log_arrays(log)
+
+    assert streak_engine.completion_count(dates, completed, period) == expected_log
+    assert streak_engine.streak_count(
+        dates, completed, period, times
+    ) == sut.streak_count(expected_log, period, times)
+
+
+def test_streak_count_runs():
+    log = [
+        ("2025-01-01 08:00", "Done!"),
+        ("2025-01-02 08:00", "Done!"),
+        ("2025-01-02 09:00", "Missed."),
+        ("2025-01-04 08:00", "Skip."),
+        ("2025-01-07 08:00", "Done!"),
+    ]
+    dates, completed = streak_engine.log_arrays(log)
+
+    assert streak_engine.streak_count(
+        dates, completed, "day", 1, today=date(2025, 1, 7)
+    ) == (1, 2)
+    assert streak_engine.streak_count(
+        dates, completed, "day", 1, today=date(2025, 1, 8)
+    ) == (0, 2)
+    assert streak_engine.streak_count(
+        dates, completed, "week", 2, today=date(2025, 1, 7)
+    ) == (0, 1)
+
+
+def test_streak_count_empty_log():
+    dates, completed = streak_engine.log_arrays([])
+
+    assert streak_engine.completion_count(dates, completed, "day") == []
+    assert streak_engine.streak_count(dates, completed, "month", 1) == (0, 0)
@@ -0,0 +1,77 @@
+import os
+
+import db
+from tenants import TenantRouter, admin_report
+import pytest
+
+
+@pytest.fixture
+def router(tmp_path):
+    router = TenantRouter(str(tmp_path / "tenants"), max_open=2)
+    yield router
+    router.close()
+
+
+def test_shard_path(router):
+    assert router.shard_path("alice") == os.path.join(router.root, "user-alice.db")
+    assert router.shard_path(42) == os.path.join(router.root, "user-42.db")
+    hashed = router.shard_path("../bob@example.com")
+    assert os.path.dirname(hashed) == router.root
+    assert os.path.basename(hashed).startswith("hash-")
+    assert hashed == router.shard_path("../bob@example.com")
+
+
+def test_users_get_separate_databases(router):
+    router.tracker("alice").add_habit("Reading", "", "1 time(s) per day", "2025-01-01")
+    router.tracker("bob").add_habit("Running", "", "1 time(s) per week", "2025-01-01")
+
+    assert router.analysis("alice").habit_list() == ["Reading"]
+    assert router.analysis("bob").habit_list() == ["Running"]
+    assert db.get_schema_version(router.shard_path("carol")) == 0
+    router.database("carol")
+    assert db.get_schema_version(router.shard_path("carol")) == db.SCHEMA_VERSION
+
+
+def test_least_recently_used_shard_is_closed(router):
+    for user_id in ("alice", "bob", "alice", "carol"):
+        router.database(user_id)
+
+    assert router.open_shards() == [
+        router.shard_path("alice"),
+        router.shard_path("carol"),
+    ]
+    assert db.database_key(router.shard_path("bob")) not in db._pools
+    assert len(router.shards()) == 3
+
+
+def test_stale_tracker_reopens_a_counted_and_configured_pool(router):
+    alice = router.tracker("alice")
+    router.database("bob")
+    router.database("carol")
+    assert db.database_key(router.shard_path("alice")) not in db._pools
+
+    alice.add_habit("Reading", "", "1 time(s) per day", "2025-01-01 08:00")
+
+    assert router.open_shards() == [
+        router.shard_path("carol"),
+        router.shard_path("alice"),
+    ]
+    assert db.database_key(router.shard_path("bob")) not in db._pools
+    pool = db.get_pool(router.shard_path("alice"))
+    assert pool.pragmas == db.STORAGE_PROFILES["wal"]
+    with db.get_cursor(router.shard_path("alice")) as cur:
+        assert cur.execute("PRAGMA busy_timeout").fetchone() == (5000,)
+
+
+def test_admin_report_fans_out_over_shards(router):
+    for i, user_id in enumerate(("alice", "bob", "carol")):
+        tracker = router.tracker(user_id)
+        tracker.add_habit("Reading", "", "1 time(s) per day", "2025-01-01 08:00")
+        for day in range(1, i + 2):
+            tracker.checkoff("Reading", f"2025-01-{day:02} 09:00", "Done!")
+
+    summaries, totals = admin_report(router, max_workers=2)
+
+    assert summaries[router.shard_path("carol")]["activities"] == 3
+    assert summaries[router.shard_path("carol")]["longest_streak"] == 3
+    assert totals == {"shards": 3, "habits": 3, "activities": 6, "longest_streak": 3}